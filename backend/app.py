@@ -1,15 +1,21 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Body
+from fastapi import FastAPI, Depends, HTTPException, Query, Body, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
 import os
 from .database import engine, get_db, SessionLocal
-from . import models, crud
+from .async_database import get_async_db
+from . import models, crud, rollup_service, export_service, arrow_format
+from .responses import FastJSONResponse
 from .kpi_worker import start as start_kpi_worker
-from .insights_generator import generate_insights_from_kpis
+from .kpi_broadcaster import broadcaster as kpi_broadcaster
+from .insights_service import insights
 from .chatbot_service import get_chatbot_response
 from utils.logger import get_logger
 
@@ -34,14 +40,11 @@ app.add_middleware(
 )
 
 # Start KPI worker when app starts. In uvicorn reload mode this may run twice; for demo it's okay.
+# The worker is the only KPI writer; it computes a snapshot immediately on start.
 @app.on_event("startup")
 async def startup_event():
-    db = SessionLocal()
-    try:
-        if not db.query(models.KPI).first():
-            crud.compute_kpis(db)
-    finally:
-        db.close()
+    # the worker publishes each snapshot to /kpis/stream via this loop
+    kpi_broadcaster.attach_loop(asyncio.get_running_loop())
     start_kpi_worker()
 
 
@@ -54,80 +57,172 @@ def get_db_dep():
         db.close()
 
 
+def _arrow_response(rows, schema, headers=None) -> Response:
+    """
+    Arrow IPC stream response for clients that sent
+    ``Accept: application/vnd.apache.arrow.stream``.
+    """
+    if arrow_format.pa is None:
+        raise HTTPException(status_code=406, detail="Arrow output requires pyarrow")
+    batch = arrow_format.rows_to_record_batch(rows, schema)
+    return Response(
+        content=arrow_format.to_ipc_stream(batch),
+        media_type=arrow_format.ARROW_STREAM_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def _etag(*parts) -> str:
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest()[:20] + '"'
+
+
+def _not_modified(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+
+def _validator_headers(etag: str) -> dict:
+    # Same set on 200 and 304 so caches key and revalidate consistently
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=_validator_headers(etag))
+
+
 # --- Transactions endpoint
 @app.get("/transactions")
-def get_transactions(
+async def get_transactions(
     limit: int = Query(50, gt=0, le=1000),
     page: int = Query(1, gt=0),
+    cursor: str = Query(
+        None,
+        description="Opaque next_cursor from a previous response (keyset pagination; overrides page)",
+    ),
     type: str = Query(None, description="Filter by TRN_TYPE"),
     status: str = Query(None, description="Filter by STATUS (SUCCESS or FAILED)"),
     since: str = Query(
         None,
         description="Filter by time window: 'past_hour' or 'past_24h'",
     ),
-    db: Session = Depends(get_db_dep),
+    fields: str = Query(
+        None,
+        description="Comma-separated columns to return, e.g. 'TRN_REF_NO,TRN_AMOUNT,STATUS' (default: all)",
+    ),
+    accept: str = Header(None),
+    if_none_match: str = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    offset = (page - 1) * limit
-    q = db.query(models.Transaction)
-
-    # --- Apply filters ---
-    if type:
-        q = q.filter(models.Transaction.TRN_TYPE == type.upper())
-    if status:
-        q = q.filter(models.Transaction.STATUS == status.upper())
-    if since:
-        now = datetime.now(timezone.utc)
-        if since == "past_hour":
-            q = q.filter(models.Transaction.TRN_DATE >= now - timedelta(hours=1))
-        elif since == "past_24h":
-            q = q.filter(models.Transaction.TRN_DATE >= now - timedelta(hours=24))
-
-    # --- Pagination ---
-    q = q.order_by(models.Transaction.id.desc()).offset(offset).limit(limit).all()
-
-    result = []
-    for t in q:
-        result.append({
-            "TRN_REF_NO": t.TRN_REF_NO,
-            "ACCOUNT_NO": t.ACCOUNT_NO,
-            "CUSTOMER_ID": t.CUSTOMER_ID,
-            "TRN_DATE": t.TRN_DATE.isoformat() if t.TRN_DATE else None,
-            "TRN_DESC": t.TRN_DESC,
-            "DRCR_INDICATOR": t.DRCR_INDICATOR,
-            "TRN_AMOUNT": str(t.TRN_AMOUNT),
-            "TRN_CCY": t.TRN_CCY,
-            "ACCOUNT_CCY": t.ACCOUNT_CCY,
-            "OPENING_BALANCE": str(t.OPENING_BALANCE),
-            "CLOSING_BALANCE": str(t.CLOSING_BALANCE),
-            "RUNNING_BALANCE": str(t.RUNNING_BALANCE),
-            "CREDIT_ACCOUNT": t.CREDIT_ACCOUNT,
-            "CREDIT_ACCOUNT_CCY": t.CREDIT_ACCOUNT_CCY,
-            "TRN_TYPE": t.TRN_TYPE,
-            "STATUS": t.STATUS,
-            "BANK_CHARGES": str(t.BANK_CHARGES),
-        })
-
-    return {"page": page, "limit": limit, "transactions": result}
+    try:
+        cols = crud.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # --- Conditional GET for the newest page; a sliding ``since`` window
+    # changes the page without new rows, so it is not cached ---
+    headers = {}
+    if not cursor and page == 1 and since not in crud.SINCE_WINDOWS:
+        version = await db.run_sync(crud.transaction_page_version)
+        etag = _etag("txn", version, limit, type, status, cols, arrow_format.wants_arrow(accept))
+        if _not_modified(if_none_match, etag):
+            return _not_modified_response(etag)
+        headers = _validator_headers(etag)
+
+    # --- Apply filters (projected columns only; rows come back as tuples) ---
+    stmt = crud.filter_transactions(crud.transaction_columns_select(cols), type, status, since)
+
+    # --- Pagination: keyset (id < last_id) when a cursor is given, else page/offset ---
+    if cursor:
+        try:
+            last_id = crud.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stmt = stmt.where(models.Transaction.id < last_id)
+    else:
+        stmt = stmt.offset((page - 1) * limit)
+    rows = (await db.execute(stmt.order_by(models.Transaction.id.desc()).limit(limit))).all()
+    next_cursor = crud.encode_cursor(rows[-1][0]) if len(rows) == limit else None
+
+    # --- Columnar output: one typed record batch; the cursor travels in a header ---
+    if arrow_format.wants_arrow(accept):
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return _arrow_response([r[1:] for r in rows], arrow_format.api_transaction_schema(cols), headers)
+
+    # Decimals serialize as exact strings and dates as ISO 8601 (FastJSONResponse)
+    return FastJSONResponse({
+        "page": None if cursor else page,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "transactions": [dict(zip(cols, r[1:])) for r in rows],
+    }, headers=headers)
+
+
+# --- Bulk export endpoint (streams; no row limit)
+@app.get("/transactions/export")
+def export_transactions(
+    format: str = Query("csv", description="'csv', 'ndjson' or 'parquet'"),
+    start: datetime = Query(None, description="Inclusive lower bound on TRN_DATE"),
+    end: datetime = Query(None, description="Exclusive upper bound on TRN_DATE"),
+    type: str = Query(None, description="Filter by TRN_TYPE"),
+    status: str = Query(None, description="Filter by STATUS (SUCCESS or FAILED)"),
+):
+    if format not in export_service.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+    if format == "parquet" and export_service.arrow_format.pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    media_type, ext = export_service.EXPORT_FORMATS[format]
+    span = "_".join(d.date().isoformat() for d in (start, end) if d) or "all"
+    return StreamingResponse(
+        export_service.stream_transactions(format, start, end, type, status),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions_{span}.{ext}"'},
+    )
 
 
 # --- KPIs endpoint
 @app.get("/kpis")
-def get_kpis(
+async def get_kpis(
     history: bool = Query(False),
     limit: int = Query(10, gt=0, le=100),
-    db: Session = Depends(get_db_dep),
+    range: str = Query(
+        None,
+        description="History window: 'past_hour', 'past_24h', 'past_7d' or 'past_30d'",
+    ),
+    accept: str = Header(None),
+    if_none_match: str = Header(None),
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db),
 ):
+    # Conditional GET: one cheap version query decides between 304 and a full read
+    arrow = arrow_format.wants_arrow(accept)
     if history:
-        rows = (
-            db.query(models.KPI)
-            .order_by(models.KPI.computed_at.desc())
-            .limit(limit)
-            .all()
-        )
+        if range and range not in crud.KPI_HISTORY_RANGES:
+            raise HTTPException(status_code=400, detail=f"Unsupported range '{range}'")
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        version = await db.run_sync(crud.kpi_history_version, range_=range, limit=limit, now=now)
+        etag = _etag("kpi-history", range, version, arrow)
+        if _not_modified(if_none_match, etag):
+            return _not_modified_response(etag)
+        headers = _validator_headers(etag)
+
+        rows = await db.run_sync(crud.get_kpi_history, range_=range, limit=limit, now=now)
+        if arrow:
+            return _arrow_response(
+                arrow_format.kpi_rows(rows, crud.kpi_txn_type_split),
+                arrow_format.kpi_history_schema(),
+                headers,
+            )
+        response.headers.update(headers)
         return {
+            "resolution": crud.KPI_HISTORY_RANGES[range][1] if range else "raw",
             "history": [
                 {
                     "computed_at": r.computed_at.isoformat(),
+                    "resolution": r.resolution,
                     "total_transactions": r.total_transactions,
                     "total_amount_usd": str(r.total_amount_usd),
                     "total_amount_rm": str(r.total_amount_rm),
@@ -137,72 +232,80 @@ def get_kpis(
                     "failure_rate": float(r.failure_rate),
                     "total_bank_charges": str(r.total_bank_charges),
                     # 👇 include fail_count + failure_rate by type
-                    "txn_type_split": {
-                        "TRANSFER": {
-                            "count": r.transfer_count,
-                        },
-                        "DEPOSIT": {
-                            "count": r.deposit_count,
-                        },
-                        "LOAN_PAYMENT": {
-                            "count": r.loan_payment_count,
-                        },
-                        "BILL_PAYMENT": {
-                            "count": r.bill_payment_count,
-                        },
-                    },
+                    "txn_type_split": crud.kpi_txn_type_split(r),
                 }
                 for r in rows
             ]
         }
     else:
-        r = db.query(models.KPI).order_by(models.KPI.computed_at.desc()).first()
-        if not r:
+        # Pure read of the last materialized snapshot; the KPI worker is the only writer.
+        # The ETag comes from the figures of the snapshot read here, so the
+        # worker's identical 5-second snapshots still revalidate as 304
+        latest = await db.run_sync(crud.get_latest_kpis)
+        if not latest:
             raise HTTPException(
                 status_code=404,
                 detail="No KPI snapshot found yet. Wait for scheduler to run.",
             )
+        etag = _etag("kpis", crud.kpi_snapshot_version(latest))
+        if _not_modified(if_none_match, etag):
+            return _not_modified_response(etag)
+        response.headers.update(_validator_headers(etag))
+        return latest
 
-        # 👇 Instead of reconstructing txn_type_split here, call compute_kpis again
-        # so we can reuse the enriched txn_types (with fail_count + failure_rate)
-        latest = crud.compute_kpis(db)
 
-        return latest
+# --- KPI push stream (Server-Sent Events): full snapshot on connect, then deltas
+SSE_HEARTBEAT_SECONDS = 15
 
 
-# In-memory cache for insights
-INSIGHTS_CACHE = {
-    "last_generated": None,
-    "last_count": 0,
-    "data": []
-}
+@app.get("/kpis/stream")
+async def stream_kpis(request: Request):
+    queue = kpi_broadcaster.subscribe()
 
-@app.get("/insights")
-def get_insights(
+    async def events():
+        try:
+            first = kpi_broadcaster.snapshot_message()
+            if first:
+                yield first
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"  # keeps proxies from closing an idle stream
+        finally:
+            kpi_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Transaction time series (served from txn_rollups, never the raw ledger)
+@app.get("/kpis/timeseries")
+def get_kpis_timeseries(
+    type: str = Query(None, description="Filter by TRN_TYPE"),
+    range: str = Query("past_hour", description="'past_hour', 'past_24h' or 'past_7d'"),
+    since_bucket: datetime = Query(
+        None,
+        description="Only buckets starting at or after this bucket start (incremental refresh)",
+    ),
     db: Session = Depends(get_db_dep),
 ):
-    global INSIGHTS_CACHE
-    now = datetime.now(timezone.utc)
+    if range not in rollup_service.TIMESERIES_RANGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported range '{range}'")
+    return rollup_service.get_timeseries(
+        db, range, type.upper() if type else None, since_bucket=since_bucket
+    )
 
-    should_refresh = False
-    if not INSIGHTS_CACHE["last_generated"]:
-        should_refresh = True
-    else:
-        elapsed = (now - INSIGHTS_CACHE["last_generated"]).total_seconds()
-        INSIGHTS_CACHE["last_count"] += 1
-        if elapsed >= 60 or INSIGHTS_CACHE["last_count"] >= 10:
-            should_refresh = True
-
-    if should_refresh:
-        logger.info("Refreshing insights...")
-        latest_kpis = crud.compute_kpis(db)
-        logger.info(latest_kpis)
-        INSIGHTS_CACHE["data"] = generate_insights_from_kpis(latest_kpis)
-        logger.info(f"New insights: {INSIGHTS_CACHE['data']}")
-        INSIGHTS_CACHE["last_generated"] = now
-        INSIGHTS_CACHE["last_count"] = 0
-
-    return {"insights": INSIGHTS_CACHE["data"]}
+
+# Insights are generated in the background after materially changed KPI
+# snapshots (see insights_service); this only reads the cached result
+@app.get("/insights")
+async def get_insights():
+    # in-memory read: stays on the event loop, no threadpool slot
+    return insights.snapshot()
 
 # --- Chatbot endpoint
 @app.post("/chatbot")
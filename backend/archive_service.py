@@ -0,0 +1,287 @@
+# backend/archive_service.py
+"""
+Hot/cold management of the transactions ledger.
+
+On MySQL the ledger is RANGE partitioned by month on TRN_DATE (migration
+0004). ``ensure_partitions`` keeps monthly partitions ahead of the clock.
+``run_archival`` moves every closed month older than the hot window into
+a Parquet file, stores daily rollups in ``txn_archive_rollups`` and drops
+the month from the hot table. KPI rebuilds and reports read the rollups
+for archived months, so cold data is never rescanned.
+"""
+import os
+from datetime import datetime, timezone, date
+from decimal import Decimal
+
+from sqlalchemy import func, case, select, text
+from sqlalchemy.orm import Session
+
+from . import arrow_format
+from .crud import keyset_chunks, safe_txn_id
+from .models import Transaction, TxnArchive, TxnArchiveRollup
+from utils.logger import get_logger
+
+logger = get_logger("ArchiveService")
+
+ARCHIVE_DIR = os.getenv(
+    "ARCHIVE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "archive")),
+)
+# Months kept in the hot table, including the current one
+HOT_MONTHS = int(os.getenv("HOT_MONTHS", "3"))
+# Monthly partitions created ahead of the current month
+PARTITIONS_AHEAD = 2
+EXPORT_CHUNK_ROWS = 50000
+
+
+def month_start(value) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    idx = month.year * 12 + month.month - 1 + n
+    return datetime(idx // 12, idx % 12 + 1, 1)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _is_mysql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "mysql"
+
+
+# --- Partition maintenance (MySQL only) ---
+def list_partitions(db: Session) -> dict:
+    """
+    {partition_name: upper bound ('YYYY-MM-DD' or 'MAXVALUE')} for the
+    transactions table; empty if it is not partitioned.
+    """
+    rows = db.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'transactions' "
+        "AND PARTITION_NAME IS NOT NULL"
+    )).fetchall()
+    return {name: (desc or "").strip("'") for name, desc in rows}
+
+
+def ensure_partitions(db: Session, now: datetime = None) -> list:
+    """
+    Split monthly partitions off ``pmax`` up to PARTITIONS_AHEAD months past
+    ``now``. Months that already hold rows in pmax (first run after the
+    migration) are copied once by MySQL during the reorganize.
+    """
+    if not _is_mysql(db):
+        return []
+    partitions = list_partitions(db)
+    if "pmax" not in partitions:
+        return []
+
+    bounds = [
+        datetime.strptime(b[:10], "%Y-%m-%d")
+        for b in partitions.values()
+        if b != "MAXVALUE"
+    ]
+    month = max(bounds) if bounds else month_start(now or _now())
+    last = add_months(month_start(now or _now()), PARTITIONS_AHEAD)
+
+    new_parts = []
+    while month <= last:
+        upper = add_months(month, 1)
+        new_parts.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper:%Y-%m-%d}')"
+        )
+        month = upper
+    if not new_parts:
+        return []
+
+    db.execute(text(
+        "ALTER TABLE transactions REORGANIZE PARTITION pmax INTO ("
+        + ", ".join(new_parts)
+        + ", PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+    ))
+    logger.info(f"[archive] added {len(new_parts)} monthly partitions")
+    return new_parts
+
+
+# --- Archival ---
+def is_archived(db: Session, day) -> bool:
+    month = month_start(day)
+    return db.query(TxnArchive.id).filter(TxnArchive.month_start == month).first() is not None
+
+
+def cold_months(db: Session, now: datetime = None) -> list:
+    """
+    Closed months older than the hot window that still have rows in the
+    hot table, oldest first.
+    """
+    cutoff = add_months(month_start(now or _now()), -(HOT_MONTHS - 1))
+    oldest = (
+        db.query(func.min(Transaction.TRN_DATE))
+        .filter(Transaction.TRN_DATE < cutoff)
+        .scalar()
+    )
+    if oldest is None:
+        return []
+    months = []
+    month = month_start(oldest)
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _export_parquet(db: Session, start: datetime, end: datetime, max_id: int, path: str) -> int:
+    pa = arrow_format.require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = arrow_format.transaction_schema()
+    cols = [getattr(Transaction, name) for name in arrow_format.TRANSACTION_COLUMNS]
+    stmt = select(Transaction.id, *cols).where(
+        Transaction.TRN_DATE >= start, Transaction.TRN_DATE < end, Transaction.id <= max_id
+    )
+    rows_written = 0
+    tmp_path = path + ".tmp"
+    # Keyset chunks: mysqlconnector has no server-side cursors, so a single
+    # streamed SELECT would still buffer the whole month client-side
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        for chunk in keyset_chunks(db, stmt, EXPORT_CHUNK_ROWS):
+            chunk = [row[1:] for row in chunk]
+            writer.write_batch(arrow_format.rows_to_record_batch(chunk, schema))
+            rows_written += len(chunk)
+    os.replace(tmp_path, path)
+    return rows_written
+
+
+def _daily_rollups(db: Session, start: datetime, end: datetime, max_id: int) -> list:
+    T = Transaction
+    day = func.date(T.TRN_DATE)
+    rows = (
+        db.query(
+            day,
+            T.CUSTOMER_ID,
+            T.TRN_CCY,
+            T.ACCOUNT_CCY,
+            T.TRN_TYPE,
+            func.count(T.id),
+            func.sum(case((T.DRCR_INDICATOR == "DR", 1), else_=0)),
+            func.sum(case((T.DRCR_INDICATOR == "CR", 1), else_=0)),
+            func.sum(case((T.STATUS == "SUCCESS", 1), else_=0)),
+            func.sum(case((T.STATUS == "FAILED", 1), else_=0)),
+            func.sum(T.TRN_AMOUNT),
+            func.sum(case((T.STATUS == "SUCCESS", T.BANK_CHARGES), else_=0)),
+            func.max(T.id),
+        )
+        .filter(T.TRN_DATE >= start, T.TRN_DATE < end, T.id <= max_id)
+        .group_by(day, T.CUSTOMER_ID, T.TRN_CCY, T.ACCOUNT_CCY, T.TRN_TYPE)
+        .all()
+    )
+    rollups = []
+    for (d, cust, ccy, acct_ccy, ttype, cnt, dr, cr, ok, fails, amount, charges, max_id) in rows:
+        if not isinstance(d, (date, datetime)):
+            d = datetime.strptime(str(d), "%Y-%m-%d")
+        rollups.append(TxnArchiveRollup(
+            day=datetime(d.year, d.month, d.day),
+            CUSTOMER_ID=cust,
+            TRN_CCY=ccy,
+            ACCOUNT_CCY=acct_ccy,
+            TRN_TYPE=ttype,
+            txn_count=int(cnt or 0),
+            dr_count=int(dr or 0),
+            cr_count=int(cr or 0),
+            success_count=int(ok or 0),
+            failed_count=int(fails or 0),
+            amount_sum=Decimal(str(amount or 0)),
+            bank_charges_sum=Decimal(str(charges or 0)),
+            max_txn_id=int(max_id),
+        ))
+    return rollups
+
+
+def _drop_month(db: Session, month: datetime, end: datetime, max_id: int):
+    """
+    Remove the month's archived rows (ids up to ``max_id``) from the hot
+    table. Late rows above ``max_id`` were never exported and stay hot.
+    """
+    in_month = (Transaction.TRN_DATE >= month, Transaction.TRN_DATE < end)
+    name = f"p{month:%Y%m}"
+    if _is_mysql(db) and name in list_partitions(db):
+        late = db.query(Transaction.id).filter(*in_month, Transaction.id > max_id).first()
+        if late is None:
+            db.execute(text(f"ALTER TABLE transactions DROP PARTITION {name}"))
+            return
+        logger.info(f"[archive] {name} has rows above txn id {max_id}; deleting archived rows only")
+    # Unpartitioned ledger, a month still inside p_hist / pmax, or a partition
+    # holding late rows: delete the archived ids in chunks
+    while True:
+        ids = [
+            r[0]
+            for r in db.query(Transaction.id)
+            .filter(*in_month, Transaction.id <= max_id)
+            .limit(EXPORT_CHUNK_ROWS)
+            .all()
+        ]
+        if not ids:
+            break
+        db.query(Transaction).filter(Transaction.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+
+def archive_month(db: Session, month: datetime):
+    """
+    Archive one closed month: Parquet file, daily rollups + manifest row,
+    then remove the month from the hot table. The export, the rollups and
+    the drop all stop at the month's highest committed id (max_txn_id), so
+    rows arriving meanwhile are neither lost nor counted twice: from the
+    moment the manifest commits, KPI rebuilds and reports skip the month's
+    hot rows up to max_txn_id (crud.archived_exclusions) and fold the rest.
+    Returns the manifest, or None if the month has nothing to archive yet.
+    """
+    end = add_months(month, 1)
+    safe = safe_txn_id(db)
+    if safe is None:
+        return None
+    max_id = (
+        db.query(func.max(Transaction.id))
+        .filter(Transaction.TRN_DATE >= month, Transaction.TRN_DATE < end, Transaction.id <= safe)
+        .scalar()
+    )
+    if max_id is None:
+        return None
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(ARCHIVE_DIR, f"transactions_{month:%Y-%m}.parquet")
+    row_count = _export_parquet(db, month, end, max_id, path)
+    rollups = _daily_rollups(db, month, end, max_id)
+    archive = TxnArchive(
+        month_start=month,
+        file_path=path,
+        row_count=row_count,
+        max_txn_id=max_id,
+        archived_at=_now(),
+    )
+    db.add_all(rollups)
+    db.add(archive)
+    db.commit()
+
+    _drop_month(db, month, end, max_id)
+    db.commit()
+    logger.info(f"[archive] archived {row_count} txns for {month:%Y-%m} to {path}")
+    return archive
+
+
+def run_archival(db: Session, now: datetime = None) -> list:
+    """
+    Keep partitions ahead of the clock and archive every cold month.
+    Returns the archived month starts.
+    """
+    ensure_partitions(db, now)
+    archived = []
+    for month in cold_months(db, now):
+        if is_archived(db, month):
+            # Late rows landed in an archived month; they stay hot and are
+            # picked up by the normal KPI fold.
+            continue
+        if archive_month(db, month) is not None:
+            archived.append(month)
+    return archived
@@ -0,0 +1,142 @@
+# backend/arrow_format.py
+"""
+Arrow schemas and record-batch building for the transactions ledger and
+KPI snapshots. Used by the cold-month archival and Parquet export, and by
+the Arrow IPC stream responses negotiated via the Accept header.
+"""
+import json
+
+from .models import Transaction
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for archive / columnar output
+    pa = None
+
+
+TRANSACTION_COLUMNS = [c.name for c in Transaction.__table__.columns]
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Columns returned by /transactions (same order as the JSON rows)
+API_TRANSACTION_COLUMNS = [
+    "TRN_REF_NO", "ACCOUNT_NO", "CUSTOMER_ID", "TRN_DATE", "TRN_DESC",
+    "DRCR_INDICATOR", "TRN_AMOUNT", "TRN_CCY", "ACCOUNT_CCY",
+    "OPENING_BALANCE", "CLOSING_BALANCE", "RUNNING_BALANCE",
+    "CREDIT_ACCOUNT", "CREDIT_ACCOUNT_CCY", "TRN_TYPE", "STATUS", "BANK_CHARGES",
+]
+# Low-cardinality enum columns sent dictionary-encoded
+ENUM_COLUMNS = ("DRCR_INDICATOR", "TRN_TYPE", "STATUS")
+
+KPI_HISTORY_COLUMNS = [
+    "computed_at", "resolution", "total_transactions", "total_amount_usd",
+    "total_amount_rm", "dr_count", "cr_count", "success_count", "failed_txn_count",
+    "failure_rate", "total_bank_charges", "transfer_count", "deposit_count",
+    "loan_payment_count", "bill_payment_count", "txn_per_customer", "txn_type_split",
+]
+
+
+def wants_arrow(accept: str) -> bool:
+    """
+    True if the Accept header asks for an Arrow IPC stream.
+    """
+    return bool(accept) and ARROW_STREAM_MEDIA_TYPE in accept
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; run `pip install pyarrow`")
+    return pa
+
+
+def _transaction_types():
+    return {
+        "id": pa.int64(),
+        "TRN_DATE": pa.timestamp("us"),
+        "CREATED_AT": pa.timestamp("us"),
+        "TRN_AMOUNT": pa.decimal128(18, 2),
+        "OPENING_BALANCE": pa.decimal128(18, 2),
+        "CLOSING_BALANCE": pa.decimal128(18, 2),
+        "RUNNING_BALANCE": pa.decimal128(18, 2),
+        "BANK_CHARGES": pa.decimal128(18, 2),
+    }
+
+
+def transaction_schema():
+    """
+    Typed Arrow schema for full transaction rows: fixed-point decimals,
+    microsecond timestamps, strings for everything else.
+    """
+    require_pyarrow()
+    types = _transaction_types()
+    return pa.schema([(name, types.get(name, pa.string())) for name in TRANSACTION_COLUMNS])
+
+
+def api_transaction_schema(columns: list = None):
+    """
+    Schema for /transactions rows (optionally a ``fields=`` projection),
+    with the enum columns dictionary-encoded.
+    """
+    require_pyarrow()
+    types = _transaction_types()
+    for name in ENUM_COLUMNS:
+        types[name] = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns or API_TRANSACTION_COLUMNS])
+
+
+def kpi_history_schema():
+    require_pyarrow()
+    types = {
+        "computed_at": pa.timestamp("us"),
+        "resolution": pa.dictionary(pa.int8(), pa.string()),
+        "total_amount_usd": pa.decimal128(18, 2),
+        "total_amount_rm": pa.decimal128(18, 2),
+        "total_bank_charges": pa.decimal128(18, 2),
+        "failure_rate": pa.decimal128(5, 2),
+        # nested breakdowns travel as JSON text
+        "txn_per_customer": pa.string(),
+        "txn_type_split": pa.string(),
+    }
+    return pa.schema([(name, types.get(name, pa.int64())) for name in KPI_HISTORY_COLUMNS])
+
+
+def rows_to_record_batch(rows, schema):
+    """
+    Build a record batch from row tuples ordered like ``schema``.
+    """
+    require_pyarrow()
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.record_batch(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def kpi_rows(kpis, type_split) -> list:
+    """
+    Row tuples for kpi_history_schema from KPI model rows. ``type_split``
+    renders a row's per-type breakdown (crud.kpi_txn_type_split).
+    """
+    rows = []
+    for k in kpis:
+        row = []
+        for name in KPI_HISTORY_COLUMNS:
+            if name == "txn_per_customer":
+                row.append(json.dumps(k.txn_per_customer))
+            elif name == "txn_type_split":
+                row.append(json.dumps(type_split(k)))
+            else:
+                row.append(getattr(k, name))
+        rows.append(row)
+    return rows
+
+
+def to_ipc_stream(batch) -> bytes:
+    """
+    Serialize a record batch as an Arrow IPC stream.
+    """
+    require_pyarrow()
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,34 @@
+"""
+Async engine and session for the FastAPI read endpoints (aiomysql).
+Kept apart from database.py so the worker, generator and scripts do not
+need the asyncio extras (greenlet, aiomysql).
+"""
+import os
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+load_dotenv()
+
+DB_USER = os.getenv("DB_USER", "presales")
+DB_PASS = os.getenv("DB_PASS", "")
+DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_NAME = os.getenv("DB_NAME", "farisight")
+
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+
+# Requests no longer hold a threadpool slot while waiting on MySQL, so the
+# pool (not the threadpool) is what bounds concurrent queries
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", "20")),
+    max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "30")),
+    pool_recycle=1800,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -45,7 +45,9 @@ def get_chatbot_response(query: str, db: Session) -> dict:
             }
 
         # --- fetch latest KPIs from DB ---
-        latest_kpis = crud.compute_kpis(db)
+        latest_kpis = crud.get_latest_kpis(db) or {}
+        # drop per-snapshot fields so a repeated question hits the LLM cache
+        latest_kpis = {k: v for k, v in latest_kpis.items() if k not in ("id", "computed_at")}
         kpi_context = json.dumps(latest_kpis, indent=2, default=str)
 
         # --- build prompt with KPI context ---
@@ -64,7 +66,7 @@ def get_chatbot_response(query: str, db: Session) -> dict:
         """
 
         # --- call LLM utility (expects JSON string) ---
-        raw_response = run_llm(prompt=prompt)
+        raw_response = run_llm(prompt=prompt, cache="chatbot", validate=json.loads)
 
         # --- ensure parsed JSON safely ---
         response = {"answer": ""}
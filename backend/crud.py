@@ -1,149 +1,343 @@
 # backend/crud.py
 from decimal import Decimal, ROUND_HALF_UP
-import random
-from datetime import datetime, timezone
+import base64
+import binascii
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
-from .models import Transaction, KPI
+from sqlalchemy import func, case, or_, select
+from .arrow_format import API_TRANSACTION_COLUMNS
+from .models import Transaction, KPI, TxnArchive, TxnArchiveRollup
+from .fx_service import get_fx_rate
 from utils.logger import get_logger
 
 logger = get_logger("crud")
 
 
-# FX helper (same approach as generator for consistency)
-def get_fx_rate(base: str, quote: str) -> Decimal:
-    if base == quote:
-        return Decimal("1.0")
-    mid = Decimal("4.23")
-    jitter = Decimal(str(random.uniform(-0.05, 0.05))).quantize(Decimal("0.0001"))
-    usdrm = (mid + jitter).quantize(Decimal("0.0001"))
-    if base == "USD" and quote == "RM":
-        return usdrm
-    if base == "RM" and quote == "USD":
-        return (Decimal("1.0") / usdrm).quantize(Decimal("0.0001"))
-    return Decimal("1.0")
-
-
 def quant2(v: Decimal) -> Decimal:
     return v.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-def compute_kpis(db: Session):
+# --- Transaction listing helpers ---
+SINCE_WINDOWS = {
+    "past_hour": timedelta(hours=1),
+    "past_24h": timedelta(hours=24),
+}
+
+
+def filter_transactions(q, type: str = None, status: str = None, since: str = None):
     """
-    Aggregate all transactions into KPIs and persist a new KPI row.
+    Apply the /transactions filters to a Query or select(). Unknown
+    ``since`` values are ignored, as before.
     """
-    # Basic counts
-    total_txns = db.query(func.count(Transaction.id)).scalar() or 0
-    dr_count = (
-        db.query(func.count(Transaction.id))
-        .filter(Transaction.DRCR_INDICATOR == "DR")
-        .scalar()
-        or 0
-    )
-    cr_count = (
-        db.query(func.count(Transaction.id))
-        .filter(Transaction.DRCR_INDICATOR == "CR")
-        .scalar()
-        or 0
-    )
+    if type:
+        q = q.filter(Transaction.TRN_TYPE == type.upper())
+    if status:
+        q = q.filter(Transaction.STATUS == status.upper())
+    if since in SINCE_WINDOWS:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        q = q.filter(*since_filter(now - SINCE_WINDOWS[since]))
+    return q
 
-    # Success vs failure
-    success_count = (
-        db.query(func.count(Transaction.id))
-        .filter(Transaction.STATUS == "SUCCESS")
-        .scalar()
-        or 0
-    )
-    fail_count = (
-        db.query(func.count(Transaction.id))
-        .filter(Transaction.STATUS == "FAILED")
-        .scalar()
-        or 0
-    )
-    failure_rate = round((fail_count / total_txns) * 100, 2) if total_txns > 0 else 0.0
-
-    # Bank charges → sum only for successful txns
-    bank_charges = db.query(
-        func.coalesce(
-            func.sum(
-                case(
-                    (Transaction.STATUS == "SUCCESS", Transaction.BANK_CHARGES),
-                    else_=Decimal("0.00"),
-                )
-            ),
-            0,
-        )
-    ).scalar() or Decimal("0.00")
 
-    # Amount aggregates across currencies
-    total_usd = Decimal("0")
-    total_rm = Decimal("0")
+def since_filter(cutoff: datetime) -> tuple:
+    """
+    Conditions for rows dated at or after ``cutoff``. Newest-first listings
+    walk the primary key; the lower id bound (the window's first id, found
+    on the TRN_DATE index) keeps that walk inside the window instead of
+    running to the oldest row when the window holds fewer rows than LIMIT.
+    """
+    # id + 0: a bare MIN(id) lets SQLite walk the rowid from the oldest row
+    first_id = select(func.min(Transaction.id + 0)).where(Transaction.TRN_DATE >= cutoff).scalar_subquery()
+    return Transaction.TRN_DATE >= cutoff, Transaction.id >= first_id
 
-    # Retrieve all transactions (or relevant subset)
-    all_txns = db.query(Transaction.TRN_AMOUNT, Transaction.TRN_CCY).all()
 
-    for amt, ccy in all_txns:
-        amt = Decimal(str(amt or 0))
-        # Convert txn amount to both USD and RM
-        if ccy == "USD":
-            total_usd += amt
-            total_rm += amt * get_fx_rate("USD", "RM")
-        elif ccy == "RM":
-            total_rm += amt
-            total_usd += amt * get_fx_rate("RM", "USD")
+def encode_cursor(last_id: int) -> str:
+    """
+    Opaque keyset cursor pointing just past ``last_id`` (newest-first order).
+    """
+    raw = json.dumps({"v": 1, "last_id": int(last_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-    total_usd = quant2(total_usd)
-    total_rm = quant2(total_rm)
 
-    # Per-customer stats (in USD)
-    per_cust = {}
-    cust_rows = (
+def decode_cursor(cursor: str) -> int:
+    """
+    Last transaction id from a cursor made by encode_cursor. Raises
+    ValueError for anything else.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data.get("v") != 1:
+            raise ValueError("unsupported cursor version")
+        return int(data["last_id"])
+    except (TypeError, KeyError, AttributeError, json.JSONDecodeError, binascii.Error) as e:
+        raise ValueError(f"invalid cursor: {e}") from e
+
+
+def parse_fields(fields: str = None) -> list:
+    """
+    Columns requested via ``fields=`` (comma-separated, kept in the given
+    order); every /transactions column if empty. Raises ValueError for
+    unknown names.
+    """
+    if not fields:
+        return list(API_TRANSACTION_COLUMNS)
+    cols = [f.strip().upper() for f in fields.split(",") if f.strip()]
+    unknown = [c for c in cols if c not in API_TRANSACTION_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(cols))
+
+
+def transaction_columns_select(cols: list):
+    """
+    select() of ``id`` followed by ``cols``: plain row tuples, no ORM
+    entities to build.
+    """
+    return select(Transaction.id, *[getattr(Transaction, c) for c in cols])
+
+
+def keyset_chunks(db: Session, stmt, chunk_rows: int):
+    """
+    Rows of ``stmt`` (a select whose first column is Transaction.id) in id
+    order, as lists of up to ``chunk_rows`` rows. Each chunk is its own
+    ``id > last ORDER BY id LIMIT n`` query, so memory stays at one chunk
+    whether or not the driver supports server-side cursors.
+    """
+    last_id = None
+    while True:
+        q = stmt if last_id is None else stmt.where(Transaction.id > last_id)
+        rows = db.execute(q.order_by(Transaction.id).limit(chunk_rows)).all()
+        if rows:
+            yield rows
+        if len(rows) < chunk_rows:
+            return
+        last_id = rows[-1][0]
+
+
+# Several generator processes commit multi-row batches, so ids become
+# visible out of order: a batch holding 101-200 can commit after 201-300.
+# Incremental readers therefore stop at the highest id that was already
+# visible TXN_COMMIT_GRACE seconds ago. Every lower id was allocated before
+# then, and writers commit (or roll back) well within the grace window.
+TXN_COMMIT_GRACE = float(os.getenv("TXN_COMMIT_GRACE", "10"))
+
+
+class TxnWatermark:
+    def __init__(self, grace: float = TXN_COMMIT_GRACE):
+        self.grace = grace
+        self._seen = deque()  # (monotonic time, max id visible then)
+        self._safe = None
+        self._lock = threading.Lock()
+
+    def observe(self, max_id) -> int:
+        """
+        Record the currently visible max id and return the safe watermark:
+        every id at or below it is committed. None until the first
+        observation is ``grace`` seconds old.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if max_id is not None:
+                self._seen.append((now, int(max_id)))
+            while self._seen and now - self._seen[0][0] >= self.grace:
+                self._safe = max(self._safe or 0, self._seen.popleft()[1])
+            return self._safe
+
+
+txn_watermark = TxnWatermark()
+
+
+def safe_txn_id(db: Session):
+    """Highest transaction id that incremental folds may read up to."""
+    return txn_watermark.observe(transaction_hwm(db))
+
+
+# Running aggregates for the incremental KPI engine. The worker folds in
+# only transactions above ``last_txn_id`` on each tick; ``rebuild`` replaces
+# the state with a fresh fold over the whole ledger.
+_KPI_STATE = None
+_KPI_STATE_LOCK = threading.Lock()
+
+
+def _empty_kpi_state() -> dict:
+    return {
+        "last_txn_id": 0,
+        "total": 0,
+        "dr": 0,
+        "cr": 0,
+        "success": 0,
+        "failed": 0,
+        "bank_charges": Decimal("0.00"),
+        "amount_by_ccy": {},  # ccy -> Decimal
+        "per_customer": {},  # (customer_id, ccy) -> [count, amount]
+        "per_type": {},  # trn_type -> [count, amount, fails]
+    }
+
+
+def _fused_aggregate_query(db: Session):
+    """
+    One GROUP BY over (customer, currency, type) with conditional aggregates.
+    Every scalar KPI and every breakdown is derived from these few rows, so
+    a fold costs a single scan and a single round trip.
+    """
+    return db.query(
+        Transaction.CUSTOMER_ID,
+        Transaction.TRN_CCY,
+        Transaction.TRN_TYPE,
+        func.count(Transaction.id),
+        func.sum(case((Transaction.DRCR_INDICATOR == "DR", 1), else_=0)),
+        func.sum(case((Transaction.DRCR_INDICATOR == "CR", 1), else_=0)),
+        func.sum(case((Transaction.STATUS == "SUCCESS", 1), else_=0)),
+        func.sum(case((Transaction.STATUS == "FAILED", 1), else_=0)),
+        func.sum(Transaction.TRN_AMOUNT),
+        func.sum(
+            case(
+                (Transaction.STATUS == "SUCCESS", Transaction.BANK_CHARGES),
+                else_=0,
+            )
+        ),
+        func.max(Transaction.id),
+    ).group_by(Transaction.CUSTOMER_ID, Transaction.TRN_CCY, Transaction.TRN_TYPE)
+
+
+def archived_exclusions(db: Session) -> list:
+    """
+    Filters that drop hot rows already counted by the archive rollups: rows
+    of an archived month up to its manifest's max_txn_id. The manifest and
+    rollups commit together before the month is dropped, so while the drop
+    is still running those rows are skipped rather than counted twice. Late
+    rows (above max_txn_id) stay hot and countable.
+    """
+    T = Transaction
+    exclusions = []
+    for month, max_id in db.query(TxnArchive.month_start, TxnArchive.max_txn_id):
+        month_end = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+        exclusions.append(or_(T.TRN_DATE < month, T.TRN_DATE >= month_end, T.id > max_id))
+    return exclusions
+
+
+def _fold_transactions(db: Session, state: dict, upto: int = None, exclusions: list = ()) -> dict:
+    """
+    Fold transactions with id above the state's high-water mark (and up to
+    ``upto`` when given) into the running aggregates. The new high-water mark
+    comes from the same statement, so the fold sees one consistent window.
+    """
+    q = _fused_aggregate_query(db).filter(Transaction.id > state["last_txn_id"], *exclusions)
+    if upto is not None:
+        q = q.filter(Transaction.id <= upto)
+
+    for row in q.all():
+        _fold_group_row(state, row)
+    return state
+
+
+def _fold_group_row(state: dict, row, advance_hwm: bool = True):
+    (customer_id, ccy, ttype, cnt, dr, cr, ok, fails, amount, charges, max_id) = row
+    cnt = int(cnt or 0)
+    fails = int(fails or 0)
+    amount = Decimal(str(amount or 0))
+
+    state["total"] += cnt
+    state["dr"] += int(dr or 0)
+    state["cr"] += int(cr or 0)
+    state["success"] += int(ok or 0)
+    state["failed"] += fails
+    state["bank_charges"] += Decimal(str(charges or 0))
+
+    by_ccy = state["amount_by_ccy"]
+    by_ccy[ccy] = by_ccy.get(ccy, Decimal("0")) + amount
+
+    acc = state["per_customer"].setdefault((customer_id, ccy), [0, Decimal("0")])
+    acc[0] += cnt
+    acc[1] += amount
+
+    acc = state["per_type"].setdefault(ttype, [0, Decimal("0"), 0])
+    acc[0] += cnt
+    acc[1] += amount
+    acc[2] += fails
+
+    if advance_hwm:
+        state["last_txn_id"] = max(state["last_txn_id"], int(max_id))
+
+
+def _seed_from_archive(db: Session, state: dict) -> dict:
+    """
+    Fold the pre-computed rollups of archived (cold) months into the state,
+    so a rebuild never rescans archived data. Archived rows are gone from
+    the hot table, so the high-water mark is left alone.
+    """
+    R = TxnArchiveRollup
+    rows = (
         db.query(
-            Transaction.CUSTOMER_ID,
-            func.count(Transaction.id),
-            func.sum(Transaction.TRN_AMOUNT),
-            Transaction.TRN_CCY,
+            R.CUSTOMER_ID,
+            R.TRN_CCY,
+            R.TRN_TYPE,
+            func.sum(R.txn_count),
+            func.sum(R.dr_count),
+            func.sum(R.cr_count),
+            func.sum(R.success_count),
+            func.sum(R.failed_count),
+            func.sum(R.amount_sum),
+            func.sum(R.bank_charges_sum),
+            func.max(R.max_txn_id),
         )
-        .group_by(Transaction.CUSTOMER_ID, Transaction.TRN_CCY)
+        .group_by(R.CUSTOMER_ID, R.TRN_CCY, R.TRN_TYPE)
         .all()
     )
+    for row in rows:
+        _fold_group_row(state, row, advance_hwm=False)
+    return state
+
+
+def _full_state(db: Session, upto: int = None) -> dict:
+    # Archive rollups + every hot transaction (up to ``upto``) they don't cover
+    state = _seed_from_archive(db, _empty_kpi_state())
+    state = _fold_transactions(db, state, upto, archived_exclusions(db))
+    # Archived rows still waiting to be dropped sit at or below the manifests'
+    # max_txn_id; keep later incremental folds (which skip the exclusions) past them
+    archived_hwm = db.query(func.max(TxnArchive.max_txn_id)).scalar() or 0
+    if upto is not None:
+        archived_hwm = min(archived_hwm, upto)
+    state["last_txn_id"] = max(state["last_txn_id"], archived_hwm)
+    return state
+
+
+def _kpis_from_state(state: dict, db: Session = None) -> dict:
+    """
+    Turn running aggregates into KPI values. FX conversion is applied once
+    per currency group, at the current FX bucket's rate.
+    """
+    at = datetime.now(timezone.utc)
+
+    # Amount aggregates across currencies
+    total_usd = Decimal("0")
+    total_rm = Decimal("0")
+    for ccy, amt in state["amount_by_ccy"].items():
+        total_usd += amt * get_fx_rate(ccy, "USD", at, db)
+        total_rm += amt * get_fx_rate(ccy, "RM", at, db)
+
+    # Per-customer stats (in USD)
     temp = {}
-    for row in cust_rows:
-        customer_id, cnt, sum_amount, ccy = row
-        sum_amount = Decimal(str(sum_amount or 0))
-        if ccy == "USD":
-            sum_usd = sum_amount
-        else:
-            sum_usd = sum_amount * get_fx_rate("RM", "USD")
+    for (customer_id, ccy), (cnt, sum_amount) in state["per_customer"].items():
+        sum_usd = sum_amount * get_fx_rate(ccy, "USD", at, db)
         if customer_id not in temp:
             temp[customer_id] = {"count": 0, "amount_usd": Decimal("0")}
-        temp[customer_id]["count"] += int(cnt or 0)
+        temp[customer_id]["count"] += cnt
         temp[customer_id]["amount_usd"] += sum_usd
 
-    for cust, vals in temp.items():
-        per_cust[cust] = {
-            "count": vals["count"],
-            "amount_usd": str(quant2(vals["amount_usd"])),
-        }
-
-    # --- Transaction type breakdown ---
-    type_rows = (
-        db.query(
-            Transaction.TRN_TYPE,
-            func.count(Transaction.id),
-            func.sum(Transaction.TRN_AMOUNT),
-            func.sum(case((Transaction.STATUS == "FAILED", 1), else_=0)),
-        )
-        .group_by(Transaction.TRN_TYPE)
-        .all()
-    )
+    per_cust = {
+        cust: {"count": vals["count"], "amount_usd": str(quant2(vals["amount_usd"]))}
+        for cust, vals in temp.items()
+    }
 
     txn_types = {}
-    for row in type_rows:
-        ttype = row[0]
-        count = int(row[1] or 0)
-        sum_amount = Decimal(str(row[2] or 0))
-        fails = int(row[3] or 0)
+    for ttype, (count, sum_amount, fails) in state["per_type"].items():
         fail_rate = (fails / count * 100) if count > 0 else 0
         txn_types[ttype] = {
             "count": count,
@@ -151,22 +345,47 @@ def compute_kpis(db: Session):
             "fail_count": fails,
             "failure_rate": round(fail_rate, 2),
         }
+
+    total_txns = state["total"]
+    failure_rate = (
+        round((state["failed"] / total_txns) * 100, 2) if total_txns > 0 else 0.0
+    )
+    return {
+        "total_transactions": total_txns,
+        "total_amount_usd": quant2(total_usd),
+        "total_amount_rm": quant2(total_rm),
+        "dr_count": state["dr"],
+        "cr_count": state["cr"],
+        "success_count": state["success"],
+        "fail_count": state["failed"],
+        "failure_rate": failure_rate,
+        "total_bank_charges": quant2(state["bank_charges"]),
+        "txn_per_customer": per_cust,
+        "txn_type_split": txn_types,
+    }
+
+
+def _persist_kpis(db: Session, kpis: dict) -> dict:
+    """
+    Persist a KPI snapshot and return it in the API response shape.
+    """
+    txn_types = kpis["txn_type_split"]
     logger.info(f"Transaction types split: {txn_types}")
-    # Reset + insert KPI row
-    db.query(KPI).delete()
-    db.commit()
+    # Append a raw snapshot; downsample_kpis rolls it up and expires it later
     kpi = KPI(
+        resolution="raw",
         computed_at=datetime.now(timezone.utc).replace(tzinfo=None),
-        total_transactions=total_txns,
-        total_amount_usd=str(total_usd),
-        total_amount_rm=str(total_rm),
-        dr_count=dr_count,
-        cr_count=cr_count,
-        success_count=success_count,
-        failed_txn_count=fail_count,
-        failure_rate=Decimal(str(failure_rate)),
-        total_bank_charges=str(quant2(Decimal(str(bank_charges)))),
-        txn_per_customer=per_cust,
+        total_transactions=kpis["total_transactions"],
+        total_amount_usd=str(kpis["total_amount_usd"]),
+        total_amount_rm=str(kpis["total_amount_rm"]),
+        dr_count=kpis["dr_count"],
+        cr_count=kpis["cr_count"],
+        success_count=kpis["success_count"],
+        failed_txn_count=kpis["fail_count"],
+        failure_rate=Decimal(str(kpis["failure_rate"])),
+        total_bank_charges=str(kpis["total_bank_charges"]),
+        txn_per_customer=kpis["txn_per_customer"],
+        txn_type_split=txn_types,
         transfer_count=txn_types.get("TRANSFER", {}).get("count", 0),
         deposit_count=txn_types.get("DEPOSIT", {}).get("count", 0),
         loan_payment_count=txn_types.get("LOAN_PAYMENT", {}).get("count", 0),
@@ -176,7 +395,29 @@ def compute_kpis(db: Session):
     db.commit()
     db.refresh(kpi)
     logger.info(f"[Scheduler] recomputing KPIs at {datetime.now(timezone.utc)}")
-    result = {
+    return kpi_to_dict(kpi)
+
+
+def kpi_txn_type_split(kpi: KPI) -> dict:
+    """
+    Per-type breakdown of a snapshot. Snapshots written before the split
+    was persisted only carry the per-type counts.
+    """
+    if kpi.txn_type_split:
+        return kpi.txn_type_split
+    return {
+        "TRANSFER": {"count": kpi.transfer_count},
+        "DEPOSIT": {"count": kpi.deposit_count},
+        "LOAN_PAYMENT": {"count": kpi.loan_payment_count},
+        "BILL_PAYMENT": {"count": kpi.bill_payment_count},
+    }
+
+
+def kpi_to_dict(kpi: KPI) -> dict:
+    """
+    Render a persisted KPI snapshot in the /kpis response shape.
+    """
+    return {
         "id": kpi.id,
         "computed_at": kpi.computed_at.isoformat(),
         "total_transactions": kpi.total_transactions,
@@ -185,14 +426,262 @@ def compute_kpis(db: Session):
         "dr_count": kpi.dr_count,
         "cr_count": kpi.cr_count,
         "txn_per_customer": kpi.txn_per_customer,
-        "txn_type_split": txn_types,  # 👈 new
-        "success_count": success_count,
-        "fail_count": fail_count,
-        "failure_rate": round(failure_rate, 2),
-        "total_bank_charges": str(quant2(kpi.total_bank_charges)),
+        "txn_type_split": kpi_txn_type_split(kpi),
+        "success_count": kpi.success_count,
+        "fail_count": kpi.failed_txn_count,
+        "failure_rate": round(float(kpi.failure_rate), 2),
+        "total_bank_charges": str(quant2(Decimal(str(kpi.total_bank_charges)))),
         "transfer_count": kpi.transfer_count,
         "deposit_count": kpi.deposit_count,
         "loan_payment_count": kpi.loan_payment_count,
         "bill_payment_count": kpi.bill_payment_count,
     }
-    return result
+
+
+def get_latest_kpis(db: Session):
+    """
+    Latest materialized KPI snapshot as a dict, or None if the worker has
+    not produced one yet. Pure read: never recomputes.
+    """
+    kpi = (
+        db.query(KPI)
+        .filter(KPI.resolution == "raw")
+        .order_by(KPI.computed_at.desc(), KPI.id.desc())
+        .first()
+    )
+    return kpi_to_dict(kpi) if kpi else None
+
+
+def rebuild_kpi_state(db: Session) -> dict:
+    """
+    Recompute the running aggregates from the whole ledger and install them
+    as the incremental state. Used for the first run and for reconciliation.
+    """
+    global _KPI_STATE
+    state = _full_state(db)
+    with _KPI_STATE_LOCK:
+        _KPI_STATE = state
+    return state
+
+
+def reconcile_kpi_state(db: Session) -> bool:
+    """
+    Check the incremental state against a full recompute over the same id
+    window, then replace it with the recomputed state. Incremental ticks wait
+    on the lock while this runs. Returns True when the two matched.
+    """
+    global _KPI_STATE
+    with _KPI_STATE_LOCK:
+        current = _KPI_STATE
+        if current is None:
+            _KPI_STATE = _full_state(db)
+            return True
+
+        fresh = _full_state(db, upto=current["last_txn_id"])
+        matches = fresh == current
+        if not matches:
+            logger.warning(
+                f"[reconcile] incremental KPI state drifted at txn id {current['last_txn_id']}; "
+                "replacing with full rebuild"
+            )
+        safe = safe_txn_id(db)
+        if safe is not None and safe > fresh["last_txn_id"]:
+            fresh = _fold_transactions(db, fresh, upto=safe)
+        _KPI_STATE = fresh
+    return matches
+
+
+def compute_kpis(db: Session, incremental: bool = False):
+    """
+    Aggregate transactions into KPIs and persist a new KPI row.
+
+    With ``incremental=True`` only transactions above the last processed id
+    and up to the safe watermark (safe_txn_id) are folded into the running
+    aggregates; otherwise (or on first use) the aggregates are rebuilt from
+    the whole ledger, and the next reconciliation picks up any batch that
+    was still uncommitted below its high-water mark.
+    """
+    global _KPI_STATE
+    if incremental and _KPI_STATE is not None:
+        safe = safe_txn_id(db)
+        with _KPI_STATE_LOCK:
+            state = _KPI_STATE
+            if safe is not None and safe > state["last_txn_id"]:
+                state = _fold_transactions(db, state, upto=safe)
+            kpis = _kpis_from_state(state, db)
+    else:
+        state = rebuild_kpi_state(db)
+        with _KPI_STATE_LOCK:
+            kpis = _kpis_from_state(state, db)
+    return _persist_kpis(db, kpis)
+
+
+# --- KPI time series tiers ---
+# Raw 5-second snapshots are rolled up into per-minute and per-hour tiers.
+# Snapshots hold running totals, so a bucket is represented by its last
+# snapshot. None means the tier is kept forever.
+KPI_RETENTION = {
+    "raw": timedelta(hours=1),
+    "minute": timedelta(days=2),
+    "hour": None,
+}
+
+# Requested history range -> (lookback, tier read for it)
+KPI_HISTORY_RANGES = {
+    "past_hour": (timedelta(hours=1), "raw"),
+    "past_24h": (timedelta(hours=24), "minute"),
+    "past_7d": (timedelta(days=7), "hour"),
+    "past_30d": (timedelta(days=30), "hour"),
+}
+
+
+def _floor_minute(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+def _floor_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _copy_kpi(row: KPI, resolution: str, computed_at: datetime) -> KPI:
+    values = {
+        c.name: getattr(row, c.name)
+        for c in KPI.__table__.columns
+        if c.name not in ("id", "resolution", "computed_at")
+    }
+    return KPI(resolution=resolution, computed_at=computed_at, **values)
+
+
+def _rollup_tier(db: Session, source: str, target: str, floor, step: timedelta, now: datetime) -> int:
+    """
+    Roll complete ``source`` buckets newer than the last ``target`` row into
+    one ``target`` row each, stamped with the bucket start. Returns the
+    number of rows written.
+    """
+    last = (
+        db.query(func.max(KPI.computed_at)).filter(KPI.resolution == target).scalar()
+    )
+    q = db.query(KPI).filter(KPI.resolution == source, KPI.computed_at < floor(now))
+    if last is not None:
+        q = q.filter(KPI.computed_at >= last + step)
+
+    latest_per_bucket = {}
+    for row in q.order_by(KPI.computed_at, KPI.id).all():
+        latest_per_bucket[floor(row.computed_at)] = row
+    for bucket, row in sorted(latest_per_bucket.items()):
+        db.add(_copy_kpi(row, target, bucket))
+    db.flush()
+    return len(latest_per_bucket)
+
+
+def downsample_kpis(db: Session, now: datetime = None) -> dict:
+    """
+    Roll raw snapshots up to the minute tier and minute rows up to the hour
+    tier, then expire rows past each tier's retention.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    stats = {
+        "minute": _rollup_tier(
+            db, "raw", "minute", _floor_minute, timedelta(minutes=1), now
+        ),
+        "hour": _rollup_tier(db, "minute", "hour", _floor_hour, timedelta(hours=1), now),
+    }
+    for resolution, keep in KPI_RETENTION.items():
+        if keep is None:
+            continue
+        stats[f"expired_{resolution}"] = (
+            db.query(KPI)
+            .filter(KPI.resolution == resolution, KPI.computed_at < now - keep)
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    return stats
+
+
+def get_kpi_history(db: Session, range_: str = None, limit: int = 10, now: datetime = None):
+    """
+    KPI snapshots for the history endpoint, oldest-first within a range.
+    With ``range_`` the tier is picked so that a read stays within a few
+    hundred to a couple of thousand rows; without it, the latest ``limit``
+    raw snapshots are returned newest-first.
+    """
+    if range_ is None:
+        return (
+            db.query(KPI)
+            .filter(KPI.resolution == "raw")
+            .order_by(KPI.computed_at.desc())
+            .limit(limit)
+            .all()
+        )
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    lookback, tier = KPI_HISTORY_RANGES[range_]
+    return (
+        db.query(KPI)
+        .filter(KPI.resolution == tier, KPI.computed_at >= now - lookback)
+        .order_by(KPI.computed_at)
+        .all()
+    )
+
+
+# --- Version checks for conditional GETs. KPI rows are append-only and only
+# expire from the old end, so ids pin down exactly what a read returns.
+def latest_kpi_id(db: Session):
+    """
+    Id of the snapshot get_latest_kpis would return (index-only lookup).
+    """
+    row = (
+        db.query(KPI.id)
+        .filter(KPI.resolution == "raw")
+        .order_by(KPI.computed_at.desc(), KPI.id.desc())
+        .first()
+    )
+    return row[0] if row else None
+
+
+def kpi_history_version(db: Session, range_: str = None, limit: int = 10, now: datetime = None) -> tuple:
+    """
+    Changes whenever get_kpi_history with the same arguments (and ``now``)
+    would return different rows.
+    """
+    if range_ is None:
+        return ("raw", latest_kpi_id(db), limit)
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    lookback, tier = KPI_HISTORY_RANGES[range_]
+    lo, hi, n = (
+        db.query(func.min(KPI.id), func.max(KPI.id), func.count(KPI.id))
+        .filter(KPI.resolution == tier, KPI.computed_at >= now - lookback)
+        .one()
+    )
+    return (tier, lo, hi, n)
+
+
+def transaction_hwm(db: Session):
+    """
+    Highest transaction id (primary-key lookup).
+    """
+    return db.query(func.max(Transaction.id)).scalar()
+
+
+def transaction_page_version(db: Session) -> tuple:
+    """
+    (head id, safe watermark) for the newest transactions page. New rows move
+    the head; a late batch committing below the head moves neither, but the
+    watermark passes the head within TXN_COMMIT_GRACE, so such a page is
+    revalidated at most one grace window later.
+    """
+    hwm = transaction_hwm(db)
+    return hwm, txn_watermark.observe(hwm)
+
+
+def kpi_snapshot_version(snapshot: dict) -> str:
+    """
+    Version of a /kpis body that ignores ``id`` and ``computed_at``: the
+    worker persists a snapshot every tick, and unchanged figures keep their
+    version.
+    """
+    figures = {k: v for k, v in snapshot.items() if k not in ("id", "computed_at")}
+    return json.dumps(figures, sort_keys=True, default=str)
@@ -0,0 +1,144 @@
+# backend/export_service.py
+"""
+Streaming bulk export of transactions as CSV, NDJSON or Parquet.
+
+Rows are read in keyset chunks of EXPORT_CHUNK_ROWS (one ``id > last``
+query per chunk; mysqlconnector has no server-side cursors) and each
+chunk is encoded and yielded immediately, so memory stays flat and the
+first bytes go out after the first chunk rather than the whole result.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from . import arrow_format, crud
+from .database import SessionLocal
+from .models import Transaction
+from utils.logger import get_logger
+
+logger = get_logger("ExportService")
+
+EXPORT_CHUNK_ROWS = 5000
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _naive_utc(d: datetime) -> datetime:
+    if d is not None and d.tzinfo is not None:
+        return d.astimezone(timezone.utc).replace(tzinfo=None)
+    return d
+
+
+def _export_statement(start, end, type, status):
+    start, end = _naive_utc(start), _naive_utc(end)
+    cols = [getattr(Transaction, name) for name in arrow_format.TRANSACTION_COLUMNS]
+    stmt = select(Transaction.id, *cols)
+    if start is not None:
+        stmt = stmt.where(Transaction.TRN_DATE >= start)
+    if end is not None:
+        stmt = stmt.where(Transaction.TRN_DATE < end)
+    return crud.filter_transactions(stmt, type, status)
+
+
+def _iter_chunks(start, end, type, status):
+    """
+    Yield lists of row tuples from a dedicated session that lives exactly
+    as long as the stream.
+    """
+    db = SessionLocal()
+    try:
+        stmt = _export_statement(start, end, type, status)
+        for chunk in crud.keyset_chunks(db, stmt, EXPORT_CHUNK_ROWS):
+            yield [row[1:] for row in chunk]  # drop the keyset id
+    finally:
+        db.close()
+
+
+def _text_value(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+def _csv_stream(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(arrow_format.TRANSACTION_COLUMNS)
+    yield buf.getvalue().encode("utf-8")
+    for chunk in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([[_text_value(v) for v in row] for row in chunk])
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_stream(chunks):
+    names = arrow_format.TRANSACTION_COLUMNS
+    for chunk in chunks:
+        lines = [
+            json.dumps({k: _text_value(v) for k, v in zip(names, row)}, separators=(",", ":"))
+            for row in chunk
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands buffered bytes back to the generator."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_stream(chunks):
+    arrow_format.require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = arrow_format.transaction_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for chunk in chunks:
+            # One row group per chunk; flushed bytes are sent right away
+            writer.write_batch(arrow_format.rows_to_record_batch(chunk, schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_transactions(fmt: str, start=None, end=None, type=None, status=None):
+    """
+    Byte generator for a transaction export in ``fmt`` (see EXPORT_FORMATS).
+    """
+    chunks = _iter_chunks(start, end, type, status)
+    if fmt == "csv":
+        return _csv_stream(chunks)
+    if fmt == "ndjson":
+        return _ndjson_stream(chunks)
+    if fmt == "parquet":
+        return _parquet_stream(chunks)
+    raise ValueError(f"Unsupported export format '{fmt}'")
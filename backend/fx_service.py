@@ -0,0 +1,210 @@
+# backend/fx_service.py
+import bisect
+import os
+import random
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import FxRate
+from utils.logger import get_logger
+
+logger = get_logger("FxService")
+
+# Reference mid rates expressed as units of currency per 1 USD. Every pair is
+# derived through USD, so adding a currency here extends the whole matrix.
+REFERENCE_RATES = {
+    "USD": Decimal("1.0"),
+    "RM": Decimal("4.23"),
+    "SGD": Decimal("1.35"),
+    "EUR": Decimal("0.92"),
+    "GBP": Decimal("0.79"),
+}
+# Max relative deviation of a bucket's rate from the reference mid (~±0.05 on USD/RM)
+JITTER = 0.012
+
+FX_BUCKET_MINUTES = int(os.getenv("FX_BUCKET_MINUTES", "60"))
+FX_CACHE_SIZE = int(os.getenv("FX_CACHE_SIZE", "256"))
+
+# bucket_start -> {ccy: units per USD}, least recently used first
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+# currencies already reported as missing from REFERENCE_RATES
+_unknown_ccys = set()
+
+
+def bucket_start(at: Optional[datetime] = None) -> datetime:
+    """
+    Floor a timestamp (naive UTC) to the start of its FX bucket.
+    """
+    if at is None:
+        at = datetime.now(timezone.utc)
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    minutes = (at.hour * 60 + at.minute) // FX_BUCKET_MINUTES * FX_BUCKET_MINUTES
+    return at.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def _synthesize_rates(bucket: datetime) -> Dict[str, Decimal]:
+    """
+    Deterministic jittered rates for a bucket: the same bucket always gets
+    the same rates, so regenerating a missing bucket is reproducible.
+    """
+    rates = {}
+    for ccy, mid in REFERENCE_RATES.items():
+        if ccy == "USD":
+            rates[ccy] = Decimal("1.0")
+            continue
+        rng = random.Random(f"{ccy}:{bucket.isoformat()}")
+        factor = Decimal(str(1 + rng.uniform(-JITTER, JITTER)))
+        rates[ccy] = (mid * factor).quantize(Decimal("0.00000001"))
+    return rates
+
+
+def _load_or_create_rates(bind, bucket: datetime) -> Dict[str, Decimal]:
+    """
+    Rates for a bucket from fx_rates, storing synthesized ones for missing
+    currencies. Runs in its own short-lived session: read paths never write
+    through the caller's session, and a lost insert race never rolls back
+    the caller's pending work.
+    """
+    with Session(bind=bind) as session:
+        rows = session.query(FxRate).filter(FxRate.bucket_start == bucket).all()
+        rates = {r.quote_ccy: Decimal(str(r.rate)) for r in rows}
+        missing = set(REFERENCE_RATES) - set(rates)
+        if not missing:
+            return rates
+
+        synthesized = _synthesize_rates(bucket)
+        for ccy in missing:
+            session.add(FxRate(bucket_start=bucket, base_ccy="USD", quote_ccy=ccy, rate=synthesized[ccy]))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Another process stored this bucket first; use its rows
+            session.rollback()
+            rows = session.query(FxRate).filter(FxRate.bucket_start == bucket).all()
+            return {r.quote_ccy: Decimal(str(r.rate)) for r in rows}
+    logger.info(f"Stored FX rates for bucket {bucket.isoformat()}")
+    rates.update({ccy: synthesized[ccy] for ccy in missing})
+    return rates
+
+
+def get_usd_rates(at: Optional[datetime] = None, db: Optional[Session] = None) -> Dict[str, Decimal]:
+    """
+    Units-per-USD rates for the bucket containing ``at``, served from the
+    in-process LRU cache and falling back to the fx_rates table.
+    """
+    bucket = bucket_start(at)
+    with _cache_lock:
+        rates = _cache.get(bucket)
+        if rates is not None:
+            _cache.move_to_end(bucket)
+            return rates
+
+    if db is None:
+        from .database import engine
+
+        rates = _load_or_create_rates(engine, bucket)
+    else:
+        rates = _load_or_create_rates(db.get_bind(), bucket)
+
+    with _cache_lock:
+        _cache[bucket] = rates
+        _cache.move_to_end(bucket)
+        while len(_cache) > FX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return rates
+
+
+def get_fx_rate(
+    base: str, quote: str, at: Optional[datetime] = None, db: Optional[Session] = None
+) -> Decimal:
+    """
+    Rate to convert one unit of ``base`` into ``quote`` for the bucket
+    containing ``at`` (default: now). Unknown currencies convert at 1.0
+    (logged once per currency).
+    """
+    if base == quote:
+        return Decimal("1.0")
+    return _convert(get_usd_rates(at, db), base, quote)
+
+
+def reference_fx_rate(base: str, quote: str, at: Optional[datetime] = None) -> Decimal:
+    """
+    get_fx_rate without a database: the deterministic rate synthesized for
+    the bucket, which is what get_fx_rate stores the first time it sees it.
+    """
+    if base == quote:
+        return Decimal("1.0")
+    return _convert(_synthesize_rates(bucket_start(at)), base, quote)
+
+
+class FxWindow:
+    """
+    Read-only units-per-USD rates for [start, end), loaded in two queries.
+    A bucket without a stored rate for a currency uses the nearest stored
+    one (earlier first), then the reference rate; nothing is written, so
+    GET handlers can convert many buckets without touching fx_rates.
+    """
+
+    def __init__(self, db: Session, start: datetime, end: datetime):
+        lo = bucket_start(start)
+        rows = db.query(FxRate).filter(FxRate.bucket_start >= lo, FxRate.bucket_start < end).all()
+        latest = (
+            db.query(FxRate.quote_ccy, func.max(FxRate.bucket_start).label("bucket_start"))
+            .filter(FxRate.bucket_start < lo)
+            .group_by(FxRate.quote_ccy)
+            .subquery()
+        )
+        rows += (
+            db.query(FxRate)
+            .join(latest, and_(FxRate.quote_ccy == latest.c.quote_ccy, FxRate.bucket_start == latest.c.bucket_start))
+            .all()
+        )
+        series = {}  # ccy -> sorted [(bucket_start, rate)]
+        for r in sorted(rows, key=lambda r: r.bucket_start):
+            series.setdefault(r.quote_ccy, []).append((r.bucket_start, Decimal(str(r.rate))))
+        self._starts = {ccy: [b for b, _ in s] for ccy, s in series.items()}
+        self._rates = {ccy: [rate for _, rate in s] for ccy, s in series.items()}
+
+    def _usd_rate(self, ccy: str, bucket: datetime) -> Optional[Decimal]:
+        if ccy == "USD":
+            return Decimal("1.0")
+        starts = self._starts.get(ccy)
+        if not starts:
+            return _synthesize_rates(bucket).get(ccy)
+        i = bisect.bisect_right(starts, bucket)
+        return self._rates[ccy][i - 1 if i else 0]
+
+    def rate(self, base: str, quote: str, at: datetime) -> Decimal:
+        """get_fx_rate for ``at`` from the loaded window."""
+        if base == quote:
+            return Decimal("1.0")
+        bucket = bucket_start(at)
+        rates = {}
+        for ccy in (base, quote):
+            rate = self._usd_rate(ccy, bucket)
+            if rate is not None:
+                rates[ccy] = rate
+        return _convert(rates, base, quote)
+
+
+def _convert(rates: Dict[str, Decimal], base: str, quote: str) -> Decimal:
+    if base not in rates or quote not in rates:
+        for ccy in {base, quote} - set(rates) - _unknown_ccys:
+            _unknown_ccys.add(ccy)
+            logger.warning(f"No FX rate for currency '{ccy}'; converting at 1.0")
+        return Decimal("1.0")
+    return (rates[quote] / rates[base]).quantize(Decimal("0.0001"))
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
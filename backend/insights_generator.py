@@ -16,28 +16,47 @@ Each insight must have:
 Return ONLY valid JSON, no extra commentary.
 """
 
-def generate_insights_from_kpis(kpis: Dict) -> List[Dict]:
+# Shown when the model is down or answers with something unparsable
+FALLBACK_INSIGHTS = [
+    {"icon": "chart-line", "color": "#1565c0", "text": "Total transactions are steady."},
+    {"icon": "triangle-exclamation", "color": "#e67e22", "text": "Failure rate requires monitoring."},
+    {"icon": "arrow-up", "color": "#27ae60", "text": "Customer engagement is increasing."}
+]
+
+
+def parse_insights(raw: str) -> List[Dict]:
+    """LLM output as a list of insights; ValueError if it is not one."""
+    insights = json.loads(raw)
+    if not isinstance(insights, list):
+        raise ValueError("LLM returned non-list JSON")
+    return insights
+
+
+def generate_insights_from_kpis(kpis: Dict, fallback: bool = True) -> List[Dict]:
+    """
+    Insights for a KPI snapshot. If the model fails or its output does not
+    parse, returns FALLBACK_INSIGHTS, or raises ValueError when
+    ``fallback`` is False.
+    """
+    # id / computed_at change every snapshot; leaving them out keeps the
+    # prompt byte-identical while the numbers are unchanged (LLM cache hits)
+    kpis = {k: v for k, v in kpis.items() if k not in ("id", "computed_at")}
     prompt = f"""{SYSTEM_PROMPT}
 
 KPI DATA:
 {kpis}
 
 Your response:"""
-    raw = run_llm(prompt)
+    raw = run_llm(prompt, cache="insights", validate=parse_insights)
 
     try:
-        insights = json.loads(raw)
-        if isinstance(insights, list):
-            logger.info("Parsed %d insights from LLM", len(insights))
-            return insights
-        else:
-            logger.warning("LLM returned non-list JSON. Falling back.")
-    except Exception as e:
+        insights = parse_insights(raw)
+        logger.info("Parsed %d insights from LLM", len(insights))
+        return insights
+    except ValueError as e:  # json.JSONDecodeError is a ValueError
         logger.error("Failed to parse LLM JSON: %s", str(e))
+        if not fallback:
+            raise
 
     # --- Fallback dummy insights ---
-    return [
-        {"icon": "chart-line", "color": "#1565c0", "text": "Total transactions are steady."},
-        {"icon": "triangle-exclamation", "color": "#e67e22", "text": "Failure rate requires monitoring."},
-        {"icon": "arrow-up", "color": "#27ae60", "text": "Customer engagement is increasing."}
-    ]
\ No newline at end of file
+    return [dict(i) for i in FALLBACK_INSIGHTS]
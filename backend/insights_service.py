@@ -0,0 +1,171 @@
+# backend/insights_service.py
+"""
+Background, stale-while-revalidate AI insights.
+
+The KPI worker hands every new snapshot to ``insights.submit``. When it
+differs materially from the snapshot the current insights were generated
+from, the LLM runs on a single background thread; /insights only ever
+reads the cached result. Snapshots arriving while a generation is running
+are coalesced: only the newest one is generated next.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from .insights_generator import generate_insights_from_kpis
+from utils.logger import get_logger
+
+logger = get_logger("InsightsService")
+
+# ------------------------
+# Materiality thresholds
+# ------------------------
+# KPI totals are cumulative and barely move once the ledger is large, so
+# volume and mix are judged on the window since the last generation.
+# transactions since the last generation that always warrant new insights
+NEW_TXNS = 500
+# smallest window whose own failure rate / average amount is compared
+MIN_WINDOW_TXNS = 50
+# window failure rate vs the overall rate, percentage points
+WINDOW_FAILURE_RATE_CHANGE = 5.0
+# relative change of the window's average amount vs the overall average
+TICKET_SIZE_CHANGE = 0.25
+# absolute change in overall / per-type failure rate, percentage points
+FAILURE_RATE_CHANGE = 0.5
+TYPE_FAILURE_RATE_CHANGE = 1.0
+# regenerate on any change once the insights are this old (seconds)
+MAX_AGE = 600
+
+
+def _relative_change(old, new) -> float:
+    old, new = Decimal(str(old or 0)), Decimal(str(new or 0))
+    if old == 0:
+        return 0.0 if new == 0 else 1.0
+    return float(abs(new - old) / abs(old))
+
+
+def material_change(prev: dict, kpi: dict) -> bool:
+    """
+    True if ``kpi`` would plausibly change the insights generated from
+    ``prev``: NEW_TXNS transactions arrived since, the transactions since
+    then fail or spend noticeably differently from the totals, the overall
+    failure rate moved, or a transaction type appeared or changed its
+    failure rate.
+    """
+    if prev is None:
+        return True
+    prev_total = int(prev.get("total_transactions") or 0)
+    window = int(kpi.get("total_transactions") or 0) - prev_total
+    if window >= NEW_TXNS:
+        return True
+    if window >= MIN_WINDOW_TXNS:
+        window_fails = int(kpi.get("fail_count") or 0) - int(prev.get("fail_count") or 0)
+        window_rate = 100.0 * window_fails / window
+        if abs(window_rate - float(prev.get("failure_rate") or 0)) >= WINDOW_FAILURE_RATE_CHANGE:
+            return True
+        prev_amount = Decimal(str(prev.get("total_amount_usd") or 0))
+        window_amount = Decimal(str(kpi.get("total_amount_usd") or 0)) - prev_amount
+        if prev_total and _relative_change(prev_amount / prev_total, window_amount / window) >= TICKET_SIZE_CHANGE:
+            return True
+    if abs(float(kpi.get("failure_rate") or 0) - float(prev.get("failure_rate") or 0)) >= FAILURE_RATE_CHANGE:
+        return True
+
+    prev_split = prev.get("txn_type_split") or {}
+    for ttype, vals in (kpi.get("txn_type_split") or {}).items():
+        old = prev_split.get(ttype)
+        if old is None:
+            return True
+        rate_change = abs(float(vals.get("failure_rate") or 0) - float(old.get("failure_rate") or 0))
+        if rate_change >= TYPE_FAILURE_RATE_CHANGE:
+            return True
+    return False
+
+
+def _generate_or_raise(kpi: dict) -> list:
+    # canned fallback insights must not replace the last good ones
+    return generate_insights_from_kpis(kpi, fallback=False)
+
+
+class InsightsCache:
+    def __init__(self, generate=_generate_or_raise):
+        self._generate = generate
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="insights")
+        self._data = []
+        self._generated_at = None
+        self._generation_seconds = None
+        self._source = None  # snapshot the current insights came from
+        self._pending = None  # newest snapshot waiting for a generation
+        self._running = False
+
+    def submit(self, kpi: dict) -> bool:
+        """
+        Queue a generation for ``kpi`` if it changed materially (or the
+        insights are older than MAX_AGE). Never blocks; returns whether a
+        generation was queued.
+        """
+        with self._lock:
+            stale = (
+                self._generated_at is not None
+                and (datetime.now(timezone.utc) - self._generated_at).total_seconds() >= MAX_AGE
+                and kpi.get("id") != (self._source or {}).get("id")
+            )
+            if not (stale or material_change(self._source, kpi)):
+                return False
+            self._pending = kpi
+            if self._running:
+                return True
+            self._running = True
+        self._pool.submit(self._run)
+        return True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                kpi, self._pending = self._pending, None
+                if kpi is None:
+                    self._running = False
+                    return
+            t0 = time.monotonic()
+            try:
+                data = self._generate(kpi)
+            except Exception as e:
+                logger.error(f"[insights] generation failed: {e}")
+                continue
+            elapsed = time.monotonic() - t0
+            with self._lock:
+                self._data = data
+                self._source = kpi
+                self._generated_at = datetime.now(timezone.utc)
+                self._generation_seconds = elapsed
+            logger.info(f"[insights] generated {len(data)} insights for KPI {kpi.get('id')} in {elapsed:.1f}s")
+
+    def snapshot(self, now: datetime = None) -> dict:
+        """Cached insights with their age; never waits for the LLM."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            generated_at = self._generated_at
+            return {
+                "insights": self._data,
+                "generated_at": generated_at.isoformat() if generated_at else None,
+                "age_seconds": round((now - generated_at).total_seconds(), 1) if generated_at else None,
+                "generation_seconds": round(self._generation_seconds, 2) if self._generation_seconds is not None else None,
+                "kpi_id": (self._source or {}).get("id"),
+                "refreshing": self._running,
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until no generation is queued or running (tests, shutdown)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._running:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+
+insights = InsightsCache()
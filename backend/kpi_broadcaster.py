@@ -0,0 +1,121 @@
+# backend/kpi_broadcaster.py
+"""
+Fan-out of KPI snapshots to /kpis/stream subscribers (Server-Sent Events).
+
+The KPI worker publishes each new snapshot from its scheduler thread; the
+message is encoded once and handed to every subscriber queue on the event
+loop. Subscribers get a full snapshot on connect and compact deltas after
+that. A subscriber that falls behind has its queue replaced by a single
+full snapshot, so no client ever applies a delta to the wrong base.
+"""
+import asyncio
+import threading
+from decimal import Decimal
+
+import orjson
+
+from utils.logger import get_logger
+
+logger = get_logger("KpiBroadcaster")
+
+# Pending messages per subscriber before it is resynced with a snapshot
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def _default(obj):
+    # Same numbers as the /kpis JSON (FastAPI renders Decimal as float)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def kpi_delta(prev: dict, new: dict) -> dict:
+    """
+    Keys of ``new`` whose values differ from ``prev``, recursing into nested
+    dicts; keys that disappeared map to None.
+    """
+    delta = {}
+    for key, value in new.items():
+        old = prev.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            sub = kpi_delta(old, value)
+            if sub:
+                delta[key] = sub
+        elif value != old:
+            delta[key] = value
+    for key in prev.keys() - new.keys():
+        delta[key] = None
+    return delta
+
+
+def sse_event(event: str, data: dict, event_id=None) -> bytes:
+    head = f"event: {event}\n" + (f"id: {event_id}\n" if event_id is not None else "")
+    return head.encode() + b"data: " + orjson.dumps(data, default=_default) + b"\n\n"
+
+
+class KpiBroadcaster:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._loop = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._snapshot_msg = None
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop that owns the subscriber queues (set on app startup)."""
+        self._loop = loop
+
+    @property
+    def latest(self):
+        return self._latest
+
+    def snapshot_message(self):
+        return self._snapshot_msg
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, kpi: dict):
+        """
+        Record a new snapshot and push its delta to all subscribers. Safe to
+        call from any thread.
+        """
+        with self._lock:
+            prev, self._latest = self._latest, kpi
+            snapshot_msg = sse_event("snapshot", kpi, kpi.get("id"))
+            self._snapshot_msg = snapshot_msg
+        if prev is None:
+            delta_msg = snapshot_msg
+        else:
+            delta = kpi_delta(prev, kpi)
+            delta["id"] = kpi.get("id")
+            delta_msg = sse_event("delta", delta, kpi.get("id"))
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._fan_out, delta_msg, snapshot_msg)
+
+    def _fan_out(self, delta_msg: bytes, snapshot_msg: bytes):
+        # Runs on the event loop
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(delta_msg)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(snapshot_msg)
+                logger.info("[kpi_stream] slow subscriber resynced with a full snapshot")
+
+
+broadcaster = KpiBroadcaster()
@@ -2,7 +2,11 @@
 import atexit
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from .database import SessionLocal
-from .crud import compute_kpis
+from .crud import compute_kpis, reconcile_kpi_state, downsample_kpis
+from .rollup_service import update_txn_rollups, prune_txn_rollups
+from .archive_service import run_archival
+from .kpi_broadcaster import broadcaster
+from .insights_service import insights
 from utils.logger import get_logger
 
 logger = get_logger("kpi_worker")
@@ -14,7 +18,9 @@ _scheduler_started = False
 def _job_compute_kpis():
     db = SessionLocal()
     try:
-        kpi = compute_kpis(db)  # returns dict
+        kpi = compute_kpis(db, incremental=True)  # returns dict
+        broadcaster.publish(kpi)  # push to /kpis/stream subscribers
+        insights.submit(kpi)  # regenerates insights in the background if it changed materially
         logger.info(
             f"[kpi_worker] KPI computed_at={kpi.get('computed_at')}, txns={kpi.get('total_transactions')}"
         )
@@ -24,6 +30,50 @@ def _job_compute_kpis():
         db.close()
 
 
+def _job_reconcile_kpis():
+    db = SessionLocal()
+    try:
+        if reconcile_kpi_state(db):
+            logger.info("[kpi_worker] KPI reconciliation OK")
+    except Exception as e:
+        logger.error(f"[kpi_worker] error reconciling kpis: {e}")
+    finally:
+        db.close()
+
+
+def _job_update_rollups():
+    db = SessionLocal()
+    try:
+        update_txn_rollups(db)
+    except Exception as e:
+        logger.error(f"[kpi_worker] error updating txn rollups: {e}")
+    finally:
+        db.close()
+
+
+def _job_downsample_kpis():
+    db = SessionLocal()
+    try:
+        stats = downsample_kpis(db)
+        stats["pruned_rollups"] = prune_txn_rollups(db)
+        logger.info(f"[kpi_worker] KPI downsample {stats}")
+    except Exception as e:
+        logger.error(f"[kpi_worker] error downsampling kpis: {e}")
+    finally:
+        db.close()
+
+
+def _job_archive_cold_months():
+    db = SessionLocal()
+    try:
+        archived = run_archival(db)
+        logger.info(f"[kpi_worker] archived months: {[m.strftime('%Y-%m') for m in archived]}")
+    except Exception as e:
+        logger.error(f"[kpi_worker] error archiving cold months: {e}")
+    finally:
+        db.close()
+
+
 def start():
     global _scheduler_started
     if _scheduler_started:
@@ -32,9 +82,17 @@ def start():
 
     # run immediately
     _job_compute_kpis()
+    _job_update_rollups()
 
     # schedule every 5 seconds
     scheduler.add_job(_job_compute_kpis, "interval", seconds=5)
+    scheduler.add_job(_job_update_rollups, "interval", seconds=5)
+    # roll raw snapshots up to minute/hour tiers and expire old rows
+    scheduler.add_job(_job_downsample_kpis, "interval", minutes=1)
+    # full rebuild every 15 minutes to reconcile the incremental aggregates
+    scheduler.add_job(_job_reconcile_kpis, "interval", minutes=15)
+    # partition maintenance + hot/cold archival, nightly
+    scheduler.add_job(_job_archive_cold_months, "cron", hour=2, minute=30)
 
     scheduler.start()
     atexit.register(lambda: scheduler.shutdown(wait=False))
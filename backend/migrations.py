@@ -0,0 +1,215 @@
+# backend/migrations.py
+"""
+Versioned schema migrations and a query-plan check for the hot queries.
+
+    python -m backend.migrations status
+    python -m backend.migrations upgrade
+    python -m backend.migrations check-plans
+
+Migrations are the numbered ``db/migrations/NNNN_name.sql`` files. Applied
+versions are recorded in ``schema_migrations``; ``db/schema.sql`` creates a
+database that is already at the latest version.
+"""
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, case, text
+from sqlalchemy.engine import Connection, Engine
+
+from .crud import since_filter
+from .models import Transaction
+from utils.logger import get_logger
+
+logger = get_logger("Migrations")
+
+MIGRATIONS_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "db", "migrations")
+)
+_FILENAME_RE = re.compile(r"^(\d{4})_[\w\-]+\.sql$")
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> list:
+    """
+    (version, filename, path) for every migration file, ordered by version.
+    """
+    found = []
+    for name in sorted(os.listdir(directory)):
+        m = _FILENAME_RE.match(name)
+        if m:
+            found.append((int(m.group(1)), name, os.path.join(directory, name)))
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return found
+
+
+def split_statements(sql: str) -> list:
+    """
+    Split a migration file into statements on ';' line endings, dropping
+    '--' comment lines.
+    """
+    lines = [ln for ln in sql.splitlines() if not ln.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INT NOT NULL PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at DATETIME NOT NULL)"
+    ))
+
+
+def applied_versions(conn: Connection) -> set:
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine: Engine, directory: str = MIGRATIONS_DIR) -> list:
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [m for m in discover_migrations(directory) if m[0] not in done]
+
+
+def upgrade(engine: Engine, directory: str = MIGRATIONS_DIR) -> list:
+    """
+    Apply pending migrations in version order. Each file runs and is
+    recorded in its own transaction (MySQL DDL still auto-commits per
+    statement, so a failing file must be fixed forward).
+    """
+    applied = []
+    for version, name, path in pending_migrations(engine, directory):
+        with open(path, encoding="utf-8") as fh:
+            statements = split_statements(fh.read())
+        logger.info(f"Applying migration {name} ({len(statements)} statements)")
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()},
+            )
+        applied.append(name)
+    return applied
+
+
+# --- Query-plan check ---
+def hot_queries(now: datetime = None) -> dict:
+    """
+    Representative statements for the access paths the indexes exist for.
+    Each must be answerable without a full scan of ``transactions``.
+    """
+    if now is None:
+        now = datetime.utcnow()
+    T = Transaction
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    day_end = day_start + timedelta(days=1) - timedelta(microseconds=1)
+    return {
+        "transactions_by_type_status": select(T)
+        .where(T.TRN_TYPE == "TRANSFER", T.STATUS == "FAILED")
+        .order_by(T.id.desc())
+        .limit(50),
+        "transactions_by_type": select(T)
+        .where(T.TRN_TYPE == "DEPOSIT")
+        .order_by(T.id.desc())
+        .limit(50),
+        "transactions_by_status": select(T)
+        .where(T.STATUS == "FAILED")
+        .order_by(T.id.desc())
+        .limit(50),
+        "transactions_since": select(T)
+        .where(*since_filter(now - timedelta(hours=1)))
+        .order_by(T.id.desc())
+        .limit(50),
+        "bank_charges_report": select(
+            T.TRN_TYPE, T.TRN_CCY, T.ACCOUNT_CCY,
+            func.count(T.id), func.sum(T.TRN_AMOUNT), func.sum(T.BANK_CHARGES),
+        )
+        .where(T.TRN_DATE >= day_start, T.TRN_DATE <= day_end)
+        .group_by(T.TRN_TYPE, T.TRN_CCY, T.ACCOUNT_CCY),
+        "failure_timeline_report": select(func.count(T.id))
+        .where(T.STATUS == "FAILED", T.TRN_DATE >= day_start, T.TRN_DATE <= day_end),
+        "kpi_incremental_fold": select(
+            T.CUSTOMER_ID, T.TRN_CCY, T.TRN_TYPE, func.count(T.id),
+            func.sum(case((T.STATUS == "FAILED", 1), else_=0)),
+        )
+        .where(T.id > 1000)
+        .group_by(T.CUSTOMER_ID, T.TRN_CCY, T.TRN_TYPE),
+    }
+
+
+def full_scans(conn: Connection, stmt, table: str = "transactions") -> list:
+    """
+    Plan lines showing a full table scan of ``table`` for ``stmt``
+    (MySQL ``type=ALL`` / SQLite full table or index scans).
+    """
+    compiled = stmt.compile(dialect=conn.dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[k] for k in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if conn.dialect.name == "sqlite":
+        details = [
+            r[-1]
+            for r in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+        ]
+        # SCAN reads the whole table or a whole index; a SEARCH without a
+        # "(column=?)" constraint is a MIN/MAX rowid walk or an index skip-scan
+        return [
+            d for d in details
+            if d.startswith(f"SCAN {table}") or (d.startswith(f"SEARCH {table}") and "(" not in d)
+        ]
+
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", params).mappings().fetchall()
+    return [
+        f"{r['table']}: type={r['type']} key={r['key']}"
+        for r in rows
+        if r["table"] == table and r["type"] == "ALL"
+    ]
+
+
+def check_query_plans(engine: Engine) -> dict:
+    """
+    Run EXPLAIN for every hot query. Returns {name: [offending plan lines]}
+    for the queries that fall back to a full table scan.
+    """
+    failures = {}
+    with engine.connect() as conn:
+        for name, stmt in hot_queries().items():
+            scans = full_scans(conn, stmt)
+            if scans:
+                failures[name] = scans
+    return failures
+
+
+def main(argv=None) -> int:
+    from .database import engine
+
+    command = (argv or sys.argv[1:] or ["status"])[0]
+    if command == "status":
+        pending = pending_migrations(engine)
+        print("Pending migrations:" if pending else "Schema is up to date.")
+        for _, name, _ in pending:
+            print(f"  {name}")
+        return 0
+    if command == "upgrade":
+        for name in upgrade(engine):
+            print(f"Applied {name}")
+        return 0
+    if command == "check-plans":
+        failures = check_query_plans(engine)
+        for name, scans in failures.items():
+            print(f"FULL SCAN in {name}: {'; '.join(scans)}")
+        if not failures:
+            print("All hot queries use an index.")
+        return 1 if failures else 0
+    print(f"Unknown command {command!r}; use status, upgrade or check-plans")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
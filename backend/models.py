@@ -9,16 +9,20 @@ from sqlalchemy import (
     DECIMAL,
     JSON,
     Index,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
 Base = declarative_base()
 
+# BIGINT primary keys only autoincrement on SQLite as INTEGER (used in tests)
+BigIntPK = BigInteger().with_variant(Integer, "sqlite")
+
 
 class Account(Base):
     __tablename__ = "accounts"
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
     ACCOUNT_NO = Column(String(32), unique=True, nullable=False)
     CUSTOMER_ID = Column(String(64), index=True, nullable=False)
     ACCOUNT_CCY = Column(String(3), nullable=False)
@@ -27,8 +31,14 @@ class Account(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    TRN_REF_NO = Column(String(64), unique=True, nullable=False)
+    # Production's PK is (id, TRN_DATE): MySQL partitioning (migration 0004)
+    # needs the partition column in every unique key. The model deliberately
+    # keeps id alone: id is AUTO_INCREMENT and unique on its own, the ORM
+    # identity is id, and SQLite (tests) only autoincrements a single-column
+    # INTEGER PK. create_all never alters the existing production table;
+    # its schema comes from db/migrations.
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    TRN_REF_NO = Column(String(64), nullable=False)
     ACCOUNT_NO = Column(String(32), nullable=False)
     CUSTOMER_ID = Column(String(64), nullable=False)
     TRN_DATE = Column(DateTime, nullable=False)
@@ -52,11 +62,27 @@ class Transaction(Base):
     CREDIT_ACCOUNT_CCY = Column(String(3))
     CREATED_AT = Column(DateTime, default=datetime.utcnow)
 
+    # Query-path indexes (db/migrations/0003_transaction_query_indexes.sql)
+    __table_args__ = (
+        # widened with the partition column, as in migration 0004
+        UniqueConstraint("TRN_REF_NO", "TRN_DATE", name="uq_ref"),
+        Index("idx_trn_type_status_id", "TRN_TYPE", "STATUS", "id"),
+        Index("idx_trn_type_id", "TRN_TYPE", "id"),
+        Index("idx_trn_status_id", "STATUS", "id"),
+        Index("idx_trn_status_date", "STATUS", "TRN_DATE"),
+        Index(
+            "idx_trn_date_report",
+            "TRN_DATE", "TRN_TYPE", "TRN_CCY", "ACCOUNT_CCY", "TRN_AMOUNT", "BANK_CHARGES",
+        ),
+    )
+
 
 class KPI(Base):
     __tablename__ = "kpis"
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
     computed_at = Column(DateTime, nullable=False)
+    # Time-series tier: "raw" (5s snapshots), "minute" or "hour" rollups
+    resolution = Column(String(8), nullable=False, default="raw")
 
     # Existing aggregates
     total_transactions = Column(Integer, nullable=False)
@@ -75,6 +101,91 @@ class KPI(Base):
     total_bank_charges = Column(DECIMAL(18, 2), nullable=False, default=0.00)
     failed_txn_count = Column(Integer, nullable=False, default=0)
     failure_rate = Column(DECIMAL(5, 2), nullable=False, default=0.00)
+    # Per-type count / amount / fail_count / failure_rate as served by /kpis
+    txn_type_split = Column(JSON, nullable=True)
 
 
 Index("idx_kpis_computed_at", KPI.computed_at)
+Index("idx_kpis_resolution_computed_at", KPI.resolution, KPI.computed_at)
+
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    # Start of the time bucket the rate applies to
+    bucket_start = Column(DateTime, nullable=False)
+    base_ccy = Column(String(3), nullable=False)
+    quote_ccy = Column(String(3), nullable=False)
+    rate = Column(DECIMAL(18, 8), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "base_ccy", "quote_ccy", name="uq_fx_bucket_pair"),
+    )
+
+
+class TxnRollup(Base):
+    __tablename__ = "txn_rollups"
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    bucket_size = Column(Enum("minute", "hour"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    TRN_TYPE = Column(
+        Enum("TRANSFER", "DEPOSIT", "LOAN_PAYMENT", "BILL_PAYMENT"), nullable=False
+    )
+    STATUS = Column(Enum("SUCCESS", "FAILED"), nullable=False)
+    TRN_CCY = Column(String(3), nullable=False)
+
+    txn_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(DECIMAL(20, 2), nullable=False, default=0.00)
+    bank_charges_sum = Column(DECIMAL(20, 2), nullable=False, default=0.00)
+    # Highest transactions.id folded into this row
+    max_txn_id = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_size", "bucket_start", "TRN_TYPE", "STATUS", "TRN_CCY",
+            name="uq_txn_rollup_key",
+        ),
+    )
+
+
+class TxnArchive(Base):
+    """One row per archived (cold) month of the transactions ledger."""
+
+    __tablename__ = "txn_archives"
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    month_start = Column(DateTime, nullable=False, unique=True)
+    file_path = Column(String(512), nullable=False)
+    row_count = Column(BigInteger, nullable=False, default=0)
+    max_txn_id = Column(BigInteger, nullable=False, default=0)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class TxnArchiveRollup(Base):
+    """Daily aggregates of archived transactions, in the KPI fold's shape."""
+
+    __tablename__ = "txn_archive_rollups"
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    day = Column(DateTime, nullable=False)
+    CUSTOMER_ID = Column(String(64), nullable=False)
+    TRN_CCY = Column(String(3), nullable=False)
+    ACCOUNT_CCY = Column(String(3), nullable=False)
+    TRN_TYPE = Column(
+        Enum("TRANSFER", "DEPOSIT", "LOAN_PAYMENT", "BILL_PAYMENT"), nullable=False
+    )
+
+    txn_count = Column(Integer, nullable=False, default=0)
+    dr_count = Column(Integer, nullable=False, default=0)
+    cr_count = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(DECIMAL(20, 2), nullable=False, default=0.00)
+    # Charges of successful transactions (failed ones carry 0.00 charges)
+    bank_charges_sum = Column(DECIMAL(20, 2), nullable=False, default=0.00)
+    max_txn_id = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "day", "CUSTOMER_ID", "TRN_CCY", "ACCOUNT_CCY", "TRN_TYPE",
+            name="uq_txn_archive_rollup_key",
+        ),
+    )
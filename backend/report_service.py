@@ -9,8 +9,10 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from utils.logger import get_logger
 from utils.llm_connector import run_llm
 import json
+from sqlalchemy import func, extract
 from .database import SessionLocal
-from . import models
+from . import models, archive_service, crud
+from .fx_service import get_fx_rate
 
 logger = get_logger("ReportService")
 
@@ -18,6 +20,91 @@ REPORTS_DIR = "/opt/preslaes/AI_Projects/FariSight_Analytics/reports"
 
 
 
+def _bank_charges_summary(db, start: datetime, end: datetime) -> dict:
+    """
+    Per-type count, amount and charges for a date window, aggregated in SQL
+    and converted to USD once per currency group.
+    """
+    T = models.Transaction
+    summary = {
+        t: {"count": 0, "amount": Decimal("0"), "charges": Decimal("0")}
+        for t in ("DEPOSIT", "TRANSFER", "LOAN_PAYMENT", "BILL_PAYMENT")
+    }
+    rows = (
+        db.query(
+            T.TRN_TYPE,
+            T.TRN_CCY,
+            T.ACCOUNT_CCY,
+            func.count(T.id),
+            func.sum(T.TRN_AMOUNT),
+            func.sum(T.BANK_CHARGES),
+        )
+        .filter(T.TRN_DATE >= start)
+        .filter(T.TRN_DATE <= end)
+        .filter(*crud.archived_exclusions(db))  # counted by the rollups below
+        .group_by(T.TRN_TYPE, T.TRN_CCY, T.ACCOUNT_CCY)
+        .all()
+    )
+    if archive_service.is_archived(db, start):
+        # Cold month: the bulk of the day lives in the archive rollups
+        R = models.TxnArchiveRollup
+        rows += (
+            db.query(
+                R.TRN_TYPE,
+                R.TRN_CCY,
+                R.ACCOUNT_CCY,
+                func.sum(R.txn_count),
+                func.sum(R.amount_sum),
+                func.sum(R.bank_charges_sum),
+            )
+            .filter(R.day >= start)
+            .filter(R.day <= end)
+            .group_by(R.TRN_TYPE, R.TRN_CCY, R.ACCOUNT_CCY)
+            .all()
+        )
+    for t_type, trn_ccy, account_ccy, cnt, amount, charges in rows:
+        t_type = (t_type or "").upper()
+        if t_type not in summary:
+            continue
+        # Charges are booked in the account currency
+        amount_usd = Decimal(str(amount or 0)) * get_fx_rate(trn_ccy, "USD", end, db)
+        charges_usd = Decimal(str(charges or 0)) * get_fx_rate(account_ccy, "USD", end, db)
+        summary[t_type]["count"] += int(cnt or 0)
+        summary[t_type]["amount"] += amount_usd.quantize(Decimal("0.01"))
+        summary[t_type]["charges"] += charges_usd.quantize(Decimal("0.01"))
+    return summary
+
+
+def _failure_timeline(db, start: datetime, end: datetime) -> dict:
+    """
+    Failed transaction counts per hour ("HH:00") for a date window. Days in
+    archived months are read from the hourly transaction rollups.
+    """
+    if archive_service.is_archived(db, start):
+        R = models.TxnRollup
+        rows = (
+            db.query(R.bucket_start, func.sum(R.txn_count))
+            .filter(R.bucket_size == "hour", R.STATUS == "FAILED")
+            .filter(R.bucket_start >= start)
+            .filter(R.bucket_start <= end)
+            .group_by(R.bucket_start)
+            .all()
+        )
+        return {b.strftime("%H:00"): int(c) for b, c in rows if c}
+
+    T = models.Transaction
+    hour = extract("hour", T.TRN_DATE)
+    rows = (
+        db.query(hour, func.count(T.id))
+        .filter(T.TRN_DATE >= start)
+        .filter(T.TRN_DATE <= end)
+        .filter(T.STATUS == "FAILED")
+        .group_by(hour)
+        .all()
+    )
+    return {f"{int(h):02d}:00": int(c) for h, c in rows}
+
+
 def generate_bank_charges_report(target_date: date = None) -> str:
     """
     Generate PDF report of bank charges collected today.
@@ -33,36 +120,7 @@ def generate_bank_charges_report(target_date: date = None) -> str:
         start = datetime.combine(target_date, datetime.min.time())
         end = datetime.combine(target_date, datetime.max.time())
 
-        txns = (
-            db.query(models.Transaction)
-            .filter(models.Transaction.TRN_DATE >= start)
-            .filter(models.Transaction.TRN_DATE <= end)
-            .all()
-        )
-
-        # aggregate
-        summary = {
-            "DEPOSIT": {"count": 0, "amount": Decimal("0"), "charges": Decimal("0")},
-            "TRANSFER": {"count": 0, "amount": Decimal("0"), "charges": Decimal("0")},
-            "LOAN_PAYMENT": {
-                "count": 0,
-                "amount": Decimal("0"),
-                "charges": Decimal("0"),
-            },
-            "BILL_PAYMENT": {
-                "count": 0,
-                "amount": Decimal("0"),
-                "charges": Decimal("0"),
-            },
-        }
-
-        for t in txns:
-            t_type = (t.TRN_TYPE or "").upper()
-            if t_type not in summary:
-                continue
-            summary[t_type]["count"] += 1
-            summary[t_type]["amount"] += Decimal(str(t.TRN_AMOUNT))
-            summary[t_type]["charges"] += Decimal(str(t.BANK_CHARGES))
+        summary = _bank_charges_summary(db, start, end)
 
         # totals
         total_count = sum(v["count"] for v in summary.values())
@@ -85,7 +143,7 @@ def generate_bank_charges_report(target_date: date = None) -> str:
         elements.append(Spacer(1, 12))
 
         data = [
-            ["Transaction Type", "Number of  Transactions", "Transaction Amount", "Charges Collected"]
+            ["Transaction Type", "Number of  Transactions", "Amount (USD)", "Charges (USD)"]
         ]
         for k, v in summary.items():
             data.append(
@@ -134,19 +192,8 @@ def generate_failure_timeline_report(target_date: date = None) -> str:
         start = datetime.combine(target_date, datetime.min.time())
         end = datetime.combine(target_date, datetime.max.time())
 
-        txns = (
-            db.query(models.Transaction)
-            .filter(models.Transaction.TRN_DATE >= start)
-            .filter(models.Transaction.TRN_DATE <= end)
-            .filter(models.Transaction.STATUS == "FAILED")
-            .all()
-        )
-
         # Step 1: Aggregate failures by hour
-        timeline = {}
-        for t in txns:
-            hour = t.TRN_DATE.strftime("%H:00")
-            timeline[hour] = timeline.get(hour, 0) + 1
+        timeline = _failure_timeline(db, start, end)
 
         # Step 2: Ask LLM to generate probable causes
         if timeline:
@@ -165,7 +212,7 @@ def generate_failure_timeline_report(target_date: date = None) -> str:
             {context}
             """
 
-            llm_response = run_llm(prompt)
+            llm_response = run_llm(prompt, cache="failure_timeline", validate=json.loads)
             try:
                 causes = json.loads(llm_response) if isinstance(llm_response, str) else llm_response
             except Exception:
@@ -0,0 +1,23 @@
+# backend/responses.py
+"""
+Fast JSON response class. Endpoints that return it skip FastAPI's
+jsonable_encoder pass and serialize once with orjson.
+"""
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj):
+    # Decimals keep their exact scale as strings, as in the dict responses
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default)
@@ -0,0 +1,217 @@
+# backend/rollup_service.py
+import threading
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .crud import safe_txn_id
+from .models import Transaction, TxnRollup
+from .fx_service import FxWindow
+from utils.logger import get_logger
+
+logger = get_logger("RollupService")
+
+# Minute buckets serve short ranges; hour buckets serve everything longer.
+ROLLUP_RETENTION = {
+    "minute": timedelta(days=2),
+    "hour": None,
+}
+
+# Requested range -> (lookback, bucket size, bucket step)
+TIMESERIES_RANGES = {
+    "past_hour": (timedelta(hours=1), "minute", timedelta(minutes=1)),
+    "past_24h": (timedelta(hours=24), "hour", timedelta(hours=1)),
+    "past_7d": (timedelta(days=7), "hour", timedelta(hours=1)),
+}
+
+# Highest transaction id already folded into the rollups (loaded lazily)
+_ROLLUP_HWM = None
+_ROLLUP_LOCK = threading.Lock()
+
+
+def _minute_bucket_expr(db: Session):
+    # TRN_DATE truncated to the minute, as a string both dialects can produce
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m-%d %H:%M:00", Transaction.TRN_DATE)
+    return func.date_format(Transaction.TRN_DATE, "%Y-%m-%d %H:%i:00")
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
+
+
+def _load_hwm(db: Session) -> int:
+    return db.query(func.max(TxnRollup.max_txn_id)).scalar() or 0
+
+
+def update_txn_rollups(db: Session) -> int:
+    """
+    Fold transactions above the rollup high-water mark, up to the safe
+    watermark (crud.safe_txn_id), into the minute and hour rollup rows. A
+    batch that commits late below ids already visible is still ahead of the
+    mark, so it is never skipped. Returns the number of transactions folded.
+    """
+    global _ROLLUP_HWM
+    with _ROLLUP_LOCK:
+        if _ROLLUP_HWM is None:
+            _ROLLUP_HWM = _load_hwm(db)
+        safe = safe_txn_id(db)
+        if safe is None or safe <= _ROLLUP_HWM:
+            return 0
+
+        minute = _minute_bucket_expr(db)
+        rows = (
+            db.query(
+                minute,
+                Transaction.TRN_TYPE,
+                Transaction.STATUS,
+                Transaction.TRN_CCY,
+                func.count(Transaction.id),
+                func.sum(Transaction.TRN_AMOUNT),
+                func.sum(Transaction.BANK_CHARGES),
+                func.max(Transaction.id),
+            )
+            .filter(Transaction.id > _ROLLUP_HWM, Transaction.id <= safe)
+            .group_by(minute, Transaction.TRN_TYPE, Transaction.STATUS, Transaction.TRN_CCY)
+            .all()
+        )
+        if not rows:
+            _ROLLUP_HWM = safe
+            return 0
+
+        # (bucket_size, bucket_start, type, status, ccy) -> [count, amount, charges, max_id]
+        deltas = {}
+        for bucket, ttype, status, ccy, cnt, amount, charges, max_id in rows:
+            start = _as_datetime(bucket)
+            for size, bucket_start in (
+                ("minute", start),
+                ("hour", start.replace(minute=0)),
+            ):
+                acc = deltas.setdefault(
+                    (size, bucket_start, ttype, status, ccy),
+                    [0, Decimal("0"), Decimal("0"), 0],
+                )
+                acc[0] += int(cnt or 0)
+                acc[1] += Decimal(str(amount or 0))
+                acc[2] += Decimal(str(charges or 0))
+                acc[3] = max(acc[3], int(max_id))
+
+        existing = {
+            (r.bucket_size, r.bucket_start, r.TRN_TYPE, r.STATUS, r.TRN_CCY): r
+            for r in db.query(TxnRollup)
+            .filter(TxnRollup.bucket_start.in_(sorted({k[1] for k in deltas})))
+            .all()
+        }
+        for key, (cnt, amount, charges, max_id) in deltas.items():
+            row = existing.get(key)
+            if row is None:
+                size, bucket_start, ttype, status, ccy = key
+                db.add(TxnRollup(
+                    bucket_size=size,
+                    bucket_start=bucket_start,
+                    TRN_TYPE=ttype,
+                    STATUS=status,
+                    TRN_CCY=ccy,
+                    txn_count=cnt,
+                    amount_sum=amount,
+                    bank_charges_sum=charges,
+                    max_txn_id=max_id,
+                ))
+            else:
+                row.txn_count += cnt
+                row.amount_sum = Decimal(str(row.amount_sum)) + amount
+                row.bank_charges_sum = Decimal(str(row.bank_charges_sum)) + charges
+                row.max_txn_id = max(row.max_txn_id, max_id)
+        db.commit()
+
+        folded = sum(int(r[4] or 0) for r in rows)
+        _ROLLUP_HWM = safe
+        logger.info(f"[rollups] folded {folded} txns up to id {_ROLLUP_HWM}")
+        return folded
+
+
+def prune_txn_rollups(db: Session, now: datetime = None) -> int:
+    """
+    Delete rollup rows older than their bucket size's retention.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    deleted = 0
+    for size, keep in ROLLUP_RETENTION.items():
+        if keep is None:
+            continue
+        deleted += (
+            db.query(TxnRollup)
+            .filter(TxnRollup.bucket_size == size, TxnRollup.bucket_start < now - keep)
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    return deleted
+
+
+def get_timeseries(
+    db: Session, range_: str, trn_type: str = None, now: datetime = None, since_bucket: datetime = None
+) -> dict:
+    """
+    Transaction counts, failures and USD amounts per bucket for a range,
+    read from the rollup table only. Empty buckets are filled with zeros.
+    With ``since_bucket`` only buckets starting at or after it are returned
+    (the newest bucket is still filling, so clients re-request it).
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    lookback, size, step = TIMESERIES_RANGES[range_]
+    floor = {"minute": now.replace(second=0, microsecond=0),
+             "hour": now.replace(minute=0, second=0, microsecond=0)}[size]
+    first = floor - lookback + step
+    if since_bucket is not None:
+        if since_bucket.tzinfo is not None:
+            since_bucket = since_bucket.astimezone(timezone.utc).replace(tzinfo=None)
+        first = max(first, since_bucket)
+
+    q = db.query(
+        TxnRollup.bucket_start,
+        TxnRollup.STATUS,
+        TxnRollup.TRN_CCY,
+        func.sum(TxnRollup.txn_count),
+        func.sum(TxnRollup.amount_sum),
+    ).filter(TxnRollup.bucket_size == size, TxnRollup.bucket_start >= first)
+    if trn_type:
+        q = q.filter(TxnRollup.TRN_TYPE == trn_type)
+    rows = q.group_by(TxnRollup.bucket_start, TxnRollup.STATUS, TxnRollup.TRN_CCY).all()
+
+    # one read-only rate lookup for the whole window (no fx_rates writes from a GET)
+    fx = FxWindow(db, first, floor + step)
+    buckets = {}
+    t = first
+    while t <= floor:
+        buckets[t] = {"count": 0, "fail_count": 0, "amount_usd": Decimal("0")}
+        t += step
+    for bucket_start, status, ccy, cnt, amount in rows:
+        b = buckets.get(bucket_start)
+        if b is None:
+            continue
+        b["count"] += int(cnt or 0)
+        if status == "FAILED":
+            b["fail_count"] += int(cnt or 0)
+        b["amount_usd"] += Decimal(str(amount or 0)) * fx.rate(ccy, "USD", bucket_start)
+
+    return {
+        "range": range_,
+        "bucket_size": size,
+        "type": trn_type,
+        "window_buckets": int(lookback / step),
+        "buckets": [
+            {
+                "bucket": start.isoformat(),
+                "count": b["count"],
+                "fail_count": b["fail_count"],
+                "amount_usd": str(b["amount_usd"].quantize(Decimal("0.01"))),
+            }
+            for start, b in buckets.items()
+        ],
+    }
@@ -0,0 +1,80 @@
+"""
+Benchmark: JSON vs Arrow IPC serialization of /transactions and KPI history.
+
+Loads rows from a throwaway SQLite ledger and times each encoding the way
+backend.app serves it (row dicts -> orjson text vs one typed record batch
+-> IPC stream), reporting encode time, payload size and client decode time:
+
+    python benchmarks/bench_arrow_serialization.py --rows 20000 --limit 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import arrow_format, crud  # noqa: E402
+from backend.models import Base, Transaction  # noqa: E402
+from backend.responses import FastJSONResponse  # noqa: E402
+from bench_kpi_aggregation import seed  # noqa: E402
+
+COLS = arrow_format.API_TRANSACTION_COLUMNS
+
+
+def json_transactions(rows) -> bytes:
+    return FastJSONResponse({"transactions": [dict(zip(COLS, r[1:])) for r in rows]}).body
+
+
+def arrow_transactions(rows) -> bytes:
+    batch = arrow_format.rows_to_record_batch([r[1:] for r in rows], arrow_format.api_transaction_schema())
+    return arrow_format.to_ipc_stream(batch)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, args.rows)
+        txns = db.execute(
+            crud.transaction_columns_select(COLS).order_by(Transaction.id.desc()).limit(args.limit)
+        ).all()
+
+        t_json, body_json = timed(lambda: json_transactions(txns), args.repeat)
+        t_arrow, body_arrow = timed(lambda: arrow_transactions(txns), args.repeat)
+        d_json, _ = timed(lambda: json.loads(body_json), args.repeat)
+        d_arrow, table = timed(lambda: pa.ipc.open_stream(body_arrow).read_all(), args.repeat)
+        assert table.num_rows == len(txns)
+
+        print(f"rows={len(txns)}")
+        print(f"{'format':>8} {'encode ms':>10} {'decode ms':>10} {'bytes':>10}")
+        print(f"{'json':>8} {t_json * 1000:>10.2f} {d_json * 1000:>10.2f} {len(body_json):>10}")
+        print(f"{'arrow':>8} {t_arrow * 1000:>10.2f} {d_arrow * 1000:>10.2f} {len(body_arrow):>10}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
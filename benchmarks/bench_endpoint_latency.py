@@ -0,0 +1,78 @@
+"""
+Benchmark: request latency under concurrency for the read endpoints.
+
+Drives one or more running backends with N concurrent clients and reports
+throughput and p50 / p95 / p99 latency per endpoint. To compare the sync
+and async stacks, run the previous build on another port and pass both:
+
+    python benchmarks/bench_endpoint_latency.py --clients 200 --duration 20 \\
+        --target sync=http://127.0.0.1:8001 --target async=http://127.0.0.1:8002
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/transactions?limit=50", "/kpis", "/insights"]
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _client(http, url, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            resp = await http.get(url)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+        except httpx.HTTPError:
+            errors.append(1)
+
+
+async def run_one(base_url, path, clients, duration):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        await http.get(base_url + path)  # warm-up
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            _client(http, base_url + path, deadline, latencies, errors) for _ in range(clients)
+        ])
+    return latencies, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", default=None,
+                        help="label=base_url (repeatable); default local=http://127.0.0.1:8001")
+    parser.add_argument("--path", action="append", default=None, help="endpoint path (repeatable)")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per endpoint")
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in (args.target or ["local=http://127.0.0.1:8001"])]
+    paths = args.path or DEFAULT_PATHS
+
+    print(f"clients={args.clients} duration={args.duration}s")
+    print(f"{'target':>8} {'path':<28} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, base_url in targets:
+        for path in paths:
+            lat, errors = asyncio.run(run_one(base_url.rstrip("/"), path, args.clients, args.duration))
+            ms = [v * 1000 for v in lat]
+            print(
+                f"{label:>8} {path:<28} {len(lat) / args.duration:>8.1f} "
+                f"{statistics.median(ms) if ms else float('nan'):>8.1f} "
+                f"{percentile(ms, 95):>8.1f} {percentile(ms, 99):>8.1f} {errors:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: legacy multi-query KPI aggregation vs the fused single-pass fold.
+
+Runs against a throwaway SQLite file so it needs no MySQL server:
+
+    python benchmarks/bench_kpi_aggregation.py --rows 200000
+
+Reports the number of SQL round trips and the wall time of each path.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event, func, case, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import crud, fx_service  # noqa: E402
+from backend.models import Base, Transaction  # noqa: E402
+
+CUSTOMERS = ["223345", "445566", "786052", "78605200", "BFLUK012025", "SIUAE2025"]
+TYPES = ["TRANSFER", "DEPOSIT", "LOAN_PAYMENT", "BILL_PAYMENT"]
+
+
+def seed(session, rows: int):
+    rng = random.Random(42)
+    start = datetime(2025, 9, 1)
+    batch = []
+    for i in range(rows):
+        ccy = rng.choice(["USD", "RM"])
+        status = "FAILED" if rng.random() < 0.05 else "SUCCESS"
+        amount = Decimal(rng.randint(10, 40000))
+        batch.append({
+            "TRN_REF_NO": f"TRN-BENCH-{i:010d}",
+            "ACCOUNT_NO": "700000000001",
+            "CUSTOMER_ID": rng.choice(CUSTOMERS),
+            "TRN_DATE": start + timedelta(seconds=i),
+            "DRCR_INDICATOR": rng.choice(["DR", "CR"]),
+            "TRN_AMOUNT": amount,
+            "TRN_CCY": ccy,
+            "ACCOUNT_CCY": ccy,
+            "OPENING_BALANCE": Decimal("0"),
+            "CLOSING_BALANCE": Decimal("0"),
+            "RUNNING_BALANCE": Decimal("0"),
+            "TRN_TYPE": rng.choice(TYPES),
+            "BANK_CHARGES": Decimal("5.00") if status == "SUCCESS" else Decimal("0"),
+            "STATUS": status,
+        })
+        if len(batch) == 10000:
+            session.execute(insert(Transaction), batch)
+            batch = []
+    if batch:
+        session.execute(insert(Transaction), batch)
+    session.commit()
+
+
+def legacy_aggregate(db):
+    """The query shape compute_kpis used before the fused fold."""
+    count = lambda *conds: db.query(func.count(Transaction.id)).filter(*conds).scalar()  # noqa: E731
+    count()
+    count(Transaction.DRCR_INDICATOR == "DR")
+    count(Transaction.DRCR_INDICATOR == "CR")
+    count(Transaction.STATUS == "SUCCESS")
+    count(Transaction.STATUS == "FAILED")
+    db.query(
+        func.coalesce(
+            func.sum(case((Transaction.STATUS == "SUCCESS", Transaction.BANK_CHARGES), else_=0)),
+            0,
+        )
+    ).scalar()
+    for amt, ccy in db.query(Transaction.TRN_AMOUNT, Transaction.TRN_CCY).all():
+        pass
+    db.query(
+        Transaction.CUSTOMER_ID,
+        func.count(Transaction.id),
+        func.sum(Transaction.TRN_AMOUNT),
+        Transaction.TRN_CCY,
+    ).group_by(Transaction.CUSTOMER_ID, Transaction.TRN_CCY).all()
+    db.query(
+        Transaction.TRN_TYPE,
+        func.count(Transaction.id),
+        func.sum(Transaction.TRN_AMOUNT),
+        func.sum(case((Transaction.STATUS == "FAILED", 1), else_=0)),
+    ).group_by(Transaction.TRN_TYPE).all()
+
+
+def fused_aggregate(db):
+    crud._kpis_from_state(crud._fold_transactions(db, crud._empty_kpi_state()), db)
+
+
+def measure(engine, session, fn, repeat: int):
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(session)
+        elapsed = (time.perf_counter() - t0) / repeat
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements) // repeat, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        seed(session, args.rows)
+        # Warm the FX cache so only the aggregation itself is measured
+        fx_service.get_usd_rates(db=session)
+
+        print(f"rows={args.rows}")
+        for name, fn in (("legacy", legacy_aggregate), ("fused", fused_aggregate)):
+            trips, elapsed = measure(engine, session, fn, args.repeat)
+            print(f"{name:>8}: round_trips={trips:3d}  wall={elapsed * 1000:9.1f} ms")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
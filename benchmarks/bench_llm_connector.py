@@ -0,0 +1,76 @@
+"""
+Benchmark: per-call overhead of the LLM connector backends.
+
+Runs the same prompt against the local Ollama stub (utils/ollama_stub.py,
+zero model time by default) so only connector cost is measured:
+
+  subprocess   one `ollama run`-like process per prompt (the stub's --cli mode)
+  http-fresh   one HTTP request on a new connection per prompt
+  http-pooled  run_llm over the shared keep-alive client
+  http-stream  run_llm(stream=True) over the shared client
+
+    python benchmarks/bench_llm_connector.py --calls 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import llm_connector  # noqa: E402
+from utils.ollama_stub import start_stub  # noqa: E402
+
+PROMPT = "KPI DATA:\n" + "{'total_transactions': 120, 'failure_rate': 0.12}\n" * 40
+
+
+def timed(fn, calls):
+    fn()  # warm-up
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append(time.perf_counter() - t0)
+        assert out, "empty LLM response"
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--subprocess-calls", type=int, default=20, help="process spawns are slow")
+    args = parser.parse_args()
+
+    server, url = start_stub()
+    llm_connector.OLLAMA_URL = url
+    llm_connector.close_client()
+    llm_connector.LLM_COMMAND = f'"{sys.executable}" -m utils.ollama_stub --cli'
+    os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+    def fresh():
+        body = llm_connector._generate_body(PROMPT, llm_connector.LLM_MODEL, False, None)
+        with httpx.Client(base_url=url) as http:
+            return http.post("/api/generate", json=body).json()["response"]
+
+    cases = {
+        "subprocess": (lambda: llm_connector.run_llm(PROMPT, backend="subprocess"), args.subprocess_calls),
+        "http-fresh": (fresh, args.calls),
+        "http-pooled": (lambda: llm_connector.run_llm(PROMPT, backend="http"), args.calls),
+        "http-stream": (lambda: llm_connector.run_llm(PROMPT, backend="http", stream=True), args.calls),
+    }
+    print(f"{'backend':<12} {'calls':>6} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, (fn, calls) in cases.items():
+        samples = sorted(timed(fn, calls))
+        p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+        print(f"{label:<12} {calls:>6} {statistics.mean(samples) * 1000:>9.2f} "
+              f"{statistics.median(samples) * 1000:>8.2f} {p95 * 1000:>8.2f}")
+
+    llm_connector.close_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: OFFSET pagination vs keyset (cursor) pagination for /transactions.
+
+Builds a throwaway SQLite ledger and times the page query used by
+backend.app.get_transactions at increasing page depths:
+
+    python benchmarks/bench_transactions_pagination.py --rows 600000 --limit 50
+
+Keyset latency should stay flat while OFFSET grows with the page number.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import crud  # noqa: E402
+from backend.models import Base, Transaction  # noqa: E402
+from bench_kpi_aggregation import seed  # noqa: E402
+
+
+def offset_page(db, page, limit, status):
+    q = crud.filter_transactions(db.query(Transaction), status=status)
+    return q.order_by(Transaction.id.desc()).offset((page - 1) * limit).limit(limit).all()
+
+
+def keyset_page(db, last_id, limit, status):
+    q = crud.filter_transactions(db.query(Transaction), status=status)
+    if last_id is not None:
+        q = q.filter(Transaction.id < last_id)
+    return q.order_by(Transaction.id.desc()).limit(limit).all()
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=600000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--status", default=None, help="optional STATUS filter")
+    args = parser.parse_args()
+
+    pages = [p for p in (1, 10, 100, 1000, 10000) if (p - 1) * args.limit < args.rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, args.rows)
+
+        # Cursors a client would hold when arriving at each page
+        ids = [
+            r[0]
+            for r in crud.filter_transactions(db.query(Transaction.id), status=args.status)
+            .order_by(Transaction.id.desc())
+            .all()
+        ]
+        print(f"rows={args.rows} limit={args.limit} status={args.status}")
+        print(f"{'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+        for page in pages:
+            start = (page - 1) * args.limit
+            last_id = ids[start - 1] if start else None
+            t_off, rows_off = timed(lambda: offset_page(db, page, args.limit, args.status), args.repeat)
+            t_key, rows_key = timed(lambda: keyset_page(db, last_id, args.limit, args.status), args.repeat)
+            assert [r.id for r in rows_off] == [r.id for r in rows_key]
+            print(f"{page:>6} {t_off * 1000:>10.2f} {t_key * 1000:>10.2f}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
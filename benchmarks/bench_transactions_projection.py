@@ -0,0 +1,111 @@
+"""
+Benchmark: /transactions page building, ORM entities + per-row dicts vs
+projected row tuples + orjson (FastJSONResponse).
+
+Times query + row building + serialization for one page on a throwaway
+SQLite ledger, the way each version of backend.app.get_transactions does it:
+
+    python benchmarks/bench_transactions_projection.py --rows 20000 --limit 1000
+    python benchmarks/bench_transactions_projection.py --fields TRN_REF_NO,TRN_AMOUNT,STATUS
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import crud  # noqa: E402
+from backend.models import Base, Transaction  # noqa: E402
+from backend.responses import FastJSONResponse  # noqa: E402
+from bench_kpi_aggregation import seed  # noqa: E402
+
+
+def legacy_page(db, limit) -> bytes:
+    txns = db.query(Transaction).order_by(Transaction.id.desc()).limit(limit).all()
+    result = [
+        {
+            "TRN_REF_NO": t.TRN_REF_NO,
+            "ACCOUNT_NO": t.ACCOUNT_NO,
+            "CUSTOMER_ID": t.CUSTOMER_ID,
+            "TRN_DATE": t.TRN_DATE.isoformat() if t.TRN_DATE else None,
+            "TRN_DESC": t.TRN_DESC,
+            "DRCR_INDICATOR": t.DRCR_INDICATOR,
+            "TRN_AMOUNT": str(t.TRN_AMOUNT),
+            "TRN_CCY": t.TRN_CCY,
+            "ACCOUNT_CCY": t.ACCOUNT_CCY,
+            "OPENING_BALANCE": str(t.OPENING_BALANCE),
+            "CLOSING_BALANCE": str(t.CLOSING_BALANCE),
+            "RUNNING_BALANCE": str(t.RUNNING_BALANCE),
+            "CREDIT_ACCOUNT": t.CREDIT_ACCOUNT,
+            "CREDIT_ACCOUNT_CCY": t.CREDIT_ACCOUNT_CCY,
+            "TRN_TYPE": t.TRN_TYPE,
+            "STATUS": t.STATUS,
+            "BANK_CHARGES": str(t.BANK_CHARGES),
+        }
+        for t in txns
+    ]
+    db.expunge_all()
+    # FastAPI runs returned dicts through jsonable_encoder, then json.dumps
+    content = jsonable_encoder({"page": 1, "limit": limit, "next_cursor": None, "transactions": result})
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def projected_page(db, limit, cols) -> bytes:
+    stmt = crud.transaction_columns_select(cols).order_by(Transaction.id.desc()).limit(limit)
+    rows = db.execute(stmt).all()
+    return FastJSONResponse({
+        "page": 1,
+        "limit": limit,
+        "next_cursor": None,
+        "transactions": [dict(zip(cols, r[1:])) for r in rows],
+    }).body
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--fields", default=None, help="optional fields= projection")
+    args = parser.parse_args()
+    cols = crud.parse_fields(args.fields)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, args.rows)
+        db.expunge_all()
+
+        t_legacy, body_legacy = timed(lambda: legacy_page(db, args.limit), args.repeat)
+        t_proj, body_proj = timed(lambda: projected_page(db, args.limit, cols), args.repeat)
+        if args.fields is None:
+            assert json.loads(body_legacy) == json.loads(body_proj)
+
+        print(f"limit={args.limit} fields={args.fields or 'all'}")
+        print(f"{'path':>10} {'ms/page':>9} {'pages/s':>9} {'bytes':>9}")
+        print(f"{'legacy':>10} {t_legacy * 1000:>9.2f} {1 / t_legacy:>9.1f} {len(body_legacy):>9}")
+        print(f"{'projected':>10} {t_proj * 1000:>9.2f} {1 / t_proj:>9.1f} {len(body_proj):>9}")
+        print(f"speedup: {t_legacy / t_proj:.1f}x")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Deterministic historical backfill for the transactions ledger.
+
+    python ./data/backfill.py --start 2025-06-01 --end 2025-09-01 --per-day 200000 --seed 42
+    python -m data.backfill ...   # same, from the repository root
+
+The same seed and starting accounts always produce the same rows. Volume
+follows a diurnal curve (quiet nights, late-morning and mid-afternoon
+peaks, lighter weekends). Each account's running balance chains through
+the whole range with the generator's balance / failure rules, starting
+from the current account balances, and the final balances are written
+back to ``accounts``. Because the chain starts from today's balances, the
+range must lie after every existing transaction: history behind live
+rows would not end at their opening balances and is refused.
+
+On MySQL the rows are written to CSV files and bulk-loaded with
+LOAD DATA LOCAL INFILE; other databases get large batched inserts.
+``--csv-dir`` only writes the files, from the default accounts and the
+reference FX rates, without touching (or needing) a database.
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import bindparam, create_engine, func, insert, update
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.archive_service import add_months
+from backend.database import DATABASE_URL, SessionLocal
+from backend.fx_service import bucket_start, get_fx_rate, reference_fx_rate
+from backend.models import Account, Transaction, TxnArchive
+from data.generator import ACCOUNT_CURRENCIES, TARGET_CUSTOMERS, synthesize_txn
+from utils.logger import get_logger
+
+logger = get_logger("backfill")
+
+# ------------------------
+# Config
+# ------------------------
+# Relative transaction volume per hour of day (00:00 .. 23:00)
+HOURLY_WEIGHTS = [
+    0.15, 0.10, 0.08, 0.08, 0.10, 0.20, 0.45, 0.90,
+    1.50, 2.10, 2.40, 2.50, 2.00, 1.90, 2.30, 2.40,
+    2.10, 1.60, 1.10, 0.80, 0.60, 0.45, 0.30, 0.20,
+]
+WEEKEND_FACTOR = 0.35
+# Rows per CSV file / LOAD DATA statement, and per executemany batch
+LOAD_CHUNK_ROWS = 1_000_000
+INSERT_BATCH_ROWS = 20_000
+
+BACKFILL_COLUMNS = [
+    "TRN_REF_NO", "ACCOUNT_NO", "CUSTOMER_ID", "TRN_DATE", "TRN_DESC",
+    "DRCR_INDICATOR", "TRN_AMOUNT", "TRN_CCY", "ACCOUNT_CCY", "OPENING_BALANCE",
+    "CLOSING_BALANCE", "RUNNING_BALANCE", "TRN_TYPE", "BANK_CHARGES", "STATUS",
+    "CREDIT_ACCOUNT", "CREDIT_ACCOUNT_CCY", "CREATED_AT",
+]
+
+
+# ------------------------
+# Synthesis
+# ------------------------
+def day_volume(day: datetime, per_day: int) -> int:
+    """
+    Rows for one calendar day; ``per_day`` is the weekday volume.
+    """
+    return round(per_day * (WEEKEND_FACTOR if day.weekday() >= 5 else 1.0))
+
+
+def iter_timestamps(start: datetime, end: datetime, per_day: int, rng: random.Random):
+    """
+    Ascending transaction timestamps in [start, end), whole seconds.
+    """
+    total_weight = sum(HOURLY_WEIGHTS)
+    day = datetime(start.year, start.month, start.day)
+    while day < end:
+        n = day_volume(day, per_day)
+        for hour, weight in enumerate(HOURLY_WEIGHTS):
+            hour_start = day + timedelta(hours=hour)
+            expected = n * weight / total_weight
+            count = int(expected) + (rng.random() < expected - int(expected))
+            for offset in sorted(rng.randrange(3600) for _ in range(count)):
+                ts = hour_start + timedelta(seconds=offset)
+                if start <= ts < end:
+                    yield ts
+        day += timedelta(days=1)
+
+
+def default_accounts(rng: random.Random) -> list:
+    """
+    Deterministic account set (same customers / currencies as the generator).
+    """
+    accounts = []
+    for cust in TARGET_CUSTOMERS:
+        for ccy in ACCOUNT_CURRENCIES:
+            suffix = "1" if ccy == "USD" else "2"
+            high = 35000 if ccy == "USD" else 15000
+            accounts.append({
+                "ACCOUNT_NO": f"7{zlib.crc32(cust.encode()):010d}{suffix}"[:12],
+                "CUSTOMER_ID": cust,
+                "ACCOUNT_CCY": ccy,
+                "BALANCE": Decimal(rng.randint(80, high)),
+            })
+    return accounts
+
+
+def load_accounts(db: Session) -> list:
+    return [
+        {
+            "id": a.id,
+            "ACCOUNT_NO": a.ACCOUNT_NO,
+            "CUSTOMER_ID": a.CUSTOMER_ID,
+            "ACCOUNT_CCY": a.ACCOUNT_CCY,
+            "BALANCE": a.BALANCE,
+        }
+        for a in db.query(Account).order_by(Account.ACCOUNT_NO)
+    ]
+
+
+def seed_accounts(db: Session, rng: random.Random) -> list:
+    """
+    Account cache for the backfill. An empty ``accounts`` table is filled
+    with default_accounts so that a seed fully determines the output.
+    """
+    if not db.query(Account).first():
+        db.add_all([Account(**a) for a in default_accounts(rng)])
+        db.commit()
+    return load_accounts(db)
+
+
+def iter_rows(db, accounts: list, start: datetime, end: datetime, per_day: int, rng: random.Random):
+    """
+    Synthetic transaction rows (dicts keyed like BACKFILL_COLUMNS) in
+    time order. Mutates the cached account balances as it goes. With
+    ``db=None`` FX rates come from reference_fx_rate (no database access).
+    """
+    rates = {}
+
+    def fx_at(ts):
+        def fx(base, quote):
+            key = (base, quote, bucket_start(ts))
+            if key not in rates:
+                if db is None:
+                    rates[key] = reference_fx_rate(base, quote, at=ts)
+                else:
+                    rates[key] = get_fx_rate(base, quote, at=ts, db=db)
+            return rates[key]
+        return fx
+
+    for ts in iter_timestamps(start, end, per_day, rng):
+        yield synthesize_txn(rng.choice(accounts), ts, rng, fx_at(ts))
+
+
+# ------------------------
+# Loading
+# ------------------------
+def _csv_value(v):
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d %H:%M:%S")
+    return v
+
+
+def write_csv_chunks(rows, directory: str, chunk_rows: int = LOAD_CHUNK_ROWS):
+    """
+    Write rows to numbered CSV files of up to ``chunk_rows`` rows each;
+    yields (path, row_count) as each file is closed.
+    """
+    part, f, writer, count = 0, None, None, 0
+    for row in rows:
+        if writer is None:
+            path = os.path.join(directory, f"transactions_{part:05d}.csv")
+            f = open(path, "w", newline="")
+            writer = csv.writer(f)
+        writer.writerow([_csv_value(row[c]) for c in BACKFILL_COLUMNS])
+        count += 1
+        if count == chunk_rows:
+            f.close()
+            yield path, count
+            part, f, writer, count = part + 1, None, None, 0
+    if writer is not None:
+        f.close()
+        yield path, count
+
+
+def _write_balances(conn, accounts: list, before: dict):
+    changed = [
+        {"b_id": a["id"], "b_balance": a["BALANCE"]}
+        for a in accounts
+        if a["BALANCE"] != before[a["id"]]
+    ]
+    if changed:
+        table = Account.__table__
+        conn.execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(BALANCE=bindparam("b_balance")),
+            changed,
+        )
+
+
+def _load_data_infile(rows, accounts: list, before: dict) -> int:
+    # One transaction for all files plus the balance update, so a failed
+    # load leaves neither rows nor balances behind
+    loader = create_engine(DATABASE_URL, connect_args={"allow_local_infile": True})
+    columns = ", ".join(BACKFILL_COLUMNS)
+    total = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp, loader.begin() as conn:
+            for path, count in write_csv_chunks(rows, tmp):
+                # MySQL reads backslashes in the literal as escapes; it
+                # accepts forward slashes on Windows too
+                literal = path.replace("\\", "/").replace("'", "''")
+                conn.exec_driver_sql(
+                    f"LOAD DATA LOCAL INFILE '{literal}' INTO TABLE transactions "
+                    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                    f"LINES TERMINATED BY '\\r\\n' ({columns})"
+                )
+                total += count
+                os.remove(path)
+                logger.info(f"[backfill] loaded {total} rows")
+            _write_balances(conn, accounts, before)
+    finally:
+        loader.dispose()
+    return total
+
+
+def _insert_batches(db: Session, rows, batch_rows: int = INSERT_BATCH_ROWS) -> int:
+    total, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_rows:
+            db.execute(insert(Transaction.__table__), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(Transaction.__table__), batch)
+        total += len(batch)
+    return total
+
+
+def check_range(db: Session, start: datetime, end: datetime):
+    """
+    The target range [start, end) must not hold any hot or archived rows
+    and must lie after every existing transaction (the balance chain starts
+    from the current account balances).
+    """
+    if end <= start:
+        raise ValueError("end must be after start")
+    existing = (
+        db.query(func.min(Transaction.TRN_DATE))
+        .filter(Transaction.TRN_DATE >= start, Transaction.TRN_DATE < end)
+        .scalar()
+    )
+    if existing:
+        raise ValueError(f"range {start} .. {end} already has transactions (first at {existing})")
+    for (month,) in db.query(TxnArchive.month_start).filter(TxnArchive.month_start < end):
+        if start < add_months(month, 1):
+            raise ValueError(f"range {start} .. {end} overlaps archived month {month:%Y-%m}")
+    later = db.query(func.min(Transaction.TRN_DATE)).filter(Transaction.TRN_DATE >= end).scalar()
+    if later:
+        raise ValueError(
+            f"range {start} .. {end} lies behind existing transactions (from {later}); "
+            "its balances would not chain into them"
+        )
+
+
+def backfill(db: Session, start: datetime, end: datetime, per_day: int, seed: int = 42) -> int:
+    """
+    Synthesize and load [start, end) into the ledger, then write the final
+    account balances. Returns the number of rows loaded.
+    """
+    check_range(db, start, end)
+    rng = random.Random(seed)
+    accounts = seed_accounts(db, rng)
+    before = {a["id"]: a["BALANCE"] for a in accounts}
+    rows = iter_rows(db, accounts, start, end, per_day, rng)
+
+    t0 = time.monotonic()
+    if db.get_bind().dialect.name == "mysql":
+        total = _load_data_infile(rows, accounts, before)
+    else:
+        total = _insert_batches(db, rows)
+        _write_balances(db, accounts, before)
+        db.commit()
+
+    elapsed = time.monotonic() - t0
+    logger.info(f"[backfill] {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9) * 60:,.0f} rows/min)")
+    return total
+
+
+def write_csv_backfill(directory: str, start: datetime, end: datetime, per_day: int, seed: int = 42) -> int:
+    """
+    Write the rows a backfill into an empty database would load as CSV
+    files in ``directory``, without a database. Returns the row count.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    # seed_accounts reads them back in ACCOUNT_NO order
+    accounts = sorted(default_accounts(rng), key=lambda a: a["ACCOUNT_NO"])
+    t0 = time.monotonic()
+    rows = iter_rows(None, accounts, start, end, per_day, rng)
+    total = sum(count for _, count in write_csv_chunks(rows, directory))
+    elapsed = time.monotonic() - t0
+    logger.info(f"[backfill] wrote {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9) * 60:,.0f} rows/min)")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic historical backfill")
+    parser.add_argument("--start", type=datetime.fromisoformat, required=True)
+    parser.add_argument("--end", type=datetime.fromisoformat, required=True)
+    parser.add_argument("--per-day", type=int, default=100_000, help="weekday transaction volume")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv-dir", default=None,
+                        help="only write CSV files here (no database writes)")
+    args = parser.parse_args()
+
+    if args.csv_dir:
+        write_csv_backfill(args.csv_dir, args.start, args.end, args.per_day, args.seed)
+    else:
+        with SessionLocal() as db:
+            backfill(db, args.start, args.end, args.per_day, args.seed)
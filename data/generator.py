@@ -1,17 +1,19 @@
+import argparse
+import multiprocessing
 import os
 import random
 import time
-import uuid
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP
 import sys
-from sqlalchemy import func
+from sqlalchemy import func, insert, update
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from backend.database import SessionLocal
 from backend.models import Account, Transaction
+from backend.fx_service import get_fx_rate
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -43,20 +45,6 @@ ACCOUNT_CURRENCIES = ["USD", "RM"]
 TXN_CURRENCIES = ["USD", "RM"]
 
 
-# Realistic USD?RM conversion (center ~4.23, mild jitter)
-def get_fx_rate(base: str, quote: str) -> Decimal:
-    if base == quote:
-        return Decimal("1.0")
-    mid = 4.23
-    jitter = random.uniform(-0.05, 0.05) 
-    usdrm = Decimal(str(mid + jitter)).quantize(Decimal("0.0001"))
-    if base == "USD" and quote == "RM":
-        return usdrm
-    if base == "RM" and quote == "USD":
-        return (Decimal("1.0") / usdrm).quantize(Decimal("0.0001"))
-    return Decimal("1.0")
-
-
 DESCS = [
     "Treasury Settlement",
     "Trade Finance Payment",
@@ -107,52 +95,70 @@ def quant2(v: Decimal) -> Decimal:
     return v.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-def generate_one(db: Session):
-    account = db.query(Account).order_by(func.rand()).first()
-    if not account:
-        return
+class StaleBalanceError(RuntimeError):
+    """An account balance changed underneath this writer."""
 
-    account_no = account.ACCOUNT_NO
-    customer_id = account.CUSTOMER_ID
-    account_ccy = account.ACCOUNT_CCY
-    opening_balance = account.BALANCE
+
+def apply_balance(db: Session, account_id: int, old: Decimal, new: Decimal):
+    """
+    Optimistic balance write: only succeeds if the stored balance is still
+    ``old``, so two writers can never silently overwrite each other.
+    """
+    result = db.execute(
+        update(Account)
+        .where(Account.id == account_id, Account.BALANCE == old)
+        .values(BALANCE=new)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise StaleBalanceError(f"balance of account {account_id} changed concurrently")
+
+
+def synthesize_txn(acct: dict, now: datetime, rng=random, fx=None) -> dict:
+    """
+    Column values for one synthetic transaction against ``acct`` (a dict with
+    ACCOUNT_NO, CUSTOMER_ID, ACCOUNT_CCY and BALANCE). A successful txn moves
+    acct["BALANCE"] to its closing balance; a failed one leaves it unchanged.
+    ``fx(base, quote)`` converts when the txn currency differs from the account's.
+    """
+    account_ccy = acct["ACCOUNT_CCY"]
+    opening_balance = acct["BALANCE"]
 
     # Adjusted realistic transaction ranges
     if account_ccy == "USD":
-        amt = Decimal(str(random.randint(10, 10000)))
+        amt = Decimal(str(rng.randint(10, 10000)))
         trn_ccy = "USD"
     else:
-        amt = Decimal(str(random.randint(40, 40000)))
+        amt = Decimal(str(rng.randint(40, 40000)))
         trn_ccy = "RM"
 
     # Debit / Credit ratio
-    drcr = random.choices(["CR", "DR"], weights=[55, 45], k=1)[0]
+    drcr = rng.choices(["CR", "DR"], weights=[55, 45], k=1)[0]
 
     # Convert to account currency if needed
     if trn_ccy == account_ccy:
         amt_in_account_ccy = amt
     else:
-        rate = get_fx_rate(trn_ccy, account_ccy)
+        rate = fx(trn_ccy, account_ccy)
         amt_in_account_ccy = (amt * rate).quantize(Decimal("0.01"))
 
     # Assign transaction type with weighted probabilities
-    trn_type = random.choices(
+    trn_type = rng.choices(
         ["TRANSFER", "DEPOSIT", "LOAN_PAYMENT", "BILL_PAYMENT"],
         weights=[40, 20, 10, 30],
         k=1
     )[0]
 
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
-    trn_ref = f"TRN-{uuid.uuid4().hex[:20].upper()}"
-    trn_desc = random.choice(DESCS)
-    credit_acct = random.choice(COUNTERPARTIES)
-    credit_ccy = random.choice(["USD", "RM"])
+    trn_ref = f"TRN-{rng.getrandbits(80):020X}"
+    trn_desc = rng.choice(DESCS)
+    credit_acct = rng.choice(COUNTERPARTIES)
+    credit_ccy = rng.choice(["USD", "RM"])
 
     # --- Failure check ---
     status = "SUCCESS"
     if drcr == "DR" and opening_balance < amt_in_account_ccy:
         status = "FAILED"
-    elif random.random() < 0.02:  # 2% random failure
+    elif rng.random() < 0.02:  # 2% random failure
         status = "FAILED"
 
     # Calculate balances if success
@@ -171,50 +177,213 @@ def generate_one(db: Session):
     bank_charges = Decimal("0.00")
     if status == "SUCCESS":
         if trn_type == "TRANSFER":
-            bank_charges = quant2(min(max(amt_in_account_ccy * Decimal("0.002"), 2), 200))
+            bank_charges = quant2(min(max(amt_in_account_ccy * Decimal("0.002"), Decimal("2")), Decimal("200")))
         elif trn_type == "LOAN_PAYMENT":
             bank_charges = Decimal("10.00")
         elif trn_type == "BILL_PAYMENT":
             bank_charges = Decimal("5.00")
 
-    # Build transaction
-    transaction = Transaction(
-        TRN_REF_NO=trn_ref,
-        ACCOUNT_NO=account_no,
-        CUSTOMER_ID=customer_id,
-        TRN_DATE=now,
-        TRN_DESC=trn_desc,
-        DRCR_INDICATOR=drcr,
-        TRN_AMOUNT=quant2(amt),
-        TRN_CCY=trn_ccy,
-        ACCOUNT_CCY=account_ccy,
-        OPENING_BALANCE=quant2(opening_balance),
-        CLOSING_BALANCE=quant2(closing_balance),
-        RUNNING_BALANCE=quant2(running_balance),
-        TRN_TYPE=trn_type,
-        BANK_CHARGES=quant2(bank_charges),
-        STATUS=status,
-        CREDIT_ACCOUNT=credit_acct,
-        CREDIT_ACCOUNT_CCY=credit_ccy,
-        CREATED_AT=now,
-    )
-    logger.info(f"Generated txn: amt={amt} {trn_ccy}, acct_ccy={account_ccy}, amt_in_account_ccy={amt_in_account_ccy}, balance before={opening_balance}, status={status}")
+    if status == "SUCCESS":
+        acct["BALANCE"] = closing_balance
+
+    return {
+        "TRN_REF_NO": trn_ref,
+        "ACCOUNT_NO": acct["ACCOUNT_NO"],
+        "CUSTOMER_ID": acct["CUSTOMER_ID"],
+        "TRN_DATE": now,
+        "TRN_DESC": trn_desc,
+        "DRCR_INDICATOR": drcr,
+        "TRN_AMOUNT": quant2(amt),
+        "TRN_CCY": trn_ccy,
+        "ACCOUNT_CCY": account_ccy,
+        "OPENING_BALANCE": quant2(opening_balance),
+        "CLOSING_BALANCE": quant2(closing_balance),
+        "RUNNING_BALANCE": quant2(running_balance),
+        "TRN_TYPE": trn_type,
+        "BANK_CHARGES": quant2(bank_charges),
+        "STATUS": status,
+        "CREDIT_ACCOUNT": credit_acct,
+        "CREDIT_ACCOUNT_CCY": credit_ccy,
+        "CREATED_AT": now,
+    }
 
-    db.add(transaction)
 
-    # Update account balance if success
-    if status == "SUCCESS":
-        account.BALANCE = closing_balance
-        account.UPDATED_AT = datetime.now(timezone.utc).replace(tzinfo=None)
+def generate_one(db: Session):
+    account = db.query(Account).order_by(func.rand()).first()
+    if not account:
+        return
+
+    acct = {
+        "ACCOUNT_NO": account.ACCOUNT_NO,
+        "CUSTOMER_ID": account.CUSTOMER_ID,
+        "ACCOUNT_CCY": account.ACCOUNT_CCY,
+        "BALANCE": account.BALANCE,
+    }
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    values = synthesize_txn(acct, now, fx=lambda base, quote: get_fx_rate(base, quote, db=db))
+    logger.info(f"Generated txn: amt={values['TRN_AMOUNT']} {values['TRN_CCY']}, acct_ccy={values['ACCOUNT_CCY']}, balance before={values['OPENING_BALANCE']}, status={values['STATUS']}")
+
+    db.add(Transaction(**values))
 
     try:
+        # Update account balance if success
+        if values["STATUS"] == "SUCCESS":
+            apply_balance(db, account.id, account.BALANCE, acct["BALANCE"])
         db.commit()
+    except StaleBalanceError as e:
+        db.rollback()
+        logger.warning(f"[generator] {e}; transaction discarded")
     except SQLAlchemyError as e:
         db.rollback()
         raise e
 
 
-if __name__ == "__main__":
+# ------------------------
+# Batch / load mode
+# ------------------------
+def load_accounts(db: Session, shard: tuple = None) -> list:
+    """
+    In-memory account cache for batch mode. Balances are tracked here and
+    written back once per batch. ``shard=(index, count)`` restricts the
+    cache to accounts with ``id % count == index``, so parallel workers
+    own disjoint accounts.
+    """
+    q = db.query(Account)
+    if shard:
+        q = q.filter(Account.id % shard[1] == shard[0])
+    return [
+        {
+            "id": a.id,
+            "ACCOUNT_NO": a.ACCOUNT_NO,
+            "CUSTOMER_ID": a.CUSTOMER_ID,
+            "ACCOUNT_CCY": a.ACCOUNT_CCY,
+            "BALANCE": a.BALANCE,
+        }
+        for a in q.order_by(Account.id)
+    ]
+
+
+def generate_batch(db: Session, accounts: list, size: int, rng=random) -> int:
+    """
+    Generate ``size`` transactions against cached ``accounts`` and write them
+    with one multi-row insert, guarded balance updates and one commit.
+    Raises StaleBalanceError (nothing written) if another writer moved a
+    balance; reload the cache and carry on.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rates = {}
+
+    def fx(base, quote):
+        if (base, quote) not in rates:
+            rates[(base, quote)] = get_fx_rate(base, quote, at=now, db=db)
+        return rates[(base, quote)]
+
+    before = {a["id"]: a["BALANCE"] for a in accounts}
+    rows = [synthesize_txn(rng.choice(accounts), now, rng, fx) for _ in range(size)]
+
+    try:
+        # executemany: the MySQL driver collapses this into multi-row INSERTs
+        db.execute(insert(Transaction.__table__), rows)
+        for a in accounts:
+            if a["BALANCE"] != before[a["id"]]:
+                apply_balance(db, a["id"], before[a["id"]], a["BALANCE"])
+        db.commit()
+    except (SQLAlchemyError, StaleBalanceError) as e:
+        db.rollback()
+        for a in accounts:
+            a["BALANCE"] = before[a["id"]]
+        raise e
+    return len(rows)
+
+
+def parse_rate(value: str) -> float:
+    """
+    ``--rate`` value: transactions per second, as "500" or "500/s".
+    """
+    rate = float(value[:-2] if value.endswith("/s") else value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError("rate must be positive")
+    return rate
+
+
+def run_batch_mode(rate: float = None, batch_size: int = None, shard: tuple = None):
+    """
+    Generate continuously in batches, paced to ``rate`` txns/s (unpaced if None).
+    """
+    if batch_size is None:
+        batch_size = max(1, min(500, int(rate))) if rate else 500
+    interval = batch_size / rate if rate else 0.0
+    name = f"worker {shard[0]}/{shard[1]}" if shard else "generator"
+
+    with SessionLocal() as db:
+        if shard is None:
+            ensure_accounts(db)
+        accounts = load_accounts(db, shard)
+        if not accounts:
+            logger.warning(f"[{name}] No accounts in shard; exiting")
+            return
+        logger.info(f"[{name}] Batch mode: {len(accounts)} accounts, batch={batch_size}, rate={rate or 'max'}/s")
+        next_at = time.monotonic()
+        while True:
+            t0 = time.monotonic()
+            try:
+                written = generate_batch(db, accounts, batch_size)
+            except StaleBalanceError as e:
+                logger.warning(f"[{name}] {e}; reloading account cache")
+                accounts = load_accounts(db, shard)
+                continue
+            elapsed = time.monotonic() - t0
+            logger.info(f"[{name}] Wrote {written} txns in {elapsed * 1000:.0f} ms")
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_at = time.monotonic()  # behind schedule; don't burst to catch up
+
+
+def _worker_main(rate, batch_size, shard):
+    try:
+        run_batch_mode(rate, batch_size, shard)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(workers: int, rate: float = None, batch_size: int = None):
+    """
+    Run ``workers`` batch-mode processes, each owning a disjoint account
+    shard, so balances never race and throughput scales with cores.
+    ``rate`` is the aggregate target, split evenly between workers.
+    """
+    with SessionLocal() as db:
+        ensure_accounts(db)
+        n_accounts = db.query(Account).count()
+    if workers > n_accounts:
+        logger.warning(f"[generator] Only {n_accounts} accounts; using {n_accounts} workers")
+        workers = n_accounts
+
+    ctx = multiprocessing.get_context("spawn")  # fresh engine / pool per worker
+    procs = [
+        ctx.Process(
+            target=_worker_main,
+            args=(rate / workers if rate else None, batch_size, (i, workers)),
+            name=f"generator-{i}",
+        )
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+            p.join()
+        logger.info("Generator stopped.")
+
+
+def run_stream_mode():
     while True:
         db = SessionLocal()
         try:
@@ -232,3 +401,24 @@ if __name__ == "__main__":
             time.sleep(1.0)
         finally:
             db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic transaction generator")
+    parser.add_argument("--rate", type=parse_rate, default=None,
+                        help="batch mode: target transactions per second, e.g. 500/s")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="batch mode: transactions per insert/commit (default: ~1s of --rate, max 500)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="batch mode: processes, each owning a disjoint account shard")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_workers(args.workers, args.rate, args.batch_size)
+    elif args.rate is None and args.batch_size is None:
+        run_stream_mode()
+    else:
+        try:
+            run_batch_mode(args.rate, args.batch_size)
+        except KeyboardInterrupt:
+            logger.info("Generator stopped.")
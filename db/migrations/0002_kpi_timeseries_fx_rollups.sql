@@ -0,0 +1,37 @@
+-- 0002: persisted KPI breakdowns + time-series tiers, FX rate store, txn rollups
+ALTER TABLE kpis
+    ADD COLUMN resolution VARCHAR(8) NOT NULL DEFAULT 'raw' AFTER computed_at,
+    ADD COLUMN txn_type_split JSON NULL,
+    ADD KEY idx_kpis_resolution_computed_at (resolution, computed_at);
+
+CREATE TABLE
+    IF NOT EXISTS fx_rates (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        bucket_start DATETIME NOT NULL,
+        base_ccy VARCHAR(3) NOT NULL,
+        quote_ccy VARCHAR(3) NOT NULL,
+        rate DECIMAL(18, 8) NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_fx_bucket_pair (bucket_start, base_ccy, quote_ccy)
+    ) ENGINE = InnoDB;
+
+CREATE TABLE
+    IF NOT EXISTS txn_rollups (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        bucket_size ENUM ('minute', 'hour') NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        TRN_TYPE ENUM (
+            'TRANSFER',
+            'DEPOSIT',
+            'LOAN_PAYMENT',
+            'BILL_PAYMENT'
+        ) NOT NULL,
+        STATUS ENUM ('SUCCESS', 'FAILED') NOT NULL,
+        TRN_CCY VARCHAR(3) NOT NULL,
+        txn_count INT NOT NULL DEFAULT 0,
+        amount_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        bank_charges_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        max_txn_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_txn_rollup_key (bucket_size, bucket_start, TRN_TYPE, STATUS, TRN_CCY)
+    ) ENGINE = InnoDB;
@@ -0,0 +1,11 @@
+-- 0003: composite indexes for the transaction access paths
+--   /transactions?type=&status=   equality filters + ORDER BY id DESC LIMIT n
+--   /transactions?since=          TRN_DATE range
+--   bank charges report           TRN_DATE range, GROUP BY type/ccy, SUM amount/charges (covering)
+--   failure timeline report       STATUS = 'FAILED' + TRN_DATE range
+ALTER TABLE transactions
+    ADD KEY idx_trn_type_status_id (TRN_TYPE, STATUS, id),
+    ADD KEY idx_trn_type_id (TRN_TYPE, id),
+    ADD KEY idx_trn_status_id (STATUS, id),
+    ADD KEY idx_trn_status_date (STATUS, TRN_DATE),
+    ADD KEY idx_trn_date_report (TRN_DATE, TRN_TYPE, TRN_CCY, ACCOUNT_CCY, TRN_AMOUNT, BANK_CHARGES);
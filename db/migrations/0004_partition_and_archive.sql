@@ -0,0 +1,57 @@
+-- 0004: monthly RANGE partitioning of transactions on TRN_DATE + archive tables
+--
+-- MySQL requires every unique key of a partitioned table to include the
+-- partition column and does not allow foreign keys on it, so the FK to
+-- accounts is dropped and the PK / TRN_REF_NO keys are widened with TRN_DATE.
+-- Monthly partitions are added ahead of time by backend.archive_service
+-- (ensure_partitions), which splits them off pmax.
+ALTER TABLE transactions DROP FOREIGN KEY fk_trn_account;
+
+ALTER TABLE transactions
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, TRN_DATE),
+    DROP INDEX uq_ref,
+    ADD UNIQUE KEY uq_ref (TRN_REF_NO, TRN_DATE);
+
+ALTER TABLE transactions
+    PARTITION BY RANGE COLUMNS (TRN_DATE) (
+        PARTITION p_hist VALUES LESS THAN ('2025-01-01'),
+        PARTITION pmax VALUES LESS THAN (MAXVALUE)
+    );
+
+CREATE TABLE
+    IF NOT EXISTS txn_archives (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        month_start DATETIME NOT NULL,
+        file_path VARCHAR(512) NOT NULL,
+        row_count BIGINT NOT NULL DEFAULT 0,
+        max_txn_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        archived_at DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_txn_archive_month (month_start)
+    ) ENGINE = InnoDB;
+
+CREATE TABLE
+    IF NOT EXISTS txn_archive_rollups (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        day DATETIME NOT NULL,
+        CUSTOMER_ID VARCHAR(64) NOT NULL,
+        TRN_CCY VARCHAR(3) NOT NULL,
+        ACCOUNT_CCY VARCHAR(3) NOT NULL,
+        TRN_TYPE ENUM (
+            'TRANSFER',
+            'DEPOSIT',
+            'LOAN_PAYMENT',
+            'BILL_PAYMENT'
+        ) NOT NULL,
+        txn_count INT NOT NULL DEFAULT 0,
+        dr_count INT NOT NULL DEFAULT 0,
+        cr_count INT NOT NULL DEFAULT 0,
+        success_count INT NOT NULL DEFAULT 0,
+        failed_count INT NOT NULL DEFAULT 0,
+        amount_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        bank_charges_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        max_txn_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_txn_archive_rollup_key (day, CUSTOMER_ID, TRN_CCY, ACCOUNT_CCY, TRN_TYPE)
+    ) ENGINE = InnoDB;
@@ -51,16 +51,30 @@ CREATE TABLE
         CREDIT_ACCOUNT VARCHAR(32) NULL,
         CREDIT_ACCOUNT_CCY VARCHAR(3) NULL,
         CREATED_AT TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-        PRIMARY KEY (id),
-        UNIQUE KEY uq_ref (TRN_REF_NO),
+        -- Partitioned on TRN_DATE: unique keys must include it (migration 0004)
+        PRIMARY KEY (id, TRN_DATE),
+        UNIQUE KEY uq_ref (TRN_REF_NO, TRN_DATE),
         KEY idx_account (ACCOUNT_NO),
-        CONSTRAINT fk_trn_account FOREIGN KEY (ACCOUNT_NO) REFERENCES accounts (ACCOUNT_NO) ON UPDATE CASCADE ON DELETE RESTRICT
-    ) ENGINE = InnoDB;
+        -- Query-path indexes (see db/migrations/0003_transaction_query_indexes.sql)
+        KEY idx_trn_type_status_id (TRN_TYPE, STATUS, id),
+        KEY idx_trn_type_id (TRN_TYPE, id),
+        KEY idx_trn_status_id (STATUS, id),
+        KEY idx_trn_status_date (STATUS, TRN_DATE),
+        KEY idx_trn_date_report (TRN_DATE, TRN_TYPE, TRN_CCY, ACCOUNT_CCY, TRN_AMOUNT, BANK_CHARGES)
+        -- No FK to accounts: MySQL does not support foreign keys on partitioned tables
+    ) ENGINE = InnoDB
+    -- Monthly partitions are split off pmax by backend.archive_service.ensure_partitions
+    PARTITION BY RANGE COLUMNS (TRN_DATE) (
+        PARTITION p_hist VALUES LESS THAN ('2025-01-01'),
+        PARTITION pmax VALUES LESS THAN (MAXVALUE)
+    );
 
 CREATE TABLE
     IF NOT EXISTS kpis (
         id INT AUTO_INCREMENT PRIMARY KEY,
         computed_at DATETIME NOT NULL,
+        -- Time-series tier: 'raw' (5s snapshots), 'minute' or 'hour' rollups
+        resolution VARCHAR(8) NOT NULL DEFAULT 'raw',
         -- Existing aggregates
         total_transactions INT NOT NULL,
         total_amount_usd DECIMAL(18, 2) NOT NULL,
@@ -79,9 +93,103 @@ CREATE TABLE
         success_count INT NOT NULL,
         -- New: failure metrics
         failed_txn_count INT NOT NULL,
-        failure_rate DECIMAL(5, 2) NOT NULL -- percentage (0.00 to 100.00)
+        failure_rate DECIMAL(5, 2) NOT NULL, -- percentage (0.00 to 100.00)
+        -- Per-type breakdown (count, amount, fail_count, failure_rate)
+        txn_type_split JSON NULL,
+        KEY idx_kpis_computed_at (computed_at),
+        KEY idx_kpis_resolution_computed_at (resolution, computed_at)
+    ) ENGINE = InnoDB;
+
+-- FX rates per time bucket (units of quote_ccy per 1 base_ccy; base is USD)
+CREATE TABLE
+    IF NOT EXISTS fx_rates (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        bucket_start DATETIME NOT NULL,
+        base_ccy VARCHAR(3) NOT NULL,
+        quote_ccy VARCHAR(3) NOT NULL,
+        rate DECIMAL(18, 8) NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_fx_bucket_pair (bucket_start, base_ccy, quote_ccy)
+    ) ENGINE = InnoDB;
+
+-- Transactions pre-aggregated per minute / hour x TRN_TYPE x STATUS x currency
+CREATE TABLE
+    IF NOT EXISTS txn_rollups (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        bucket_size ENUM ('minute', 'hour') NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        TRN_TYPE ENUM (
+            'TRANSFER',
+            'DEPOSIT',
+            'LOAN_PAYMENT',
+            'BILL_PAYMENT'
+        ) NOT NULL,
+        STATUS ENUM ('SUCCESS', 'FAILED') NOT NULL,
+        TRN_CCY VARCHAR(3) NOT NULL,
+        txn_count INT NOT NULL DEFAULT 0,
+        amount_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        bank_charges_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        -- Highest transactions.id folded into this row
+        max_txn_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_txn_rollup_key (bucket_size, bucket_start, TRN_TYPE, STATUS, TRN_CCY)
     ) ENGINE = InnoDB;
 
+-- Archived (cold) months: Parquet file per month + daily rollups in KPI shape
+CREATE TABLE
+    IF NOT EXISTS txn_archives (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        month_start DATETIME NOT NULL,
+        file_path VARCHAR(512) NOT NULL,
+        row_count BIGINT NOT NULL DEFAULT 0,
+        max_txn_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        archived_at DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_txn_archive_month (month_start)
+    ) ENGINE = InnoDB;
+
+CREATE TABLE
+    IF NOT EXISTS txn_archive_rollups (
+        id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        day DATETIME NOT NULL,
+        CUSTOMER_ID VARCHAR(64) NOT NULL,
+        TRN_CCY VARCHAR(3) NOT NULL,
+        ACCOUNT_CCY VARCHAR(3) NOT NULL,
+        TRN_TYPE ENUM (
+            'TRANSFER',
+            'DEPOSIT',
+            'LOAN_PAYMENT',
+            'BILL_PAYMENT'
+        ) NOT NULL,
+        txn_count INT NOT NULL DEFAULT 0,
+        dr_count INT NOT NULL DEFAULT 0,
+        cr_count INT NOT NULL DEFAULT 0,
+        success_count INT NOT NULL DEFAULT 0,
+        failed_count INT NOT NULL DEFAULT 0,
+        amount_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        bank_charges_sum DECIMAL(20, 2) NOT NULL DEFAULT 0.00,
+        max_txn_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_txn_archive_rollup_key (day, CUSTOMER_ID, TRN_CCY, ACCOUNT_CCY, TRN_TYPE)
+    ) ENGINE = InnoDB;
+
+-- Applied schema migrations (db/migrations). A fresh install from this file
+-- is already at the latest version; keep this list in sync with new files.
+CREATE TABLE
+    IF NOT EXISTS schema_migrations (
+        version INT NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version)
+    ) ENGINE = InnoDB;
+
+INSERT IGNORE INTO schema_migrations (version, name)
+VALUES
+    (1, '0001_baseline.sql'),
+    (2, '0002_kpi_timeseries_fx_rollups.sql'),
+    (3, '0003_transaction_query_indexes.sql'),
+    (4, '0004_partition_and_archive.sql');
+
 -- Optional: seed known customers with two accounts each (USD & RM)
 USE farisight;
 
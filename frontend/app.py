@@ -1,37 +1,48 @@
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 import pandas as pd
-import numpy as np
-import httpx
 import plotly.graph_objects as go
 from utils.logger import get_logger
+from data_client import BACKEND_URL, DataClient, merge_buckets
 import os
-import glob
 
 logger = get_logger("FrontendStreamlitApp")
 st.set_page_config(page_title="FariSight Analytics", layout="wide")
 
-# Auto-refresh every 5 sec
-st_autorefresh(interval=5000, limit=None, key="dashboardrefresh")
+# Panels refresh independently as fragments; the header, CSS and chat panel
+# only render on a full run (first load / browser refresh), never on a timer.
+KPI_REFRESH = "5s"
+TREND_REFRESH = "5s"
+SPLIT_REFRESH = "10s"
+INSIGHTS_REFRESH = "30s"
 
 
-# Fetch KPIs
-@st.cache_data(ttl=2)
-def fetch_kpis():
-    try:
-        resp = httpx.get("http://localhost:8081/kpis", timeout=3)
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as e:
-        st.error(f"Could not load KPI data: {e}")
-        return None
+# Shared keep-alive client + per-resource TTL cache (see data_client.py)
+@st.cache_resource
+def get_data_client():
+    return DataClient(BACKEND_URL)
+
 
+data = get_data_client()
 
-kpis = fetch_kpis()
-if not kpis:
+# Fetch transaction trend buckets
+TREND_RANGES = {"Past Hour": "past_hour", "Past 24 Hours": "past_24h", "Past 7 Days": "past_7d"}
+
+# First paint: KPIs, trend, insights and the report list in one concurrent
+# round; the fragments below then read through the same cache
+dashboard = data.dashboard(
+    st.session_state.get("trend_filter"),
+    TREND_RANGES[st.session_state.get("date_range", "Past Hour")],
+)
+if not dashboard["kpis"]:
+    st.error(f"Could not load KPI data from {BACKEND_URL}")
     st.stop()
 
 
+def latest_kpis():
+    """Current KPI snapshot (TTL-cached; last good value if the backend is slow)."""
+    return data.fetch({"kpis": data.kpis_spec()})["kpis"] or dashboard["kpis"]
+
+
 # ---------- Load Font Awesome ----------
 st.markdown(
     """
@@ -83,281 +94,387 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-card_cont = st.container()
-with card_cont:
-    met1, met2, met3, met4 = st.columns(4)
-    met1.markdown(
-        f"""<div class='stCard'>
-        <div class='metric-title'>Total Transactions</div>
-        <div class='metric-value'>{kpis['total_transactions']:,}</div>
-        <div class='metric-delta' style="color:#27ae60"><i class="fa-solid fa-arrow-up"></i> +15%</div>
-    </div>""",
-        unsafe_allow_html=True,
-    )
 
-    met2.markdown(
-        f"""<div class='stCard'>
-            <div class='metric-title'>Total Amount (USD)</div>
-            <div class='metric-value'>${float(kpis['total_amount_usd'])/1e6:,.1f} M</div>
-            <div class='metric-delta' style="color:#27ae60"><i class="fa-solid fa-arrow-up"></i> +10%</div>
-        </div>""",
-        unsafe_allow_html=True,
-    )
-    met3.markdown(
-        f"""<div class='stCard'>
-            <div class='metric-title'>Total Amount (RM)</div>
-            <div class='metric-value'>RM {float(kpis['total_amount_rm'])/1e6:,.1f} M</div>
-            <div class='metric-delta' style="color:#27ae60"><i class="fa-solid fa-arrow-up"></i> +12%</div>
-        </div>""",
-        unsafe_allow_html=True,
-    )
-    met4.markdown(
-        f"""<div class='stCard'>
-            <div class='metric-title'>Debit / Credit</div>
-            <div class='metric-value'>{kpis['dr_count']:,} / {kpis['cr_count']:,}</div>
-            <div class='metric-delta' style="color:#e74c3c"><i class="fa-solid fa-arrow-down"></i> -2%</div>
+@st.fragment(run_every=KPI_REFRESH)
+def metric_cards():
+    kpis = latest_kpis()
+    card_cont = st.container()
+    with card_cont:
+        met1, met2, met3, met4 = st.columns(4)
+        met1.markdown(
+            f"""<div class='stCard'>
+            <div class='metric-title'>Total Transactions</div>
+            <div class='metric-value'>{kpis['total_transactions']:,}</div>
+            <div class='metric-delta' style="color:#27ae60"><i class="fa-solid fa-arrow-up"></i> +15%</div>
         </div>""",
-        unsafe_allow_html=True,
-    )
-
-st.write("")
-
-# --- KPI Data (from API) ---
-txn_split = kpis.get("txn_type_split", {})
+            unsafe_allow_html=True,
+        )
 
-with st.container(border=True):
-    upper = st.columns([2, 2.5, 1])
-    with upper[0]:
-        st.markdown(
-            "<div class='trend-title' style='padding-bottom:32px; font-weight:bold;'> Transaction trend </div>",
+        met2.markdown(
+            f"""<div class='stCard'>
+                <div class='metric-title'>Total Amount (USD)</div>
+                <div class='metric-value'>${float(kpis['total_amount_usd'])/1e6:,.1f} M</div>
+                <div class='metric-delta' style="color:#27ae60"><i class="fa-solid fa-arrow-up"></i> +10%</div>
+            </div>""",
             unsafe_allow_html=True,
         )
-    with upper[1]:
-        filter_choice = st.radio(
-            "Transaction Type",
-            list(txn_split.keys()),  # dynamically from backend
-            horizontal=True,
-            label_visibility="collapsed",
-            key="trend_filter",
+        met3.markdown(
+            f"""<div class='stCard'>
+                <div class='metric-title'>Total Amount (RM)</div>
+                <div class='metric-value'>RM {float(kpis['total_amount_rm'])/1e6:,.1f} M</div>
+                <div class='metric-delta' style="color:#27ae60"><i class="fa-solid fa-arrow-up"></i> +12%</div>
+            </div>""",
+            unsafe_allow_html=True,
         )
-    with upper[2]:
-        date_range = st.selectbox(
-            "Date Range",
-            ["Past Hour", "Past 24 Hours"],
-            key="date_range",
-            label_visibility="collapsed",
+        met4.markdown(
+            f"""<div class='stCard'>
+                <div class='metric-title'>Debit / Credit</div>
+                <div class='metric-value'>{kpis['dr_count']:,} / {kpis['cr_count']:,}</div>
+                <div class='metric-delta' style="color:#e74c3c"><i class="fa-solid fa-arrow-down"></i> -2%</div>
+            </div>""",
+            unsafe_allow_html=True,
         )
 
-    # --- time binning logic ---
-    if date_range == "Past Hour":
-        bins = 60
-        x_ticks = [f"{m:02d}m" for m in range(bins)]
-    elif date_range == "Past 24 Hours":
-        bins = 24
-        x_ticks = [f"{h:02d}:00" for h in range(bins)]
-
-    # --- get count for selected type ---
-    txn_data = txn_split.get(filter_choice, {"count": 0})
-    if isinstance(txn_data, dict):
-        total_count = txn_data.get("count", 0)
-    else:
-        total_count = txn_data
-
-    # (for now: simulate distribution until backend provides actual bins)
-    rng = np.random.default_rng(seed=42)
-    values = rng.poisson(total_count / bins, bins)
-
-    fig = go.Figure()
-    fig.add_trace(
-        go.Scatter(
-            x=x_ticks,
-            y=values,
-            mode="lines+markers",
-            line={"color": "#1565c0", "width": 2},
-        )
-    )
-    fig.update_layout(
-        margin={"l": 10, "r": 10, "t": 26, "b": 10},
-        xaxis_title=None,
-        yaxis_title=None,
-        height=250,
-        plot_bgcolor="#fafcff",
-    )
-    st.plotly_chart(fig, use_container_width=True)
 
+metric_cards()
 
-bottom_card_cont = st.container()
-with bottom_card_cont:
-    # --- LOWER TWO CARDS row ---
-    bottom_row = st.columns([1.6, 1.1])
+st.write("")
 
-    # Transaction Split card
-    with bottom_row[0]:
-        with st.container(border=True):
-            st.markdown(
-                "<div class='transaction-title' style='margin-bottom:10px;font-weight:bold;font-size:1.3em;'>Transaction Split</div>",
-                unsafe_allow_html=True,
-            )
 
-            cats = list(txn_split.keys())
-            vals = [
-                (
-                    txn_split[c]["count"]
-                    if isinstance(txn_split[c], dict)
-                    else txn_split[c]
-                )
-                for c in cats
-            ]
-
-            split_fig = go.Figure([go.Bar(x=cats, y=vals, marker_color="#1565c0")])
-            split_fig.update_layout(
-                margin={"l": 12, "r": 12, "t": 25, "b": 20},
-                xaxis_title="",
-                yaxis_title="",
-                height=275,
-                plot_bgcolor="#fafcff",
-            )
-            st.plotly_chart(split_fig, use_container_width=True)
+@st.fragment(run_every=TREND_REFRESH)
+def trend_panel():
+    kpis = latest_kpis()
+    # --- KPI Data (from API) ---
+    txn_split = kpis.get("txn_type_split", {})
 
-    # Failure percentage card (Donut)
-    with bottom_row[1]:
-        with st.container(border=True):
+    with st.container(border=True):
+        upper = st.columns([2, 2.5, 1])
+        with upper[0]:
             st.markdown(
-                """
-                <div class='metric-title' style="margin-bottom:5px; font-size:1.3em; font-weight:bold;">Failure Analysis</div>
-                """,
+                "<div class='trend-title' style='padding-bottom:32px; font-weight:bold;'> Transaction trend </div>",
                 unsafe_allow_html=True,
             )
-
-            # overall failure stats
-            total_fails = sum(
-                d.get("fail_count", 0) if isinstance(d, dict) else 0
-                for d in txn_split.values()
+        with upper[1]:
+            filter_choice = st.radio(
+                "Transaction Type",
+                list(txn_split.keys()),  # dynamically from backend
+                horizontal=True,
+                label_visibility="collapsed",
+                key="trend_filter",
             )
-            total_txns = sum(
-                (
-                    d.get("count", 0)
-                    if isinstance(d, dict)
-                    else d if isinstance(d, int) else 0
-                )
-                for d in txn_split.values()
+        with upper[2]:
+            date_range = st.selectbox(
+                "Date Range",
+                list(TREND_RANGES.keys()),
+                key="date_range",
+                label_visibility="collapsed",
             )
-            failure_rate = (total_fails / total_txns * 100) if total_txns > 0 else 0
 
-            st.markdown(
-                f"""<div style='font-size:1.2em;font-weight:600;display:inline'>
-                    Total Failed: {total_fails:,} ({failure_rate:.1f}% overall)
-                    </div><div class='metric-delta' style="color:#e74c3c;display:inline;"><i class="fa-solid fa-arrow-up"></i> +4%</div>""",
-                unsafe_allow_html=True,
+        # --- real time-bucketed counts from the rollup-backed endpoint ---
+        # The series lives in session state; each refresh only asks for the
+        # buckets from the second-newest on (the newest two may still change)
+        key = (filter_choice, TREND_RANGES[date_range])
+        trend = st.session_state.get("trend_series")
+        if trend and trend["key"] == key and len(trend["buckets"]) >= 2:
+            tail = data.timeseries_since(*key, trend["buckets"][-2]["bucket"])
+            if tail:
+                trend["buckets"] = merge_buckets(trend["buckets"], tail["buckets"], tail["window_buckets"])
+        else:
+            series = data.fetch({"timeseries": data.timeseries_spec(*key)})["timeseries"]
+            if series:
+                trend = {"key": key, "buckets": series["buckets"]}
+                st.session_state["trend_series"] = trend
+        buckets = trend["buckets"] if trend and trend["key"] == key else []
+        if date_range == "Past Hour":
+            x_ticks = [b["bucket"][11:16] for b in buckets]
+        else:
+            x_ticks = [b["bucket"][5:10] + " " + b["bucket"][11:16] for b in buckets]
+        values = [b["count"] for b in buckets]
+
+        fig = go.Figure()
+        fig.add_trace(
+            go.Scatter(
+                x=x_ticks,
+                y=values,
+                mode="lines+markers",
+                line={"color": "#1565c0", "width": 2},
             )
+        )
+        fig.update_layout(
+            margin={"l": 10, "r": 10, "t": 26, "b": 10},
+            xaxis_title=None,
+            yaxis_title=None,
+            height=250,
+            plot_bgcolor="#fafcff",
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
-            # per-type failure %
-            labels = []
-            values = []
-            hover_text = []
-            for ttype, stats in txn_split.items():
-                if isinstance(stats, dict) and stats.get("count", 0) > 0:
-                    fails = stats.get("fail_count", 0)
-                    rate = (fails / stats["count"]) * 100
-                else:
-                    fails, rate = 0, 0
-                labels.append(ttype)
-                values.append(rate)
-                hover_text.append(
-                    f"<b>{ttype}</b><br>Fails: <b>{fails:,}</b><br>{rate:.1f}%"
+
+trend_panel()
+
+
+@st.fragment(run_every=SPLIT_REFRESH)
+def split_panel():
+    txn_split = latest_kpis().get("txn_type_split", {})
+
+    bottom_card_cont = st.container()
+    with bottom_card_cont:
+        # --- LOWER TWO CARDS row ---
+        bottom_row = st.columns([1.6, 1.1])
+
+        # Transaction Split card
+        with bottom_row[0]:
+            with st.container(border=True):
+                st.markdown(
+                    "<div class='transaction-title' style='margin-bottom:10px;font-weight:bold;font-size:1.3em;'>Transaction Split</div>",
+                    unsafe_allow_html=True,
                 )
 
-            # Plotly Donut
-            blue_shades = [
-                "#6A5ACD",
-                "#000080",
-                "#4682B4",
-                "#0000CD",
-                "#00BFFF",
-            ]  # darker to lighter
-
-            donut_fig = go.Figure(
-                data=[
-                    go.Pie(
-                        labels=labels,
-                        values=values,
-                        hole=0.55,
-                        textinfo="percent",  # no labels inside
-                        hoverinfo="text",
-                        hovertext=hover_text,
-                        marker={"colors": blue_shades[: len(labels)]},
+                cats = list(txn_split.keys())
+                vals = [
+                    (
+                        txn_split[c]["count"]
+                        if isinstance(txn_split[c], dict)
+                        else txn_split[c]
                     )
+                    for c in cats
                 ]
-            )
-            donut_fig.update_layout(
-                margin={"l": 12, "r": 12, "t": 25, "b": 20},
-                height=250,
-                showlegend=True,
-                legend={"orientation": "v"},  # horizontal legend
-            )
-            st.plotly_chart(donut_fig, use_container_width=True)
 
+                split_fig = go.Figure([go.Bar(x=cats, y=vals, marker_color="#1565c0")])
+                split_fig.update_layout(
+                    margin={"l": 12, "r": 12, "t": 25, "b": 20},
+                    xaxis_title="",
+                    yaxis_title="",
+                    height=275,
+                    plot_bgcolor="#fafcff",
+                )
+                st.plotly_chart(split_fig, use_container_width=True)
 
-# --- AI Insights & FariBot CARD FULL WIDTH ---
-# --- fetch insights helper ---
-def fetch_insights():
-    resp = httpx.get("http://localhost:8081/insights")  # adjust backend URL if needed
-    if resp.status_code == 200:
-        return resp.json().get("insights", [])
-    return []
+        # Failure percentage card (Donut)
+        with bottom_row[1]:
+            with st.container(border=True):
+                st.markdown(
+                    """
+                    <div class='metric-title' style="margin-bottom:5px; font-size:1.3em; font-weight:bold;">Failure Analysis</div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+
+                # overall failure stats
+                total_fails = sum(
+                    d.get("fail_count", 0) if isinstance(d, dict) else 0
+                    for d in txn_split.values()
+                )
+                total_txns = sum(
+                    (
+                        d.get("count", 0)
+                        if isinstance(d, dict)
+                        else d if isinstance(d, int) else 0
+                    )
+                    for d in txn_split.values()
+                )
+                failure_rate = (total_fails / total_txns * 100) if total_txns > 0 else 0
+
+                st.markdown(
+                    f"""<div style='font-size:1.2em;font-weight:600;display:inline'>
+                        Total Failed: {total_fails:,} ({failure_rate:.1f}% overall)
+                        </div><div class='metric-delta' style="color:#e74c3c;display:inline;"><i class="fa-solid fa-arrow-up"></i> +4%</div>""",
+                    unsafe_allow_html=True,
+                )
+
+                # per-type failure %
+                labels = []
+                values = []
+                hover_text = []
+                for ttype, stats in txn_split.items():
+                    if isinstance(stats, dict) and stats.get("count", 0) > 0:
+                        fails = stats.get("fail_count", 0)
+                        rate = (fails / stats["count"]) * 100
+                    else:
+                        fails, rate = 0, 0
+                    labels.append(ttype)
+                    values.append(rate)
+                    hover_text.append(
+                        f"<b>{ttype}</b><br>Fails: <b>{fails:,}</b><br>{rate:.1f}%"
+                    )
+
+                # Plotly Donut
+                blue_shades = [
+                    "#6A5ACD",
+                    "#000080",
+                    "#4682B4",
+                    "#0000CD",
+                    "#00BFFF",
+                ]  # darker to lighter
+
+                donut_fig = go.Figure(
+                    data=[
+                        go.Pie(
+                            labels=labels,
+                            values=values,
+                            hole=0.55,
+                            textinfo="percent",  # no labels inside
+                            hoverinfo="text",
+                            hovertext=hover_text,
+                            marker={"colors": blue_shades[: len(labels)]},
+                        )
+                    ]
+                )
+                donut_fig.update_layout(
+                    margin={"l": 12, "r": 12, "t": 25, "b": 20},
+                    height=250,
+                    showlegend=True,
+                    legend={"orientation": "v"},  # horizontal legend
+                )
+                st.plotly_chart(donut_fig, use_container_width=True)
+
+
+split_panel()
 
 
+# --- AI Insights & FariBot CARD FULL WIDTH ---
 # --- call chatbot backend ---
 def ask_chatbot(query: str):
     try:
-        resp = httpx.post(
-            "http://localhost:8081/chatbot", json={"query": query}, timeout=60
-        )
-        if resp.status_code == 200:
-            return resp.json().get("answer", "")
-        else:
-            return f"⚠️ Error: {resp.status_code} {resp.text}"
+        return data.ask_chatbot(query).get("answer", "")
     except Exception as e:
         return f"⚠️ Exception: {e}"
 
-REPORTS_DIR = "/opt/preslaes/AI_Projects/FariSight_Analytics/reports"  # same as backend
 
 def get_latest_report():
-    """Fetch the latest report PDF from the reports folder."""
-    pdf_files = glob.glob(os.path.join(REPORTS_DIR, "*.pdf"))
-    if not pdf_files:
-        return None
-    latest_file = max(pdf_files, key=os.path.getmtime)
-    return latest_file
+    """Latest report PDF from the (cached) reports folder listing."""
+    listing = data.fetch({"reports": data.reports_spec()}, budget=0.5)["reports"]
+    reports = [r for r in listing or [] if os.path.exists(r)]
+    return reports[0] if reports else None
+
+
+@st.fragment(run_every=INSIGHTS_REFRESH)
+def insights_panel():
+    with st.container(border=True):
+        # cached insights; the backend regenerates them after material KPI changes
+        latest = data.fetch({"insights": data.insights_spec()}, budget=0.2)["insights"] or {}
+        insights = latest.get("insights", [])
+        st.markdown(
+            """
+            <div class='metric-title' style='font-size:1.3em; font-weight:bold; padding-bottom:10px;'>AI Insights</div>
+            """,
+            unsafe_allow_html=True,
+        )
 
-# --- AI Insights + Chatbot UI ---
-ai_card = st.container()
-with ai_card:
+        for insight in insights:
+            st.markdown(
+                f"""
+                <div style="display:flex; align-items:center; margin-bottom:10px; font-size:1.1em;">
+                    <i class="fa-solid fa-{insight['icon']}" 
+                    style="color:{insight['color']}; font-size:20px; margin-right:10px;"></i>
+                    <span>{insight['text']}</span>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+        if latest.get("age_seconds") is not None:
+            st.caption(f"Generated {latest['age_seconds']:.0f}s ago in {latest['generation_seconds']:.1f}s")
+
+
+# Not on a timer: reruns only when the user sends a message
+@st.fragment
+def chat_panel():
+    with st.container():
+        st.markdown(
+            """
+            <div class='metric-title' style='font-size:1.3em; font-weight:bold; padding-bottom:10px;'>FariBot</div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+        # --- Initialize session state ---
+        if "chat_history" not in st.session_state:
+            st.session_state["chat_history"] = []
+        if "show_history" not in st.session_state:
+            st.session_state["show_history"] = False
+
+        # --- Input form ---
+        with st.form(key="chat_form", clear_on_submit=True):
+            user_query = st.text_input(
+                label="Ask FariBot", placeholder="Type your question here..."
+            )
+            submitted = st.form_submit_button("Send")
+
+        # --- Handle new query ---
+        if submitted and user_query.strip():
+            with st.spinner("FariBot is thinking..."):
+                response = ask_chatbot(user_query)
+
+            # Normalize response (but ignore report_file from API now)
+            answer_text = response.get("answer", "") if isinstance(response, dict) else str(response)
+
+            entry = {
+                "q": user_query,
+                "a": answer_text,
+            }
+            st.session_state["chat_history"].append(entry)
+
+        # --- Show latest Q/A if exists ---
+        if st.session_state["chat_history"]:
+            latest = st.session_state["chat_history"][-1]
 
-    col1, col2 = st.columns([1.6, 1.1])
-    with col1:
-        with st.container(border=True):
-            insights = fetch_insights()
             st.markdown(
-                """
-                <div class='metric-title' style='font-size:1.3em; font-weight:bold; padding-bottom:10px;'>AI Insights</div>
+                f"""
+                <div style="margin-top:10px; margin-bottom:10px; padding:10px; background:#f1f1f1; border-radius:8px;">
+                    <b>You:</b> {latest['q']}
+                </div>
                 """,
                 unsafe_allow_html=True,
             )
 
-            for insight in insights:
+            # Always try to fetch the latest report from folder
+            latest_report = get_latest_report()
+            if latest_report:
+                filename = os.path.basename(latest_report)
+                if "bank_charges" in filename:
+                    label = "⬇️ Download Bank Charges Report"
+                elif "failure_timeline" in filename:
+                    label = "⬇️ Download Failure Timeline Report"
+                else:
+                    label = f"⬇️ Download Report ({filename})"
+
+                with open(latest_report, "rb") as f:
+                    st.download_button(
+                        label=label,
+                        data=f,
+                        file_name=filename,
+                        mime="application/pdf",
+                    )
+            else:
+                # No report found, fallback to just showing text
                 st.markdown(
                     f"""
-                    <div style="display:flex; align-items:center; margin-bottom:10px; font-size:1.1em;">
-                        <i class="fa-solid fa-{insight['icon']}" 
-                        style="color:{insight['color']}; font-size:20px; margin-right:10px;"></i>
-                        <span>{insight['text']}</span>
+                    <div style="margin-top:10px; margin-bottom:10px; padding:10px; background:#f1f1f1; border-radius:8px;">
+                        <b>FariBot:</b> {latest['a']}
                     </div>
                     """,
                     unsafe_allow_html=True,
                 )
 
-            st.markdown("</div></div>", unsafe_allow_html=True)
+        else:
+            # --- Placeholder when no query is asked ---
+            st.markdown(
+                """
+                <div style="margin-top:10px; margin-bottom: 10px; padding:10px; background:#f9f9f9; border-radius:8px; color:#789;">
+                    Type a question above and press Send to chat with FariBot.
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+
+
+# --- AI Insights + Chatbot UI ---
+ai_card = st.container()
+with ai_card:
+
+    col1, col2 = st.columns([1.6, 1.1])
+    with col1:
+        insights_panel()
 
     # # --- FariBot column (replace your existing col2 block with this) ---
     # with col2:
@@ -550,93 +667,7 @@ with ai_card:
 
 
     with col2:
-        with st.container():
-            st.markdown(
-                """
-                <div class='metric-title' style='font-size:1.3em; font-weight:bold; padding-bottom:10px;'>FariBot</div>
-                """,
-                unsafe_allow_html=True,
-            )
-
-            # --- Initialize session state ---
-            if "chat_history" not in st.session_state:
-                st.session_state["chat_history"] = []
-            if "show_history" not in st.session_state:
-                st.session_state["show_history"] = False
-
-            # --- Input form ---
-            with st.form(key="chat_form", clear_on_submit=True):
-                user_query = st.text_input(
-                    label="Ask FariBot", placeholder="Type your question here..."
-                )
-                submitted = st.form_submit_button("Send")
-
-            # --- Handle new query ---
-            if submitted and user_query.strip():
-                with st.spinner("FariBot is thinking..."):
-                    response = ask_chatbot(user_query)
-
-                # Normalize response (but ignore report_file from API now)
-                answer_text = response.get("answer", "") if isinstance(response, dict) else str(response)
-
-                entry = {
-                    "q": user_query,
-                    "a": answer_text,
-                }
-                st.session_state["chat_history"].append(entry)
-
-            # --- Show latest Q/A if exists ---
-            if st.session_state["chat_history"]:
-                latest = st.session_state["chat_history"][-1]
-
-                st.markdown(
-                    f"""
-                    <div style="margin-top:10px; margin-bottom:10px; padding:10px; background:#f1f1f1; border-radius:8px;">
-                        <b>You:</b> {latest['q']}
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-
-                # Always try to fetch the latest report from folder
-                latest_report = get_latest_report()
-                if latest_report:
-                    filename = os.path.basename(latest_report)
-                    if "bank_charges" in filename:
-                        label = "⬇️ Download Bank Charges Report"
-                    elif "failure_timeline" in filename:
-                        label = "⬇️ Download Failure Timeline Report"
-                    else:
-                        label = f"⬇️ Download Report ({filename})"
-
-                    with open(latest_report, "rb") as f:
-                        st.download_button(
-                            label=label,
-                            data=f,
-                            file_name=filename,
-                            mime="application/pdf",
-                        )
-                else:
-                    # No report found, fallback to just showing text
-                    st.markdown(
-                        f"""
-                        <div style="margin-top:10px; margin-bottom:10px; padding:10px; background:#f1f1f1; border-radius:8px;">
-                            <b>FariBot:</b> {latest['a']}
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-
-            else:
-                # --- Placeholder when no query is asked ---
-                st.markdown(
-                    """
-                    <div style="margin-top:10px; margin-bottom: 10px; padding:10px; background:#f9f9f9; border-radius:8px; color:#789;">
-                        Type a question above and press Send to chat with FariBot.
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
+        chat_panel()
 # ------- Updated Custom CSS tweaks -------
 st.markdown(
     """
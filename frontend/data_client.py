@@ -0,0 +1,192 @@
+# frontend/data_client.py
+"""
+Data access for the Streamlit dashboard.
+
+One keep-alive httpx.Client and a small thread pool are shared by every
+session. Resources are cached per key with their own TTL, refreshed
+concurrently, and a page never waits longer than its budget: a fetch that
+is slow or fails leaves the last good value in place while it finishes in
+the background.
+"""
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import httpx
+
+from utils.logger import get_logger
+
+logger = get_logger("FrontendDataClient")
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8081")
+REPORTS_DIR = os.getenv("REPORTS_DIR", "/opt/preslaes/AI_Projects/FariSight_Analytics/reports")
+
+# seconds a cached value counts as fresh
+RESOURCE_TTL = {"kpis": 2, "timeseries": 5, "insights": 30, "reports": 30}
+# per-request HTTP timeouts
+RESOURCE_TIMEOUT = {"kpis": 3, "timeseries": 3, "insights": 3}
+# how long a page render waits for fresh data before using the last good value
+PAGE_BUDGET = 2.5
+
+
+class DataClient:
+    def __init__(self, base_url: str = BACKEND_URL, max_workers: int = 8, transport=None):
+        self.http = httpx.Client(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=max_workers * 2, max_keepalive_connections=max_workers),
+            timeout=5,
+            transport=transport,
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-fetch")
+        self._lock = threading.Lock()
+        self._cache = {}  # key -> (value, fetched_at monotonic)
+        self._etags = {}  # key -> (etag, value)
+        self._inflight = {}  # key -> Future
+
+    # --- loaders ---
+    def _get_json(self, key, path: str, params: dict = None, timeout: float = 5):
+        headers = {}
+        with self._lock:
+            cached = self._etags.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        resp = self.http.get(path, params=params, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and cached:
+            return cached[1]
+        resp.raise_for_status()
+        data = resp.json()
+        if resp.headers.get("etag"):
+            with self._lock:
+                self._etags[key] = (resp.headers["etag"], data)
+        return data
+
+    def _load_kpis(self):
+        return self._get_json("kpis", "/kpis", timeout=RESOURCE_TIMEOUT["kpis"])
+
+    def _load_timeseries(self, trn_type, range_):
+        key = ("timeseries", trn_type, range_)
+        return self._get_json(key, "/kpis/timeseries", {"type": trn_type, "range": range_},
+                              RESOURCE_TIMEOUT["timeseries"])
+
+    def _load_insights(self):
+        return self._get_json("insights", "/insights", timeout=RESOURCE_TIMEOUT["insights"])
+
+    def _load_reports(self):
+        files = glob.glob(os.path.join(REPORTS_DIR, "*.pdf"))
+        return sorted(files, key=os.path.getmtime, reverse=True)
+
+    # --- cache ---
+    def _refresh(self, key, loader, args):
+        try:
+            value = loader(*args)
+        except Exception as e:
+            logger.warning(f"Could not load {key}: {e}")
+            raise
+        with self._lock:
+            self._cache[key] = (value, time.monotonic())
+        return value
+
+    def _start(self, key, ttl, loader, args=()):
+        """
+        Future for a fresh value of ``key``, or None if the cached one is
+        still fresh. Concurrent callers share one in-flight fetch.
+        """
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and time.monotonic() - hit[1] < ttl:
+                return None
+            future = self._inflight.get(key)
+            if future is None or future.done():
+                future = self._pool.submit(self._refresh, key, loader, args)
+                self._inflight[key] = future
+            return future
+
+    def cached(self, key, default=None):
+        """Last good value for ``key`` (possibly stale)."""
+        hit = self._cache.get(key)
+        return hit[0] if hit else default
+
+    def fetch(self, specs: dict, budget: float = PAGE_BUDGET, waits: dict = None) -> dict:
+        """
+        Refresh several resources concurrently. ``specs`` maps a result name
+        to (key, ttl, loader, args); ``waits`` optionally caps how long to
+        wait for individual names. Returns the freshest value available for
+        each name within the budget (None if never loaded).
+        """
+        futures = {name: self._start(*spec) for name, spec in specs.items()}
+        deadline = time.monotonic() + budget
+        waits = waits or {}
+        for name, future in futures.items():
+            if future is None:
+                continue
+            timeout = min(waits.get(name, budget), max(0.0, deadline - time.monotonic()))
+            wait_futures([future], timeout=timeout)
+        return {name: self.cached(spec[0]) for name, spec in specs.items()}
+
+    # --- dashboard resources ---
+    def kpis_spec(self):
+        return ("kpis", RESOURCE_TTL["kpis"], self._load_kpis, ())
+
+    def timeseries_spec(self, trn_type, range_):
+        return (("timeseries", trn_type, range_), RESOURCE_TTL["timeseries"], self._load_timeseries, (trn_type, range_))
+
+    def insights_spec(self):
+        return ("insights", RESOURCE_TTL["insights"], self._load_insights, ())
+
+    def reports_spec(self):
+        return ("reports", RESOURCE_TTL["reports"], self._load_reports, ())
+
+    def dashboard(self, trn_type=None, range_="past_hour", budget: float = PAGE_BUDGET) -> dict:
+        """
+        KPIs, trend buckets, insights and the report list in one concurrent
+        round. Insights never hold the page up: if they are still being
+        generated the previous ones are shown.
+        """
+        specs = {
+            "kpis": self.kpis_spec(),
+            "insights": self.insights_spec(),
+            "reports": self.reports_spec(),
+        }
+        if trn_type:
+            specs["timeseries"] = self.timeseries_spec(trn_type, range_)
+        return self.fetch(specs, budget, waits={"insights": 0.2, "reports": 0.5})
+
+    def timeseries_since(self, trn_type, range_, since_bucket: str):
+        """
+        Buckets from ``since_bucket`` on (uncached: the caller keeps the
+        series). Returns None on failure so the caller keeps what it has.
+        """
+        try:
+            resp = self.http.get(
+                "/kpis/timeseries",
+                params={"type": trn_type, "range": range_, "since_bucket": since_bucket},
+                timeout=RESOURCE_TIMEOUT["timeseries"],
+            )
+            resp.raise_for_status()
+            return resp.json()
+        except Exception as e:
+            logger.warning(f"Could not load trend tail: {e}")
+            return None
+
+    def ask_chatbot(self, query: str, timeout: float = 60) -> dict:
+        resp = self.http.post("/chatbot", json={"query": query}, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.http.close()
+
+
+def merge_buckets(existing: list, tail: list, window: int) -> list:
+    """
+    Replace the buckets from the first one in ``tail`` onwards and keep the
+    newest ``window`` buckets. ISO bucket starts sort chronologically.
+    """
+    if not tail:
+        return existing
+    start = tail[0]["bucket"]
+    merged = [b for b in existing if b["bucket"] < start] + tail
+    return merged[-window:]
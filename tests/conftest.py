@@ -0,0 +1,66 @@
+import itertools
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud
+from backend.models import Base, Transaction
+from utils import llm_connector
+
+_ref_seq = itertools.count(1)
+
+
+@pytest.fixture(autouse=True)
+def settled_watermark(monkeypatch):
+    """Treat every visible id as committed unless a test sets a grace window."""
+    monkeypatch.setattr(crud, "txn_watermark", crud.TxnWatermark(grace=0))
+
+
+@pytest.fixture(autouse=True)
+def llm_cache(tmp_path, monkeypatch):
+    """Keep LLM responses in a per-test cache, never the developer's one."""
+    cache = llm_connector.LLMCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(llm_connector, "llm_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with all tables created."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def make_txn(**overrides) -> Transaction:
+    """Build a Transaction with sensible defaults for tests."""
+    amount = Decimal(str(overrides.pop("amount", "100.00")))
+    values = {
+        "TRN_REF_NO": f"TRN-TEST-{next(_ref_seq):08d}",
+        "ACCOUNT_NO": "700000000001",
+        "CUSTOMER_ID": "223345",
+        "TRN_DATE": datetime(2025, 9, 4, 10, 0, 0),
+        "TRN_DESC": "Payroll Batch",
+        "DRCR_INDICATOR": "CR",
+        "TRN_AMOUNT": amount,
+        "TRN_CCY": "USD",
+        "ACCOUNT_CCY": "USD",
+        "OPENING_BALANCE": Decimal("1000.00"),
+        "CLOSING_BALANCE": Decimal("1000.00") + amount,
+        "RUNNING_BALANCE": Decimal("1000.00") + amount,
+        "TRN_TYPE": "TRANSFER",
+        "BANK_CHARGES": Decimal("2.00"),
+        "STATUS": "SUCCESS",
+        "CREDIT_ACCOUNT": "CPT-ACME-001",
+        "CREDIT_ACCOUNT_CCY": "USD",
+    }
+    values.update(overrides)
+    return Transaction(**values)
@@ -0,0 +1,131 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+import pytest
+
+from backend import archive_service, crud, fx_service, report_service
+from backend.models import Transaction, TxnArchive
+from tests.conftest import make_txn
+
+NOW = datetime(2025, 9, 15, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_service, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(archive_service, "HOT_MONTHS", 2)
+    monkeypatch.setattr(crud, "_KPI_STATE", None)
+    fx_service.clear_cache()
+    return tmp_path
+
+
+def _seed(db):
+    db.add_all([
+        make_txn(TRN_DATE=datetime(2025, 6, 3, 9, 0), amount="10.00"),
+        make_txn(TRN_DATE=datetime(2025, 6, 3, 9, 30), STATUS="FAILED", BANK_CHARGES=Decimal("0.00")),
+        make_txn(TRN_DATE=datetime(2025, 7, 1, 8, 0), TRN_TYPE="DEPOSIT", TRN_CCY="RM"),
+        make_txn(TRN_DATE=datetime(2025, 8, 20, 8, 0)),
+        make_txn(TRN_DATE=datetime(2025, 9, 1, 8, 0), DRCR_INDICATOR="DR"),
+    ])
+    db.commit()
+
+
+def test_archival_moves_cold_months_and_keeps_kpis(db):
+    _seed(db)
+    before = crud.compute_kpis(db)
+
+    archived = archive_service.run_archival(db, now=NOW)
+
+    assert archived == [datetime(2025, 6, 1), datetime(2025, 7, 1)]
+    assert db.query(Transaction).count() == 2
+    june = db.query(TxnArchive).filter_by(month_start=datetime(2025, 6, 1)).one()
+    assert june.row_count == 2
+    assert pq.read_table(june.file_path).num_rows == 2
+    assert archive_service.run_archival(db, now=NOW) == []
+
+    after = crud.compute_kpis(db)
+    for key in ("total_transactions", "dr_count", "cr_count", "fail_count",
+                "total_bank_charges", "txn_type_split", "txn_per_customer",
+                "total_amount_usd"):
+        assert after[key] == before[key], key
+
+
+def test_reports_read_archived_days_from_rollups(db):
+    _seed(db)
+    start, end = datetime(2025, 6, 3), datetime(2025, 6, 3, 23, 59, 59)
+    before = report_service._bank_charges_summary(db, start, end)
+
+    archive_service.run_archival(db, now=NOW)
+
+    assert report_service._bank_charges_summary(db, start, end) == before
+
+
+def test_parquet_export_reads_keyset_chunks(db, archive_dir, monkeypatch):
+    db.add_all([make_txn(TRN_DATE=datetime(2025, 6, d, 9, 0)) for d in range(1, 8)])
+    db.commit()
+    chunks = []
+    real = archive_service.keyset_chunks
+
+    def spy(db_, stmt, chunk_rows):
+        for chunk in real(db_, stmt, chunk_rows):
+            chunks.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(archive_service, "keyset_chunks", spy)
+    monkeypatch.setattr(archive_service, "EXPORT_CHUNK_ROWS", 3)
+    path = str(archive_dir / "june.parquet")
+
+    rows = archive_service._export_parquet(db, datetime(2025, 6, 1), datetime(2025, 7, 1), 10**9, path)
+
+    assert rows == 7 and chunks == [3, 3, 1]
+    assert pq.read_table(path).column("TRN_DATE").to_pylist()[-1] == datetime(2025, 6, 7, 9, 0)
+
+
+def test_rebuild_between_rollup_commit_and_drop_counts_month_once(db, monkeypatch):
+    _seed(db)
+    start, end = datetime(2025, 6, 3), datetime(2025, 6, 3, 23, 59, 59)
+    before = crud.compute_kpis(db)
+    report_before = report_service._bank_charges_summary(db, start, end)
+
+    # manifest + rollups committed, hot rows not dropped yet
+    monkeypatch.setattr(archive_service, "_drop_month", lambda db_, month, end_, max_id: None)
+    archive_service.archive_month(db, datetime(2025, 6, 1))
+    assert db.query(Transaction).count() == 5
+
+    # a late row in the archived month stays countable
+    db.add(make_txn(TRN_DATE=datetime(2025, 6, 30, 23, 0)))
+    db.commit()
+
+    crud.rebuild_kpi_state(db)
+    during = crud.compute_kpis(db, incremental=True)
+    assert during["total_transactions"] == before["total_transactions"] + 1
+    assert during["fail_count"] == before["fail_count"]
+    assert report_service._bank_charges_summary(db, start, end) == report_before
+
+
+def test_drop_keeps_late_rows_above_the_manifest(db, monkeypatch):
+    _seed(db)
+    june, july = datetime(2025, 6, 1), datetime(2025, 7, 1)
+    drop = archive_service._drop_month
+    monkeypatch.setattr(archive_service, "_drop_month", lambda db_, month, end_, max_id: None)
+    archive = archive_service.archive_month(db, june)
+    late = make_txn(TRN_DATE=datetime(2025, 6, 30, 23, 0))
+    db.add(late)
+    db.commit()
+
+    drop(db, june, july, archive.max_txn_id)
+
+    left = db.query(Transaction).filter(Transaction.TRN_DATE < july).all()
+    assert [t.id for t in left] == [late.id]
+
+
+def test_empty_months_are_not_archived(db):
+    db.add_all([
+        make_txn(TRN_DATE=datetime(2025, 6, 3, 9, 0)),
+        make_txn(TRN_DATE=datetime(2025, 9, 1, 8, 0)),
+    ])
+    db.commit()
+
+    assert archive_service.run_archival(db, now=NOW) == [datetime(2025, 6, 1)]
+    assert [a.month_start for a in db.query(TxnArchive)] == [datetime(2025, 6, 1)]
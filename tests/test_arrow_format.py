@@ -0,0 +1,57 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pyarrow as pa
+
+from backend import arrow_format, crud
+from backend.models import KPI, Transaction
+from tests.conftest import make_txn
+
+
+def _roundtrip(rows, schema):
+    batch = arrow_format.rows_to_record_batch(rows, schema)
+    return pa.ipc.open_stream(arrow_format.to_ipc_stream(batch)).read_all()
+
+
+def test_wants_arrow():
+    assert arrow_format.wants_arrow("application/vnd.apache.arrow.stream")
+    assert arrow_format.wants_arrow("application/json, application/vnd.apache.arrow.stream;q=0.9")
+    assert not arrow_format.wants_arrow("application/json")
+    assert not arrow_format.wants_arrow(None)
+
+
+def test_transactions_ipc_roundtrip_is_typed(db):
+    db.add_all([make_txn(amount="10.25"), make_txn(STATUS="FAILED", DRCR_INDICATOR="DR")])
+    db.commit()
+    txns = db.query(Transaction).all()
+    rows = [[getattr(t, c) for c in arrow_format.API_TRANSACTION_COLUMNS] for t in txns]
+
+    table = _roundtrip(rows, arrow_format.api_transaction_schema())
+
+    assert table.column_names == arrow_format.API_TRANSACTION_COLUMNS
+    assert pa.types.is_dictionary(table.schema.field("STATUS").type)
+    assert table.column("TRN_AMOUNT").type == pa.decimal128(18, 2)
+    assert table.column("TRN_AMOUNT").to_pylist() == [Decimal("10.25"), Decimal("100.00")]
+    assert table.column("TRN_DATE").to_pylist()[0] == datetime(2025, 9, 4, 10, 0)
+    assert table.column("STATUS").to_pylist() == ["SUCCESS", "FAILED"]
+
+
+def test_kpi_history_ipc_roundtrip(db):
+    kpi = KPI(
+        computed_at=datetime(2025, 9, 4, 10, 0), resolution="minute",
+        total_transactions=3, total_amount_usd=Decimal("30.00"), total_amount_rm=Decimal("126.90"),
+        dr_count=1, cr_count=2, txn_per_customer={"223345": 3},
+        transfer_count=3, deposit_count=0, loan_payment_count=0, bill_payment_count=0,
+        success_count=2, total_bank_charges=Decimal("4.00"), failed_txn_count=1,
+        failure_rate=Decimal("33.33"),
+    )
+    db.add(kpi)
+    db.commit()
+
+    table = _roundtrip(arrow_format.kpi_rows([kpi], crud.kpi_txn_type_split), arrow_format.kpi_history_schema())
+
+    row = table.to_pylist()[0]
+    assert row["resolution"] == "minute"
+    assert row["failure_rate"] == Decimal("33.33")
+    assert row["total_transactions"] == 3
+    assert '"TRANSFER"' in row["txn_type_split"]
@@ -0,0 +1,92 @@
+import csv
+import random
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import fx_service
+from backend.models import Account, Base, Transaction
+from data import backfill
+
+START, END = datetime(2025, 6, 6), datetime(2025, 6, 9)  # Fri .. Sun
+
+
+def _fresh_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_backfill_is_deterministic():
+    runs = []
+    for _ in range(2):
+        db = _fresh_session()
+        backfill.backfill(db, START, END, per_day=500, seed=7)
+        runs.append((
+            [(t.TRN_REF_NO, t.TRN_DATE, t.CLOSING_BALANCE) for t in db.query(Transaction).order_by(Transaction.id)],
+            [(a.ACCOUNT_NO, a.BALANCE) for a in db.query(Account).order_by(Account.ACCOUNT_NO)],
+        ))
+        db.close()
+    assert runs[0] == runs[1]
+
+
+def test_backfill_volume_and_balances(db):
+    total = backfill.backfill(db, START, END, per_day=2000, seed=1)
+    txns = db.query(Transaction).order_by(Transaction.id).all()
+    assert total == len(txns)
+
+    per_day = Counter(t.TRN_DATE.date() for t in txns)
+    assert per_day[START.date()] == pytest.approx(2000, rel=0.05)
+    assert per_day[datetime(2025, 6, 7).date()] < per_day[START.date()] / 2  # weekend
+    per_hour = Counter(t.TRN_DATE.hour for t in txns)
+    assert per_hour[11] > 10 * per_hour[3]  # diurnal peak vs night
+    assert all(START <= t.TRN_DATE < END for t in txns)
+    assert [t.TRN_DATE for t in txns] == sorted(t.TRN_DATE for t in txns)
+
+    last = {}
+    for t in txns:
+        if t.ACCOUNT_NO in last:
+            assert t.OPENING_BALANCE == last[t.ACCOUNT_NO]
+        assert t.CLOSING_BALANCE >= 0
+        last[t.ACCOUNT_NO] = t.CLOSING_BALANCE
+    for acct in db.query(Account):
+        assert acct.BALANCE == last[acct.ACCOUNT_NO]
+
+
+def test_backfill_refuses_overlapping_range(db):
+    backfill.backfill(db, START, END, per_day=100)
+    with pytest.raises(ValueError):
+        backfill.backfill(db, datetime(2025, 6, 8), datetime(2025, 6, 10), per_day=100)
+
+
+def test_backfill_refuses_history_behind_live_rows(db):
+    from tests.conftest import make_txn
+
+    backfill.seed_accounts(db, random.Random(1))
+    db.add(make_txn(TRN_DATE=datetime(2025, 9, 1, 8, 0)))
+    db.commit()
+
+    with pytest.raises(ValueError):
+        backfill.backfill(db, START, END, per_day=100)
+    assert db.query(Transaction).count() == 1
+
+
+def test_csv_backfill_needs_no_database(db, tmp_path, monkeypatch):
+    fx_service.clear_cache()
+    backfill.backfill(db, START, END, per_day=300, seed=3)
+    loaded = [(t.TRN_REF_NO, t.ACCOUNT_NO, str(t.CLOSING_BALANCE))
+              for t in db.query(Transaction).order_by(Transaction.id)]
+
+    def no_db(*args, **kwargs):
+        raise AssertionError("csv mode touched the database")
+
+    monkeypatch.setattr(backfill, "get_fx_rate", no_db)
+    monkeypatch.setattr(backfill, "SessionLocal", no_db)
+    total = backfill.write_csv_backfill(str(tmp_path), START, END, per_day=300, seed=3)
+
+    with open(tmp_path / "transactions_00000.csv", newline="") as f:
+        written = [(r[0], r[1], r[10]) for r in csv.reader(f)]
+    assert total == len(written) and written == loaded
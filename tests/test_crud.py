@@ -0,0 +1,284 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from backend import crud, fx_service
+from tests.conftest import make_txn
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(crud, "_KPI_STATE", None)
+    fx_service.clear_cache()
+
+
+def _random_txns(rng: random.Random, n: int):
+    txns = []
+    for _ in range(n):
+        status = rng.choice(["SUCCESS", "SUCCESS", "FAILED"])
+        txns.append(
+            make_txn(
+                CUSTOMER_ID=rng.choice(["223345", "445566", "SIUAE2025"]),
+                amount=f"{rng.randint(10, 40000)}.{rng.randint(0, 99):02d}",
+                TRN_CCY=rng.choice(["USD", "RM"]),
+                DRCR_INDICATOR=rng.choice(["DR", "CR"]),
+                TRN_TYPE=rng.choice(["TRANSFER", "DEPOSIT", "LOAN_PAYMENT", "BILL_PAYMENT"]),
+                STATUS=status,
+                BANK_CHARGES=Decimal("5.00") if status == "SUCCESS" else Decimal("0.00"),
+            )
+        )
+    return txns
+
+
+def _comparable(kpis: dict) -> dict:
+    return {k: v for k, v in kpis.items() if k not in ("id", "computed_at")}
+
+
+def test_compute_kpis_basic_counts(db):
+    db.add_all([
+        make_txn(DRCR_INDICATOR="DR", STATUS="FAILED", BANK_CHARGES=Decimal("0.00")),
+        make_txn(TRN_CCY="RM", amount="423.00", TRN_TYPE="DEPOSIT"),
+    ])
+    db.commit()
+
+    kpis = crud.compute_kpis(db)
+
+    assert kpis["total_transactions"] == 2
+    assert kpis["dr_count"] == 1 and kpis["cr_count"] == 1
+    assert kpis["fail_count"] == 1 and kpis["failure_rate"] == 50.0
+    assert kpis["total_bank_charges"] == "2.00"
+    assert kpis["txn_type_split"]["TRANSFER"]["fail_count"] == 1
+
+
+def test_incremental_matches_full_rebuild(db):
+    rng = random.Random(7)
+    db.add_all(_random_txns(rng, 40))
+    db.commit()
+    crud.compute_kpis(db)
+
+    for _ in range(3):
+        db.add_all(_random_txns(rng, 15))
+        db.commit()
+        incremental = crud.compute_kpis(db, incremental=True)
+
+    full = crud.compute_kpis(db)
+    assert incremental["total_transactions"] == 85
+    assert _comparable(incremental) == _comparable(full)
+
+
+def test_reconcile_detects_drift(db):
+    db.add_all(_random_txns(random.Random(1), 10))
+    db.commit()
+    crud.compute_kpis(db)
+    assert crud.reconcile_kpi_state(db)
+
+    crud._KPI_STATE["total"] += 1
+    assert not crud.reconcile_kpi_state(db)
+    assert crud._KPI_STATE["total"] == 10
+
+
+def test_fold_is_a_single_round_trip(db):
+    from sqlalchemy import event
+
+    db.add_all(_random_txns(random.Random(3), 20))
+    db.commit()
+
+    statements = []
+    engine = db.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        state = crud._fold_transactions(db, crud._empty_kpi_state())
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert state["total"] == 20
+    assert state["success"] + state["failed"] == 20
+
+
+def test_latest_kpis_is_a_pure_read(db):
+    assert crud.get_latest_kpis(db) is None
+
+    db.add(make_txn(STATUS="FAILED", BANK_CHARGES=Decimal("0.00")))
+    db.commit()
+    computed = crud.compute_kpis(db)
+    db.add(make_txn())
+    db.commit()
+
+    latest = crud.get_latest_kpis(db)
+    assert latest["id"] == computed["id"]
+    assert latest["total_transactions"] == 1
+    assert latest["txn_type_split"]["TRANSFER"]["fail_count"] == 1
+    assert latest["txn_type_split"]["TRANSFER"]["failure_rate"] == 100.0
+
+
+def _snapshot(db, at, total):
+    from backend.models import KPI
+
+    db.add(KPI(
+        resolution="raw", computed_at=at, total_transactions=total,
+        total_amount_usd=0, total_amount_rm=0, dr_count=0, cr_count=0,
+        txn_per_customer={},
+    ))
+
+
+def test_downsample_rolls_up_tiers_and_expires_raw(db):
+    from datetime import datetime, timedelta
+    from backend.models import KPI
+
+    start = datetime(2025, 9, 4, 10, 0, 0)
+    # 2 hours of 5-second snapshots
+    for i in range(2 * 720):
+        _snapshot(db, start + timedelta(seconds=5 * i), i)
+    db.commit()
+    now = start + timedelta(hours=2, seconds=1)
+
+    stats = crud.downsample_kpis(db, now=now)
+    assert stats["minute"] == 120
+    assert stats["hour"] == 2
+
+    minutes = db.query(KPI).filter(KPI.resolution == "minute").order_by(KPI.computed_at).all()
+    # each minute keeps its last snapshot, stamped with the minute start
+    assert minutes[0].computed_at == start and minutes[0].total_transactions == 11
+    hours = db.query(KPI).filter(KPI.resolution == "hour").order_by(KPI.computed_at).all()
+    assert [h.total_transactions for h in hours] == [719, 1439]
+    # raw rows older than an hour are gone
+    assert db.query(KPI).filter(KPI.resolution == "raw").count() == 719
+
+    # rerunning is idempotent
+    assert crud.downsample_kpis(db, now=now)["minute"] == 0
+
+    history = crud.get_kpi_history(db, range_="past_24h", now=now)
+    assert len(history) == 120 and all(r.resolution == "minute" for r in history)
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    cursor = crud.encode_cursor(12345)
+    assert crud.decode_cursor(cursor) == 12345
+    for bad in ("not-a-cursor", crud.encode_cursor(1)[:-3], ""):
+        with pytest.raises(ValueError):
+            crud.decode_cursor(bad)
+
+
+def test_keyset_pages_follow_filters(db):
+    from backend.models import Transaction
+
+    db.add_all([make_txn(STATUS="FAILED" if i % 3 == 0 else "SUCCESS") for i in range(10)])
+    db.commit()
+
+    seen, last_id = [], None
+    while True:
+        q = crud.filter_transactions(db.query(Transaction), status="failed")
+        if last_id is not None:
+            q = q.filter(Transaction.id < last_id)
+        page = q.order_by(Transaction.id.desc()).limit(2).all()
+        seen += [t.id for t in page]
+        if len(page) < 2:
+            break
+        last_id = crud.decode_cursor(crud.encode_cursor(page[-1].id))
+
+    assert seen == [10, 7, 4, 1]
+
+
+def test_projected_rows_serialize_like_the_dict_rows(db):
+    import orjson
+    from backend.responses import FastJSONResponse
+
+    db.add(make_txn(amount="12.50"))
+    db.commit()
+
+    cols = crud.parse_fields("trn_amount, TRN_DATE,STATUS,TRN_AMOUNT")
+    assert cols == ["TRN_AMOUNT", "TRN_DATE", "STATUS"]
+    row = db.execute(crud.transaction_columns_select(cols)).one()
+    body = orjson.loads(FastJSONResponse(dict(zip(cols, row[1:]))).body)
+    assert body == {"TRN_AMOUNT": "12.50", "TRN_DATE": "2025-09-04T10:00:00", "STATUS": "SUCCESS"}
+
+    assert len(crud.parse_fields(None)) == 17
+    with pytest.raises(ValueError):
+        crud.parse_fields("TRN_AMOUNT,id")
+
+
+def test_version_checks_track_what_reads_return(db):
+    from datetime import datetime, timedelta
+
+    assert crud.latest_kpi_id(db) is None and crud.transaction_hwm(db) is None
+    start = datetime(2025, 9, 4, 10, 0, 0)
+    for i in range(10):
+        _snapshot(db, start + timedelta(minutes=10 * i), i)
+    db.commit()
+    now = start + timedelta(minutes=95)
+
+    assert crud.latest_kpi_id(db) == crud.get_latest_kpis(db)["id"]
+    v1 = crud.kpi_history_version(db, range_="past_hour", now=now)
+    # same rows -> same version; the window sliding past a row changes it
+    assert crud.kpi_history_version(db, range_="past_hour", now=now + timedelta(minutes=4)) == v1
+    assert crud.kpi_history_version(db, range_="past_hour", now=now + timedelta(minutes=6)) != v1
+    # a new snapshot changes it
+    _snapshot(db, now, 99)
+    db.commit()
+    assert crud.kpi_history_version(db, range_="past_hour", now=now) != v1
+
+    db.add(make_txn())
+    db.commit()
+    assert crud.transaction_hwm(db) == 1
+
+
+def test_late_batch_below_the_head_is_not_skipped(db, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(crud.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(crud, "txn_watermark", crud.TxnWatermark(grace=10))
+
+    db.add_all([make_txn(id=1), make_txn(id=2)])
+    db.commit()
+    assert crud.compute_kpis(db, incremental=True)["total_transactions"] == 2
+
+    # worker B commits id 4 while worker A still holds id 3
+    db.add(make_txn(id=4))
+    db.commit()
+    clock[0] = 1
+    assert crud.compute_kpis(db, incremental=True)["total_transactions"] == 2
+    page_version = crud.transaction_page_version(db)
+    assert page_version == (4, None)
+
+    clock[0] = 5
+    db.add(make_txn(id=3))
+    db.commit()
+    clock[0] = 11  # id 4 has been visible for the grace window
+    assert crud.compute_kpis(db, incremental=True)["total_transactions"] == 4
+    # the late batch landed below the head; the watermark passing it changes the version
+    assert crud.transaction_page_version(db) == (4, 4) != page_version
+
+
+def test_kpi_snapshot_version_ignores_tick_metadata(db):
+    from datetime import datetime
+
+    db.add(make_txn())
+    db.commit()
+    first = crud.compute_kpis(db)
+    second = crud.compute_kpis(db, incremental=True)
+    assert first["id"] != second["id"]
+    assert crud.kpi_snapshot_version(first) == crud.kpi_snapshot_version(second)
+
+    db.add(make_txn(TRN_DATE=datetime(2025, 9, 5, 10, 0)))
+    db.commit()
+    third = crud.compute_kpis(db, incremental=True)
+    assert crud.kpi_snapshot_version(third) != crud.kpi_snapshot_version(second)
+
+
+def test_since_window_keeps_rows_with_out_of_order_ids(db):
+    from datetime import datetime, timedelta, timezone
+
+    from backend.models import Transaction
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.add_all([
+        make_txn(id=1, TRN_DATE=now - timedelta(days=2)),
+        make_txn(id=2, TRN_DATE=now - timedelta(minutes=5)),
+        make_txn(id=3, TRN_DATE=now - timedelta(minutes=50)),
+        make_txn(id=4, TRN_DATE=now - timedelta(hours=3)),
+    ])
+    db.commit()
+    q = crud.filter_transactions(db.query(Transaction.id), since="past_hour").order_by(Transaction.id.desc())
+    assert [r[0] for r in q] == [3, 2]
@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "frontend"))
+import data_client  # noqa: E402
+
+
+def _client(handler):
+    return data_client.DataClient("http://backend", transport=httpx.MockTransport(handler))
+
+
+def test_ttl_cache_and_etag_revalidation(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"total_transactions": 3}, headers={"ETag": '"v1"'})
+
+    client = _client(handler)
+    assert client.fetch({"kpis": client.kpis_spec()})["kpis"] == {"total_transactions": 3}
+    client.fetch({"kpis": client.kpis_spec()})
+    assert calls == [None]  # second read served from the TTL cache
+
+    monkeypatch.setitem(data_client.RESOURCE_TTL, "kpis", 0)
+    assert client.fetch({"kpis": client.kpis_spec()})["kpis"] == {"total_transactions": 3}
+    assert calls == [None, '"v1"']
+    client.close()
+
+
+def test_slow_insights_do_not_block_and_failures_keep_last_good(monkeypatch):
+    release = threading.Event()
+    state = {"fail_kpis": False}
+
+    def handler(request):
+        if request.url.path == "/insights":
+            release.wait(5)
+            return httpx.Response(200, json={"insights": [{"text": "new"}]})
+        if state["fail_kpis"]:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"id": 1})
+
+    monkeypatch.setattr(data_client, "REPORTS_DIR", "/nonexistent")
+    client = _client(handler)
+    t0 = time.monotonic()
+    first = client.dashboard()
+    assert time.monotonic() - t0 < 1.0
+    assert first["kpis"] == {"id": 1} and first["insights"] is None and first["reports"] == []
+
+    release.set()
+    time.sleep(0.2)  # background fetch lands in the cache
+    monkeypatch.setitem(data_client.RESOURCE_TTL, "kpis", 0)
+    state["fail_kpis"] = True
+    second = client.dashboard()
+    assert second["insights"] == {"insights": [{"text": "new"}]}
+    assert second["kpis"] == {"id": 1}  # last good value
+    client.close()
+
+
+def test_merge_buckets_replaces_tail_and_trims_window():
+    existing = [{"bucket": f"2025-09-04T10:0{m}:00", "count": m} for m in range(5)]
+    tail = [
+        {"bucket": "2025-09-04T10:03:00", "count": 30},
+        {"bucket": "2025-09-04T10:04:00", "count": 40},
+        {"bucket": "2025-09-04T10:05:00", "count": 5},
+    ]
+    merged = data_client.merge_buckets(existing, tail, window=5)
+    assert [b["count"] for b in merged] == [1, 2, 30, 40, 5]
+    assert data_client.merge_buckets(existing, [], window=5) == existing
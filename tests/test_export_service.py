@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from backend import export_service
+from tests.conftest import make_txn
+
+
+@pytest.fixture
+def ledger(db, monkeypatch):
+    db.add_all([make_txn(TRN_DATE=datetime(2025, 9, d, 10, 0)) for d in range(1, 11)])
+    db.commit()
+    monkeypatch.setattr(export_service, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    monkeypatch.setattr(export_service, "EXPORT_CHUNK_ROWS", 3)
+    return db
+
+
+def test_csv_export_streams_in_chunks(ledger):
+    parts = list(export_service.stream_transactions(
+        "csv", start=datetime(2025, 9, 2), end=datetime(2025, 9, 9)
+    ))
+
+    # header + ceil(7 / 3) chunks
+    assert len(parts) == 4
+    rows = list(csv.DictReader(io.StringIO(b"".join(parts).decode())))
+    assert len(rows) == 7
+    assert rows[0]["TRN_DATE"] == "2025-09-02T10:00:00"
+    assert rows[0]["TRN_AMOUNT"] == "100.00"
+
+
+def test_export_reads_keyset_chunks(ledger):
+    statements = []
+    engine = ledger.get_bind()
+
+    def capture(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, params))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        stream = export_service.stream_transactions("ndjson")
+        first = next(stream)
+        # only the first chunk has been read when the first bytes go out
+        assert len(first.splitlines()) == 3 and len(statements) == 1
+        rest = list(stream)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    # 10 rows in chunks of 3: 3 + 3 + 3 + 1, each a bounded id > last query
+    assert len(statements) == 4
+    assert all("LIMIT" in sql.upper() for sql, _ in statements)
+    assert all("transactions.id >" in sql for sql, _ in statements[1:])
+    assert sum(len(part.splitlines()) for part in [first] + rest) == 10
+
+
+def test_ndjson_export_filters(ledger):
+    body = b"".join(export_service.stream_transactions("ndjson", status="failed"))
+    assert body == b""
+
+    lines = b"".join(export_service.stream_transactions("ndjson")).splitlines()
+    assert len(lines) == 10
+    assert json.loads(lines[-1])["TRN_DATE"] == "2025-09-10T10:00:00"
+
+
+def test_parquet_export_is_readable(ledger):
+    stream = export_service.stream_transactions("parquet")
+    first = next(stream)
+    assert first.startswith(b"PAR1")
+
+    table = pq.read_table(io.BytesIO(first + b"".join(stream)))
+    assert table.num_rows == 10
+    assert str(table.schema.field("TRN_AMOUNT").type) == "decimal128(18, 2)"
@@ -0,0 +1,97 @@
+from datetime import datetime
+from decimal import Decimal
+
+from backend import fx_service
+from backend.models import FxRate
+
+
+def setup_function():
+    fx_service.clear_cache()
+
+
+def test_rates_are_persisted_and_reproducible(db):
+    at = datetime(2025, 9, 4, 10, 17)
+    rate = fx_service.get_fx_rate("USD", "RM", at, db)
+
+    assert Decimal("4.17") < rate < Decimal("4.29")
+    assert db.query(FxRate).count() == len(fx_service.REFERENCE_RATES)
+
+    fx_service.clear_cache()
+    db.query(FxRate).delete()
+    db.commit()
+    assert fx_service.get_fx_rate("USD", "RM", at, db) == rate
+
+
+def test_same_bucket_is_served_from_cache(db):
+    first = fx_service.get_fx_rate("RM", "USD", datetime(2025, 9, 4, 10, 1), db)
+    db.query(FxRate).delete()
+    db.commit()
+
+    assert fx_service.get_fx_rate("RM", "USD", datetime(2025, 9, 4, 10, 59), db) == first
+    assert db.query(FxRate).count() == 0
+
+
+def test_cross_rates_go_through_usd(db):
+    at = datetime(2025, 9, 4, 10, 0)
+    rates = fx_service.get_usd_rates(at, db)
+
+    assert fx_service.get_fx_rate("SGD", "RM", at, db) == (rates["RM"] / rates["SGD"]).quantize(Decimal("0.0001"))
+    assert fx_service.get_fx_rate("EUR", "EUR", at, db) == Decimal("1.0")
+
+
+def test_cache_evicts_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(fx_service, "FX_CACHE_SIZE", 2)
+    for hour in (1, 2, 3):
+        fx_service.get_usd_rates(datetime(2025, 9, 4, hour), db)
+
+    assert list(fx_service._cache) == [datetime(2025, 9, 4, 2), datetime(2025, 9, 4, 3)]
+
+
+def test_rate_writes_never_touch_the_callers_session(db, monkeypatch):
+    from sqlalchemy.orm import Session
+
+    from backend.models import Account
+
+    pending = Account(ACCOUNT_NO="700000000001", CUSTOMER_ID="223345", ACCOUNT_CCY="USD", BALANCE=Decimal("10"))
+    db.add(pending)
+    real = fx_service._synthesize_rates
+
+    def racing_synthesize(bucket):
+        # another process stores the bucket between our read and our insert
+        rates = real(bucket)
+        with Session(bind=db.get_bind()) as other:
+            other.add_all([FxRate(bucket_start=bucket, base_ccy="USD", quote_ccy=c, rate=r) for c, r in rates.items()])
+            other.commit()
+        return rates
+
+    monkeypatch.setattr(fx_service, "_synthesize_rates", racing_synthesize)
+    rates = fx_service.get_usd_rates(datetime(2025, 9, 4, 12, 0), db)
+
+    assert set(rates) == set(fx_service.REFERENCE_RATES)
+    assert pending in db.new  # caller's unit of work untouched by the rollback
+
+
+def test_unknown_currency_is_logged(db, caplog):
+    assert fx_service.get_fx_rate("XYZ", "USD", datetime(2025, 9, 4, 10, 0), db) == Decimal("1.0")
+    assert "No FX rate for currency 'XYZ'" in caplog.text
+
+
+def test_fx_window_reads_nearest_stored_rates_without_writing(db):
+    stored = fx_service.get_usd_rates(datetime(2025, 9, 4, 8, 0), db)
+    later = fx_service.get_usd_rates(datetime(2025, 9, 4, 12, 0), db)
+    count = db.query(FxRate).count()
+
+    window = fx_service.FxWindow(db, datetime(2025, 9, 4, 10, 0), datetime(2025, 9, 4, 13, 0))
+    # 10:00 and 11:00 have no rows: the 08:00 bucket before the window is nearest-earlier
+    expected = (Decimal("1.0") / stored["RM"]).quantize(Decimal("0.0001"))
+    assert window.rate("RM", "USD", datetime(2025, 9, 4, 10, 30)) == expected
+    assert window.rate("RM", "USD", datetime(2025, 9, 4, 12, 5)) == (
+        Decimal("1.0") / later["RM"]).quantize(Decimal("0.0001"))
+    assert window.rate("USD", "USD", datetime(2025, 9, 4, 10, 0)) == Decimal("1.0")
+
+    # an empty table falls back to the reference rates, still read-only
+    db.query(FxRate).delete()
+    empty = fx_service.FxWindow(db, datetime(2025, 9, 4, 10, 0), datetime(2025, 9, 4, 11, 0))
+    at = datetime(2025, 9, 4, 10, 0)
+    assert empty.rate("USD", "RM", at) == fx_service.reference_fx_rate("USD", "RM", at)
+    assert db.query(FxRate).count() == 0 < count
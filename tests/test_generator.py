@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+from collections import defaultdict
+
+import pytest
+
+from backend.models import Account, Transaction
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "data"))
+import generator  # noqa: E402
+
+
+@pytest.fixture
+def accounts(db):
+    generator.ensure_accounts(db)
+    return generator.load_accounts(db)
+
+
+def test_generate_batch_keeps_balances_consistent(db, accounts):
+    rng = random.Random(7)
+    for _ in range(4):
+        assert generator.generate_batch(db, accounts, 250, rng) == 250
+
+    assert db.query(Transaction).count() == 1000
+    by_account = defaultdict(list)
+    for t in db.query(Transaction).order_by(Transaction.id):
+        by_account[t.ACCOUNT_NO].append(t)
+
+    for acct in db.query(Account):
+        balance = None
+        for t in by_account[acct.ACCOUNT_NO]:
+            if balance is not None:
+                assert t.OPENING_BALANCE == balance
+            if t.STATUS == "FAILED":
+                assert t.CLOSING_BALANCE == t.OPENING_BALANCE
+                assert t.BANK_CHARGES == 0
+            assert t.CLOSING_BALANCE >= 0
+            balance = t.CLOSING_BALANCE
+        if balance is not None:
+            assert acct.BALANCE == balance
+
+
+def test_generate_batch_restores_cache_on_failure(db, accounts, monkeypatch):
+    before = [a["BALANCE"] for a in accounts]
+
+    def boom():
+        raise generator.SQLAlchemyError("commit failed")
+
+    monkeypatch.setattr(db, "commit", boom)
+    with pytest.raises(generator.SQLAlchemyError):
+        generator.generate_batch(db, accounts, 50, random.Random(1))
+    assert [a["BALANCE"] for a in accounts] == before
+
+
+def test_parse_rate():
+    assert generator.parse_rate("500/s") == 500
+    assert generator.parse_rate("2.5") == 2.5
+
+
+def test_shards_are_disjoint_and_complete(db, accounts):
+    shards = [generator.load_accounts(db, (i, 3)) for i in range(3)]
+    ids = [a["id"] for shard in shards for a in shard]
+    assert sorted(ids) == sorted(a["id"] for a in accounts)
+    assert len(ids) == len(set(ids))
+
+
+def test_generate_batch_detects_concurrent_balance_change(db, accounts):
+    # Another writer moves every balance behind this worker's cache
+    db.query(Account).update({Account.BALANCE: Account.BALANCE + 1}, synchronize_session=False)
+    db.commit()
+    before = [a["BALANCE"] for a in accounts]
+
+    with pytest.raises(generator.StaleBalanceError):
+        generator.generate_batch(db, accounts, 100, random.Random(3))
+    assert db.query(Transaction).count() == 0
+    assert [a["BALANCE"] for a in accounts] == before
+
+    reloaded = generator.load_accounts(db)
+    assert generator.generate_batch(db, reloaded, 100, random.Random(3)) == 100
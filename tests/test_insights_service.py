@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend import insights_generator, insights_service
+from backend.insights_service import InsightsCache, material_change
+
+BASE = {
+    "id": 1,
+    "total_transactions": 1000,
+    "total_amount_usd": "50000.00",
+    "failure_rate": 2.0,
+    "fail_count": 20,
+    "txn_type_split": {"TRANSFER": {"count": 600, "failure_rate": 2.5}, "DEPOSIT": {"count": 400, "failure_rate": 1.0}},
+}
+
+
+def _with(**changes):
+    return {**BASE, **changes}
+
+
+def test_material_change_thresholds():
+    assert material_change(None, BASE)
+    assert not material_change(BASE, _with(id=2, total_transactions=1020))
+    assert material_change(BASE, _with(id=2, total_transactions=1500))
+    # a window like the totals is not material; one that fails or spends differently is
+    assert not material_change(BASE, _with(id=2, total_transactions=1100, fail_count=22, total_amount_usd="55000.00"))
+    assert material_change(BASE, _with(id=2, total_transactions=1100, fail_count=27, failure_rate=2.45))
+    assert material_change(BASE, _with(id=2, total_transactions=1100, fail_count=22, total_amount_usd="57500.00"))
+    assert material_change(BASE, _with(id=2, failure_rate=2.6))
+    split = {**BASE["txn_type_split"], "TRANSFER": {"count": 600, "failure_rate": 4.0}}
+    assert material_change(BASE, _with(id=2, txn_type_split=split))
+    split = {**BASE["txn_type_split"], "BILL_PAYMENT": {"count": 1, "failure_rate": 0}}
+    assert material_change(BASE, _with(id=2, txn_type_split=split))
+
+
+def test_large_ledger_still_regenerates_on_new_activity():
+    big = _with(total_transactions=1_000_000, fail_count=20_000, total_amount_usd="50000000.00")
+    assert material_change(big, _with(id=2, total_transactions=1_000_600, fail_count=20_012,
+                                      total_amount_usd="50030000.00"))
+
+
+def test_submit_generates_in_background_and_coalesces():
+    release = threading.Event()
+    calls = []
+
+    def slow_generate(kpi):
+        calls.append(kpi["id"])
+        release.wait(2)
+        return [{"icon": "chart-line", "color": "#000", "text": f"kpi {kpi['id']}"}]
+
+    cache = InsightsCache(generate=slow_generate)
+    assert cache.snapshot()["insights"] == [] and cache.snapshot()["generated_at"] is None
+
+    assert cache.submit(BASE)  # returns immediately while the LLM "runs"
+    assert cache.snapshot()["refreshing"]
+    while not calls:
+        time.sleep(0.01)
+    cache.submit(_with(id=2, total_transactions=2000))
+    cache.submit(_with(id=3, total_transactions=3000))
+    release.set()
+    assert cache.wait_idle(2)
+
+    # the two queued snapshots collapse into one generation for the newest
+    assert calls == [1, 3]
+    snap = cache.snapshot()
+    assert snap["insights"][0]["text"] == "kpi 3" and snap["kpi_id"] == 3
+    assert snap["age_seconds"] >= 0 and snap["generation_seconds"] >= 0 and not snap["refreshing"]
+
+    # an immaterial change does not touch the LLM
+    assert not cache.submit(_with(id=4, total_transactions=3010))
+
+
+def test_stale_insights_regenerate_on_any_new_snapshot():
+    cache = InsightsCache(generate=lambda kpi: [])
+    cache.submit(BASE)
+    cache.wait_idle(2)
+    assert not cache.submit(_with(id=2))
+
+    cache._generated_at = datetime.now(timezone.utc) - timedelta(seconds=insights_service.MAX_AGE + 1)
+    assert cache.submit(_with(id=2))
+    cache.wait_idle(2)
+    assert cache.snapshot()["kpi_id"] == 2
+
+
+def test_failed_generation_keeps_previous_insights():
+    results = iter([[{"text": "first"}], RuntimeError("ollama down")])
+
+    def generate(kpi):
+        r = next(results)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    cache = InsightsCache(generate=generate)
+    cache.submit(BASE)
+    cache.wait_idle(2)
+    cache.submit(_with(id=2, total_transactions=5000))
+    cache.wait_idle(2)
+    snap = cache.snapshot()
+    assert snap["insights"] == [{"text": "first"}] and snap["kpi_id"] == 1
+
+
+def test_fallback_insights_do_not_replace_good_ones(monkeypatch):
+    answers = iter(['[{"text": "first"}]', "not json"])
+    monkeypatch.setattr(insights_generator, "run_llm", lambda prompt, **kwargs: next(answers))
+
+    cache = InsightsCache()
+    cache.submit(BASE)
+    cache.wait_idle(2)
+    cache.submit(_with(id=2, total_transactions=5000))
+    cache.wait_idle(2)
+    snap = cache.snapshot()
+    assert snap["insights"] == [{"text": "first"}] and snap["kpi_id"] == 1
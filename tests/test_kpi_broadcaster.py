@@ -0,0 +1,62 @@
+import asyncio
+import json
+import threading
+from decimal import Decimal
+
+from backend.kpi_broadcaster import KpiBroadcaster, kpi_delta
+
+
+def _parse(msg: bytes):
+    lines = msg.decode().strip().split("\n")
+    fields = dict(line.split(": ", 1) for line in lines)
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_kpi_delta_is_compact_and_recursive():
+    prev = {"id": 1, "total": 5, "split": {"TRANSFER": {"count": 3}, "DEPOSIT": {"count": 2}}, "gone": 1}
+    new = {"id": 2, "total": 5, "split": {"TRANSFER": {"count": 4}, "DEPOSIT": {"count": 2}}}
+    assert kpi_delta(prev, new) == {"id": 2, "split": {"TRANSFER": {"count": 4}}, "gone": None}
+
+
+def test_publish_from_worker_thread_fans_out():
+    async def scenario():
+        b = KpiBroadcaster()
+        b.attach_loop(asyncio.get_running_loop())
+        subs = [b.subscribe() for _ in range(3)]
+
+        t = threading.Thread(target=b.publish, args=({"id": 1, "total_amount_usd": Decimal("10.50")},))
+        t.start()
+        t.join()
+        first = [await asyncio.wait_for(q.get(), 1) for q in subs]
+        assert all(_parse(m) == ("snapshot", {"id": 1, "total_amount_usd": 10.5}) for m in first)
+
+        b.publish({"id": 2, "total_amount_usd": Decimal("12.00")})
+        event, data = _parse(await asyncio.wait_for(subs[0].get(), 1))
+        assert event == "delta" and data == {"id": 2, "total_amount_usd": 12.0}
+
+        b.unsubscribe(subs[1])
+        assert b.subscriber_count == 2
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_resynced_with_snapshot():
+    async def scenario():
+        b = KpiBroadcaster(queue_size=2)
+        b.attach_loop(asyncio.get_running_loop())
+        q = b.subscribe()
+        for i in range(1, 6):
+            b.publish({"id": i, "total": i})
+        await asyncio.sleep(0)  # let the loop run the fan-out callbacks
+
+        msgs = []
+        while not q.empty():
+            msgs.append(_parse(q.get_nowait()))
+        # whatever the client ends up applying, the last state is the newest snapshot
+        state = {}
+        for event, data in msgs:
+            state = data if event == "snapshot" else {**state, **data}
+        assert state == {"id": 5, "total": 5}
+        assert any(event == "snapshot" for event, _ in msgs)
+
+    asyncio.run(scenario())
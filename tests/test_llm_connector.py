@@ -0,0 +1,93 @@
+import sys
+
+import pytest
+
+from utils import llm_connector
+from utils.ollama_stub import start_stub
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, url = start_stub(response="hello from the stub", chunks=4)
+    monkeypatch.setattr(llm_connector, "OLLAMA_URL", url)
+    llm_connector.close_client()
+    yield server
+    llm_connector.close_client()
+    server.shutdown()
+
+
+def test_http_backend_sends_keep_alive_and_options(stub, monkeypatch):
+    monkeypatch.setattr(llm_connector, "LLM_OPTIONS", {"temperature": 0.2, "num_ctx": 2048})
+    out = llm_connector.run_llm("hi", backend="http", options={"num_ctx": 4096})
+    assert out == "hello from the stub"
+    body = stub.requests[-1]
+    assert body["model"] == llm_connector.LLM_MODEL and body["stream"] is False
+    assert body["keep_alive"] == llm_connector.LLM_KEEP_ALIVE
+    assert body["options"] == {"temperature": 0.2, "num_ctx": 4096}
+
+
+def test_streaming_and_connection_reuse(stub):
+    assert list(llm_connector.stream_llm("hi")) == ["hello", " from", " the ", "stub"]
+    for _ in range(5):
+        assert llm_connector.run_llm("hi", backend="http", stream=True) == "hello from the stub"
+    assert len(stub.requests) == 6
+    assert len(stub.connections) == 1  # one pooled keep-alive connection
+
+
+def test_falls_back_to_subprocess_when_server_is_down(stub, monkeypatch):
+    stub.shutdown()
+    stub.server_close()
+    monkeypatch.setattr(llm_connector, "LLM_COMMAND", f'"{sys.executable}" -m utils.ollama_stub --cli --response fallback')
+    assert llm_connector.run_llm("hi", backend="http", timeout=10) == "fallback"
+
+
+def test_cache_key_normalizes_whitespace_and_separates_models():
+    a = llm_connector.cache_key("m", "\n    Question:  why?\n    ")
+    assert a == llm_connector.cache_key("m", "Question: why?")
+    assert a != llm_connector.cache_key("other", "Question: why?")
+    assert a != llm_connector.cache_key("m", "Question: why?", {"temperature": 0.9})
+
+
+def test_llm_cache_lru_ttl_and_disk_tier(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm.sqlite3")
+    cache = llm_connector.LLMCache(max_entries=2, path=path)
+    cache.put("a", "A", ttl=60)
+    cache.put("b", "B", ttl=60)
+    assert cache.get("a", "chatbot") == "A"  # a is now most recent
+    cache.put("c", "C", ttl=60)  # evicts b from memory; still on disk
+    assert "b" not in cache._memory
+    assert cache.get("b", "chatbot") == "B"
+
+    # a fresh process only has the disk tier
+    restarted = llm_connector.LLMCache(path=path)
+    assert restarted.get("c", "insights") == "C"
+    assert restarted.get("missing", "insights") is None
+    assert restarted.stats() == {"insights": {"memory_hits": 0, "disk_hits": 1, "misses": 1}}
+    assert cache.stats()["chatbot"] == {"memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+    monkeypatch.setattr(llm_connector.time, "time", lambda: 1e12)  # everything expired
+    assert cache.get("a") is None and restarted.get("c") is None
+
+
+def test_run_llm_answers_repeated_prompts_from_cache(stub):
+    for _ in range(3):
+        assert llm_connector.run_llm("same question", cache="chatbot") == "hello from the stub"
+    assert llm_connector.run_llm("same   question\n", cache="chatbot") == "hello from the stub"
+    assert len(stub.requests) == 1
+    assert llm_connector.llm_cache.stats()["chatbot"] == {"memory_hits": 3, "disk_hits": 0, "misses": 1}
+
+    # uncached call sites always reach the model
+    llm_connector.run_llm("same question")
+    assert len(stub.requests) == 2
+
+
+def test_run_llm_caches_only_output_its_call_site_parses(stub):
+    def parse(raw):
+        raise ValueError("not JSON")
+
+    for _ in range(2):
+        assert llm_connector.run_llm("q", cache="insights", validate=parse) == "hello from the stub"
+    assert len(stub.requests) == 2
+    llm_connector.run_llm("q", cache="insights", validate=str.upper)
+    assert llm_connector.run_llm("q", cache="insights") == "hello from the stub"
+    assert len(stub.requests) == 3
@@ -0,0 +1,52 @@
+import os
+import re
+
+from sqlalchemy import create_engine, text
+
+from backend import migrations
+from backend.models import Base
+
+
+def test_migration_files_are_ordered_and_splittable():
+    found = migrations.discover_migrations()
+    assert [v for v, _, _ in found] == list(range(1, len(found) + 1))
+    for _, _, path in found:
+        with open(path, encoding="utf-8") as fh:
+            assert migrations.split_statements(fh.read())
+
+
+def test_upgrade_applies_pending_once(tmp_path):
+    (tmp_path / "0001_first.sql").write_text(
+        "-- comment\nCREATE TABLE a (id INT);\nCREATE TABLE b (id INT);\n"
+    )
+    (tmp_path / "0002_second.sql").write_text("ALTER TABLE a ADD COLUMN x INT;\n")
+    engine = create_engine("sqlite://")
+
+    assert migrations.upgrade(engine, str(tmp_path)) == ["0001_first.sql", "0002_second.sql"]
+    assert migrations.upgrade(engine, str(tmp_path)) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM schema_migrations")).scalar() == 2
+
+
+def test_hot_queries_do_not_full_scan_transactions():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    assert migrations.check_query_plans(engine) == {}
+
+
+def test_model_uq_ref_matches_production_schema():
+    uq = next(c for c in Base.metadata.tables["transactions"].constraints if c.name == "uq_ref")
+    with open(os.path.join(os.path.dirname(migrations.__file__), "..", "db", "schema.sql"), encoding="utf-8") as fh:
+        cols = re.search(r"UNIQUE KEY uq_ref \(([^)]*)\)", fh.read()).group(1)
+    assert [c.name for c in uq.columns] == [c.strip() for c in cols.split(",")]
+
+
+def test_plan_check_catches_a_missing_index():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX idx_trn_date_report"))
+
+    failures = migrations.check_query_plans(engine)
+    assert {"transactions_since", "bank_charges_report"} <= set(failures)
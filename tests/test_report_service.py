@@ -0,0 +1,38 @@
+from datetime import datetime
+from decimal import Decimal
+
+from backend import report_service
+from tests.conftest import make_txn
+
+START = datetime(2025, 9, 4)
+END = datetime(2025, 9, 4, 23, 59, 59)
+
+
+def test_bank_charges_summary_groups_by_type(db):
+    db.add_all([
+        make_txn(amount="100.00", BANK_CHARGES=Decimal("2.00")),
+        make_txn(amount="50.00", BANK_CHARGES=Decimal("2.00")),
+        make_txn(amount="30.00", TRN_TYPE="BILL_PAYMENT", BANK_CHARGES=Decimal("5.00")),
+        make_txn(TRN_DATE=datetime(2025, 9, 5, 1, 0), TRN_TYPE="DEPOSIT"),
+    ])
+    db.commit()
+
+    summary = report_service._bank_charges_summary(db, START, END)
+
+    assert summary["TRANSFER"]["count"] == 2
+    assert summary["TRANSFER"]["amount"] == Decimal("150.00")
+    assert summary["TRANSFER"]["charges"] == Decimal("4.00")
+    assert summary["BILL_PAYMENT"]["charges"] == Decimal("5.00")
+    assert summary["DEPOSIT"]["count"] == 0
+
+
+def test_failure_timeline_buckets_by_hour(db):
+    db.add_all([
+        make_txn(STATUS="FAILED", TRN_DATE=datetime(2025, 9, 4, 8, 5)),
+        make_txn(STATUS="FAILED", TRN_DATE=datetime(2025, 9, 4, 8, 55)),
+        make_txn(STATUS="FAILED", TRN_DATE=datetime(2025, 9, 4, 13, 0)),
+        make_txn(STATUS="SUCCESS", TRN_DATE=datetime(2025, 9, 4, 13, 1)),
+    ])
+    db.commit()
+
+    assert report_service._failure_timeline(db, START, END) == {"08:00": 2, "13:00": 1}
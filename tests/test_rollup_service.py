@@ -0,0 +1,96 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from backend import fx_service, rollup_service
+from backend.models import FxRate, TxnRollup
+from tests.conftest import make_txn
+
+NOW = datetime(2025, 9, 4, 10, 30, 15)
+
+
+@pytest.fixture(autouse=True)
+def fresh_hwm(monkeypatch):
+    monkeypatch.setattr(rollup_service, "_ROLLUP_HWM", None)
+    fx_service.clear_cache()
+
+
+def test_rollups_fold_incrementally(db):
+    db.add_all([
+        make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 5, 1)),
+        make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 5, 40), STATUS="FAILED"),
+        make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 6, 0), amount="50.00"),
+    ])
+    db.commit()
+    assert rollup_service.update_txn_rollups(db) == 3
+
+    db.add(make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 6, 30), amount="25.00"))
+    db.commit()
+    assert rollup_service.update_txn_rollups(db) == 1
+    assert rollup_service.update_txn_rollups(db) == 0
+
+    hour = (
+        db.query(TxnRollup)
+        .filter_by(bucket_size="hour", STATUS="SUCCESS", TRN_TYPE="TRANSFER")
+        .one()
+    )
+    assert hour.bucket_start == datetime(2025, 9, 4, 10, 0)
+    assert hour.txn_count == 3
+    assert Decimal(str(hour.amount_sum)) == Decimal("175.00")
+
+
+def test_timeseries_reads_minute_buckets(db):
+    db.add_all([
+        make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 29, 1)),
+        make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 29, 2), STATUS="FAILED"),
+        make_txn(TRN_DATE=datetime(2025, 9, 4, 10, 30, 2), TRN_TYPE="DEPOSIT"),
+    ])
+    db.commit()
+    rollup_service.update_txn_rollups(db)
+
+    fx_rows = db.query(FxRate).count()
+    series = rollup_service.get_timeseries(db, "past_hour", "TRANSFER", now=NOW)
+    assert db.query(FxRate).count() == fx_rows  # read path never stores rates
+    buckets = series["buckets"]
+    assert series["bucket_size"] == "minute"
+    assert len(buckets) == 60
+    assert buckets[-1]["bucket"] == "2025-09-04T10:30:00" and buckets[-1]["count"] == 0
+    assert buckets[-2]["count"] == 2 and buckets[-2]["fail_count"] == 1
+    assert buckets[-2]["amount_usd"] == "200.00"
+
+    # incremental refresh: only the requested tail of the window
+    tail = rollup_service.get_timeseries(
+        db, "past_hour", "TRANSFER", now=NOW, since_bucket=datetime(2025, 9, 4, 10, 29)
+    )
+    assert tail["window_buckets"] == 60
+    assert tail["buckets"] == buckets[-2:]
+    # a stale cursor older than the window falls back to the whole window
+    old = rollup_service.get_timeseries(
+        db, "past_hour", "TRANSFER", now=NOW, since_bucket=datetime(2025, 9, 3)
+    )
+    assert old["buckets"] == buckets
+
+
+def test_rollups_wait_for_late_batches(db, monkeypatch):
+    from backend import crud
+
+    clock = [0.0]
+    monkeypatch.setattr(crud.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(crud, "txn_watermark", crud.TxnWatermark(grace=10))
+    minute = datetime(2025, 9, 4, 10, 5)
+
+    db.add_all([make_txn(id=1, TRN_DATE=minute), make_txn(id=4, TRN_DATE=minute)])
+    db.commit()
+    assert rollup_service.update_txn_rollups(db) == 0  # id 4 not settled yet
+
+    clock[0] = 3
+    db.add_all([make_txn(id=2, TRN_DATE=minute), make_txn(id=3, TRN_DATE=minute)])
+    db.commit()
+    clock[0] = 10
+    assert rollup_service.update_txn_rollups(db) == 4
+    clock[0] = 20
+    assert rollup_service.update_txn_rollups(db) == 0
+
+    counts = db.query(TxnRollup.txn_count).filter_by(bucket_size="minute").all()
+    assert sum(c for (c,) in counts) == 4
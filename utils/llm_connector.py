@@ -1,31 +1,298 @@
-import subprocess
+import hashlib
 import json
+import os
+import shlex
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Iterator, Optional
+
+import httpx
+
 from .logger import get_logger
 
 logger = get_logger("LLMConnector")
 
-def run_llm(prompt: str, timeout: int = 60) -> str:
+# ------------------------
+# Config
+# ------------------------
+# "http" talks to the Ollama server API over a pooled keep-alive client and
+# falls back to "subprocess" (one `ollama run` per prompt) if it is down
+LLM_BACKEND = os.getenv("LLM_BACKEND", "http")
+LLM_MODEL = os.getenv("LLM_MODEL", "openchat:latest")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+# how long the server keeps the model loaded after a request
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
+# model options passed through to /api/generate, e.g. '{"temperature": 0.2, "num_ctx": 4096}'
+LLM_OPTIONS = json.loads(os.getenv("LLM_OPTIONS", "{}"))
+# subprocess backend command; defaults to `ollama run <model>`
+LLM_COMMAND = os.getenv("LLM_COMMAND")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "4"))
+
+# Response cache: seconds an answer stays valid per call site (0 = never cached)
+LLM_CACHE_TTL = {
+    "insights": 300,
+    "chatbot": 120,
+    "failure_timeline": 3600,
+    **json.loads(os.getenv("LLM_CACHE_TTL", "{}")),
+}
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+# on-disk tier that survives restarts (repo-local .cache/ by default);
+# empty string keeps the cache in memory only
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".cache", "llm_cache.sqlite3")),
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Shared keep-alive client for the model server."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                base_url=OLLAMA_URL,
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS
+                ),
+            )
+        return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+# ------------------------
+# Backends
+# ------------------------
+def _generate_body(prompt: str, model: str, stream: bool, options: Optional[dict]) -> dict:
+    return {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": LLM_KEEP_ALIVE,
+        "options": {**LLM_OPTIONS, **(options or {})},
+    }
+
+
+def stream_llm(prompt: str, timeout: int = 60, model: str = None, options: dict = None) -> Iterator[str]:
+    """
+    Yield response fragments from the model server as they are generated.
+    Raises httpx.HTTPError if the server cannot be reached.
+    """
+    body = _generate_body(prompt, model or LLM_MODEL, True, options)
+    with get_client().stream("POST", "/api/generate", json=body, timeout=timeout) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            # read through the final "done" line so the connection goes back to the pool
+            if chunk.get("response"):
+                yield chunk["response"]
+
+
+def _run_http(prompt: str, timeout: int, model: str, stream: bool, options: Optional[dict]) -> str:
+    if stream:
+        return "".join(stream_llm(prompt, timeout, model, options)).strip()
+    body = _generate_body(prompt, model, False, options)
+    resp = get_client().post("/api/generate", json=body, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json().get("response", "").strip()
+
+
+def _run_subprocess(prompt: str, timeout: int, model: str) -> str:
+    result = subprocess.run(
+        shlex.split(LLM_COMMAND) if LLM_COMMAND else ["ollama", "run", model],
+        input=prompt.encode("utf-8"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=timeout,
+    )
+    if result.returncode != 0:
+        logger.error("LLM error: %s", result.stderr.decode("utf-8"))
+        return ""
+    return result.stdout.decode("utf-8").strip()
+
+
+# ------------------------
+# Response cache
+# ------------------------
+def cache_key(model: str, prompt: str, options: dict = None) -> str:
+    """
+    Cache key for a prompt: model, effective options and the prompt with
+    whitespace runs collapsed (prompts are built from indented f-strings).
+    """
+    normalized = " ".join(prompt.split())
+    material = json.dumps([model, {**LLM_OPTIONS, **(options or {})}, normalized], sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
     """
-    Call ollama with openchat:latest and return its output as string.
+    Two-tier LLM response cache: an LRU dict in front of a SQLite file.
+    Entries carry their own expiry, so call sites can use different TTLs.
     """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, path: str = LLM_CACHE_PATH):
+        self.max_entries = max_entries
+        self.path = path
+        self._memory = OrderedDict()  # key -> (value, expires_at epoch seconds)
+        self._lock = threading.Lock()
+        self._disk = None
+        self._counts = Counter()  # (site, "memory_hits" | "disk_hits" | "misses") -> n
+
+    def _connect(self):
+        # Called with the lock held
+        if self._disk is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._disk = sqlite3.connect(self.path, check_same_thread=False)
+                self._disk.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._disk.commit()
+            except sqlite3.Error as e:
+                logger.warning("LLM disk cache unavailable (%s); using memory only", e)
+                self.path = None
+        return self._disk
+
+    def get(self, key: str, site: str = None) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit and hit[1] > now:
+                self._memory.move_to_end(key)
+                self._counts[(site, "memory_hits")] += 1
+                return hit[0]
+            self._memory.pop(key, None)
+
+            disk = self._connect()
+            if disk is not None:
+                try:
+                    row = disk.execute(
+                        "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning("LLM disk cache read failed: %s", e)
+                    row = None
+                if row and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self._counts[(site, "disk_hits")] += 1
+                    return row[0]
+            self._counts[(site, "misses")] += 1
+            return None
+
+    def put(self, key: str, value: str, ttl: float):
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            disk = self._connect()
+            if disk is not None:
+                try:
+                    disk.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+                    disk.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at),
+                    )
+                    disk.commit()
+                except sqlite3.Error as e:
+                    logger.warning("LLM disk cache write failed: %s", e)
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit / miss counters per call site."""
+        with self._lock:
+            out = {}
+            for (site, kind), n in self._counts.items():
+                out.setdefault(site, {"memory_hits": 0, "disk_hits": 0, "misses": 0})[kind] = n
+            return out
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._counts.clear()
+            disk = self._connect()
+            if disk is not None:
+                disk.execute("DELETE FROM llm_cache")
+                disk.commit()
+
+
+llm_cache = LLMCache()
+
+
+def _call_llm(prompt: str, timeout: int, model: str, stream: bool, options: Optional[dict], backend: str) -> str:
     try:
-        logger.info("Running LLM with prompt length=%d", len(prompt))
-        result = subprocess.run(
-            ["ollama", "run", "openchat:latest"],
-            input=prompt.encode("utf-8"),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=timeout,
-        )
-        if result.returncode != 0:
-            logger.error("LLM error: %s", result.stderr.decode("utf-8"))
-            return ""
-        output = result.stdout.decode("utf-8").strip()
+        logger.info("Running LLM (%s) with prompt length=%d", backend, len(prompt))
+        if backend == "http":
+            try:
+                output = _run_http(prompt, timeout, model, stream, options)
+            except httpx.TimeoutException:
+                raise
+            except httpx.TransportError as e:
+                logger.warning("LLM server unreachable (%s); falling back to subprocess", e)
+                output = _run_subprocess(prompt, timeout, model)
+        else:
+            output = _run_subprocess(prompt, timeout, model)
         logger.info("LLM response received, length=%d", len(output))
         return output
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, httpx.TimeoutException):
         logger.error("LLM call timed out after %ds", timeout)
         return ""
     except Exception as e:
         logger.exception("Unexpected error in run_llm: %s", str(e))
         return ""
+
+
+def _usable(output: str, validate) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(output)
+        return True
+    except Exception as e:
+        logger.warning("LLM output rejected by its call site, not cached: %s", e)
+        return False
+
+
+def run_llm(prompt: str, timeout: int = 60, model: str = None, stream: bool = False,
+            options: dict = None, backend: str = None, cache: str = None, validate=None) -> str:
+    """
+    Run ``prompt`` on the local model and return its output as string
+    ("" on failure). ``stream`` reads the HTTP response incrementally.
+    ``cache`` names the call site in LLM_CACHE_TTL; identical prompts
+    within its TTL are answered from llm_cache. ``validate`` is the call
+    site's parser: output it raises on is returned but not cached.
+    """
+    backend = backend or LLM_BACKEND
+    model = model or LLM_MODEL
+    ttl = LLM_CACHE_TTL.get(cache, 0) if cache else 0
+    if ttl:
+        key = cache_key(model, prompt, options)
+        hit = llm_cache.get(key, cache)
+        if hit is not None:
+            return hit
+
+    output = _call_llm(prompt, timeout, model, stream, options, backend)
+    if ttl and output and _usable(output, validate):  # failures ("") are not cached
+        llm_cache.put(key, output, ttl)
+    return output
@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Ollama model server, for tests and benchmarks.
+
+Serves POST /api/generate with a canned response (optionally streamed as
+NDJSON chunks, with a simulated per-chunk delay) over HTTP/1.1 keep-alive,
+so the connector's own overhead can be measured without a real model.
+
+    python -m utils.ollama_stub --port 11434 --delay 0.01
+    echo "prompt" | python -m utils.ollama_stub --cli   # mimics `ollama run`
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = json.dumps([
+    {"icon": "chart-line", "color": "#1565c0", "text": "Stub: transaction volume is steady."},
+])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+    # headers and body are separate writes; without TCP_NODELAY a kept-alive
+    # connection stalls on delayed ACKs like no real model server does
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests.append(body)
+            server.connections.add(self.client_address)
+        model = body.get("model")
+        text = server.response
+
+        if not body.get("stream", True):
+            time.sleep(server.delay * server.chunks)
+            self._send_json(200, {"model": model, "response": text, "done": True})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = max(1, -(-len(text) // server.chunks))
+        for i in range(0, len(text), step):
+            time.sleep(server.delay)
+            line = {"model": model, "response": text[i:i + step], "done": False}
+            self._write_chunk(json.dumps(line).encode() + b"\n")
+        self._write_chunk(json.dumps({"model": model, "response": "", "done": True}).encode() + b"\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start_stub(response: str = DEFAULT_RESPONSE, delay: float = 0.0, chunks: int = 8,
+               host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the stub on a background thread. Returns (server, base_url);
+    ``server.requests`` holds the request bodies received and
+    ``server.connections`` the distinct client sockets. Stop with
+    ``server.shutdown()``.
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.response, server.delay, server.chunks = response, delay, chunks
+    server.requests, server.connections, server.lock = [], set(), threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ollama API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--response", default=DEFAULT_RESPONSE)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per streamed chunk")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--cli", action="store_true",
+                        help="read a prompt on stdin and print the response, like `ollama run`")
+    args = parser.parse_args()
+
+    if args.cli:
+        sys.stdin.read()
+        time.sleep(args.delay * args.chunks)
+        print(args.response)
+    else:
+        server, url = start_stub(args.response, args.delay, args.chunks, args.host, args.port)
+        print(f"Ollama stub listening on {url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()